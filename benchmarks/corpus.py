@@ -0,0 +1,77 @@
+#
+# benchmarks/corpus.py
+#
+# Synthetic, seeded corpus for offline benchmarks: financial-looking
+# headlines and RSS documents built from them. The same seed always
+# produces the same corpus, so runs are comparable.
+#
+
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import List
+from xml.sax.saxutils import escape
+
+COMPANIES = [
+    "Apple", "Microsoft", "Amazon", "Alphabet", "Meta", "Tesla", "Nvidia", "JPMorgan",
+    "Goldman Sachs", "Exxon Mobil", "Pfizer", "Boeing", "Walmart", "Netflix", "Intel",
+    "Coca-Cola", "Disney", "Ford", "Starbucks", "Visa", "AMD", "Oracle", "Costco", "Chevron",
+]
+
+TEMPLATES = [
+    "{company} beats {period} earnings estimates as {driver} surges",
+    "{company} shares {move_down} after {period} revenue misses forecasts",
+    "{company} raises full-year guidance on strong {driver}",
+    "{company} cuts {count} jobs amid slowing {driver}",
+    "{company} announces ${amount} billion share buyback",
+    "{company} to report {period} results next week",
+    "Analysts downgrade {company} citing weak {driver}",
+    "{company} stock {move_up} to record high on {driver} optimism",
+    "{company} faces regulatory probe over {driver} practices",
+    "{company} names new chief financial officer",
+    "{company} files for bankruptcy protection after debt talks fail",
+    "{company} completes acquisition of rival in ${amount} billion deal",
+]
+
+FILLERS = {
+    'period': ["first-quarter", "second-quarter", "third-quarter", "fourth-quarter", "annual"],
+    'driver': ["cloud demand", "iPhone sales", "ad revenue", "AI chip demand", "subscriber growth",
+               "consumer spending", "oil prices", "loan growth", "vehicle deliveries", "travel demand"],
+    'move_down': ["fall", "slide", "plunge", "tumble", "drop"],
+    'move_up': ["jumps", "soars", "climbs", "rallies", "surges"],
+    'count': ["1,000", "5,000", "10,000", "12,000"],
+    'amount': ["5", "10", "25", "70"],
+}
+
+def generate_headlines(count: int, seed: int = 42) -> List[str]:
+    """ Returns `count` synthetic headlines. Duplicates are possible, as in real feeds. """
+    rng = random.Random(seed)
+    headlines = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        values = {key: rng.choice(options) for key, options in FILLERS.items()}
+        headlines.append(template.format(company=rng.choice(COMPANIES), **values))
+    return headlines
+
+def generate_rss(headlines: List[str], feed_name: str = "bench", start: datetime = None) -> bytes:
+    """
+    Builds an RSS 2.0 document with one item per headline, newest first.
+    Each item has a unique link, GUID and pubDate.
+    """
+    start = start or datetime(2025, 10, 24, 12, 0, tzinfo=timezone.utc)
+    items = []
+    for n, headline in enumerate(headlines):
+        published = format_datetime(start - timedelta(minutes=n))
+        link = f"https://news.example.com/{feed_name}/{n}"
+        items.append(
+            f"<item><title>{escape(headline)}</title><link>{link}</link>"
+            f"<guid>{link}</guid><pubDate>{published}</pubDate>"
+            f"<description>{escape(headline)}. Full story inside.</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>{escape(feed_name)}</title>'
+        f'<link>https://news.example.com/{feed_name}</link><description>Synthetic feed</description>'
+        + "".join(items) +
+        '</channel></rss>'
+    ).encode('utf-8')
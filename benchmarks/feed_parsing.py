@@ -0,0 +1,104 @@
+#
+# benchmarks/feed_parsing.py
+#
+# Feed parsing cost on large synthetic RSS documents:
+#
+#   feedparser          the whole document through feedparser (the old path;
+#                       skipped when feedparser isn't installed)
+#   stream_full         the incremental parser on a first fetch (no mark)
+#   stream_incremental  the incremental parser on a refetch where only the
+#                       newest `--new` items are past the feed's high-water mark
+#
+# 'read' is the share of the document's chunks the parser asked for, i.e.
+# how much of the response would come off the socket.
+#
+# Usage:
+#   python -m benchmarks.feed_parsing
+#   python -m benchmarks.feed_parsing --items 20000 --new 50 --output parsing.json
+#
+
+import argparse
+import importlib.util
+import json
+import sys
+import time
+from typing import List, Optional
+
+from benchmarks.corpus import generate_headlines, generate_rss
+from src.scraper import stream_parser
+
+CHUNK_SIZE = 65536
+
+def _chunks(body: bytes) -> List[bytes]:
+    return [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+
+def _best_of(repeat: int, fn) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def measure(items: int, new: int, repeat: int) -> dict:
+    body = generate_rss(generate_headlines(items))
+    chunks = _chunks(body)
+    first = stream_parser.FeedParse('bench').parse(chunks)
+    # The mark a previous fetch would have left: the item just behind the `new` newest ones.
+    previous = first.articles[min(new, len(first.articles) - 1)]
+    results = {'document': {'items': items, 'new_items': new, 'bytes': len(body), 'chunks': len(chunks)}}
+
+    if importlib.util.find_spec('feedparser'):
+        import feedparser
+
+        seconds = _best_of(repeat, lambda: feedparser.parse(body))
+        results['feedparser'] = {'seconds': seconds, 'articles': len(feedparser.parse(body).entries), 'read': 1.0}
+    else:
+        results['feedparser'] = None
+
+    def stream(published=None, guid=None):
+        consumed = []
+
+        def counted():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        parse = stream_parser.FeedParse('bench', published, guid).parse(counted())
+        return parse, len(consumed)
+
+    for name, mark in (('stream_full', (None, None)),
+                       ('stream_incremental', (previous['published_timestamp'], previous['url']))):
+        seconds = _best_of(repeat, lambda: stream(*mark))
+        parse, read = stream(*mark)
+        results[name] = {'seconds': seconds, 'articles': len(parse.articles), 'read': read / len(chunks)}
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Streaming feed parser vs feedparser on large feeds.")
+    parser.add_argument('--items', type=int, default=5000, help="Items in the synthetic feed.")
+    parser.add_argument('--new', type=int, default=20, help="Items newer than the high-water mark on refetch.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per case; the best is reported.")
+    parser.add_argument('--output', help="Write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    results = measure(args.items, args.new, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    document = results['document']
+    print(f"{document['items']} items, {document['bytes'] / 1e6:.1f} MB; {document['new_items']} new on refetch")
+    baseline = results['feedparser']
+    for name in ('feedparser', 'stream_full', 'stream_incremental'):
+        r = results[name]
+        if r is None:
+            print(f"{name:20s} skipped (not installed)")
+            continue
+        speedup = f"   ({baseline['seconds'] / r['seconds']:.1f}x vs feedparser)" if baseline else ""
+        print(f"{name:20s} {r['seconds'] * 1000:9.1f} ms   {r['articles']:6d} articles   "
+              f"read {r['read']:6.1%}{speedup}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
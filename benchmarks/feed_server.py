@@ -0,0 +1,77 @@
+#
+# benchmarks/feed_server.py
+#
+# A local RSS server for offline benchmarks and tests. Serves a fixed set of
+# documents at /<feed_name>, with an ETag per document, and answers 304 to
+# conditional requests that present the current ETag.
+#
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        name = self.path.lstrip('/')
+        body = self.server.feeds.get(name)
+        self.server.request_count += 1
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = self.server.etags[name]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class LocalFeedServer:
+    """
+    Serves `feeds` ({name: rss_bytes}) on 127.0.0.1 from a background thread.
+
+    Usage:
+        with LocalFeedServer({'a': rss}) as server:
+            sources = server.sources()
+    """
+
+    def __init__(self, feeds: Dict[str, bytes]):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.feeds = dict(feeds)
+        self.httpd.etags = {name: '"%s"' % hashlib.md5(body).hexdigest() for name, body in feeds.items()}
+        self.httpd.request_count = 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def sources(self) -> List[dict]:
+        """ Feed definitions in the shape `feed_scraper.load_sources()` returns. """
+        return [
+            {'name': name, 'url': f"{self.base_url}/{name}", 'label': name, 'interval': None}
+            for name in self.httpd.feeds
+        ]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,120 @@
+#
+# benchmarks/logging_overhead.py
+#
+# Cost of a log call on the calling thread, before and after the logging
+# changes:
+#
+#   disabled_debug   a debug call below the logger's level, formatted eagerly
+#                    with an f-string (before) vs lazy %-style arguments (after)
+#   enabled_info     an INFO record written to a file and a console stream,
+#                    synchronously (before) vs through the async queue (after);
+#                    'drain' is how long the listener then takes to catch up
+#   repeated_error   the same error logged in a tight loop, every record
+#                    written (before) vs rate-limited by key (after)
+#
+# Usage:
+#   python -m benchmarks.logging_overhead
+#   python -m benchmarks.logging_overhead --calls 200000 --output logging.json
+#
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from src.utils.logger import configure_logger, stop_listener
+
+HEADLINE = "Apple beats quarterly earnings estimates on strong iPhone sales, analysts say"
+
+def _logger(name: str, directory: str, level: int, async_mode: bool, burst: int = 0) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    handlers = [
+        logging.FileHandler(os.path.join(directory, f"{name}.log")),
+        logging.StreamHandler(open(os.devnull, 'w')),
+    ]
+    return configure_logger(logger, level, handlers, async_mode=async_mode, queue_size=1_000_000,
+                            rate_limit_burst=burst, rate_limit_interval=60.0)
+
+def _ns_per_call(calls: int, fn) -> float:
+    started = time.perf_counter()
+    fn(calls)
+    return (time.perf_counter() - started) / calls * 1e9
+
+def measure(calls: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # --- disabled debug ---
+        quiet = _logger('quiet', directory, logging.INFO, async_mode=True)
+        label, score = 'Positive', 0.9731
+
+        def eager(n):
+            for _ in range(n):
+                quiet.debug(f"Analyzed '{HEADLINE[:50]}...': Label={label}, Score={score:.4f}")
+
+        def lazy(n):
+            for _ in range(n):
+                quiet.debug("Analyzed '%.50s...': Label=%s, Score=%.4f", HEADLINE, label, score)
+
+        results['disabled_debug'] = {'before_ns': _ns_per_call(calls, eager), 'after_ns': _ns_per_call(calls, lazy)}
+
+        # --- enabled info ---
+        io_calls = max(1, calls // 10)
+        sync = _logger('sync', directory, logging.INFO, async_mode=False)
+        queued = _logger('async', directory, logging.INFO, async_mode=True)
+
+        def info(logger):
+            def run(n):
+                for i in range(n):
+                    logger.info("Inserted [%s]: '%.50s...' (%d)", 'Yahoo', HEADLINE, i)
+            return run
+
+        before = _ns_per_call(io_calls, info(sync))
+        after = _ns_per_call(io_calls, info(queued))
+        started = time.perf_counter()
+        stop_listener(queued.name)
+        drain = time.perf_counter() - started
+        results['enabled_info'] = {'before_ns': before, 'after_ns': after, 'calls': io_calls,
+                                   'drain_seconds': drain}
+
+        # --- repeated error ---
+        noisy = _logger('noisy', directory, logging.INFO, async_mode=False)
+        limited = _logger('limited', directory, logging.INFO, async_mode=False, burst=5)
+
+        def repeated(logger, extra):
+            def run(n):
+                for _ in range(n):
+                    logger.error("Error fetching feed '%s': %s", 'Yahoo', 'timed out', extra=extra)
+            return run
+
+        results['repeated_error'] = {
+            'before_ns': _ns_per_call(io_calls, repeated(noisy, None)),
+            'after_ns': _ns_per_call(io_calls, repeated(limited, {'rate_key': 'feed.Yahoo'})),
+            'calls': io_calls,
+        }
+        stop_listener(quiet.name)
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-call logging overhead before and after async/lazy logging.")
+    parser.add_argument('--calls', type=int, default=100000, help="Calls for the disabled case (I/O cases use a tenth).")
+    parser.add_argument('--output', help="Write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    results = measure(args.calls)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    for name, r in results.items():
+        speedup = r['before_ns'] / r['after_ns'] if r['after_ns'] else float('inf')
+        print(f"{name:16s} before {r['before_ns']:9.0f} ns/call   after {r['after_ns']:9.0f} ns/call   ({speedup:.1f}x)")
+    print(f"async listener drained {results['enabled_info']['calls']} records in "
+          f"{results['enabled_info']['drain_seconds']:.2f}s after the calls returned")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
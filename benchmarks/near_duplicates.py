@@ -0,0 +1,221 @@
+#
+# benchmarks/near_duplicates.py
+#
+# Precision/recall and throughput of near-duplicate detection on a labeled
+# sample. Positives are the same story re-published with wire-style edits;
+# negatives include hard cases that share most words but not the meaning
+# (another company, the opposite direction, a different figure).
+#
+# Usage:
+#   python -m benchmarks.near_duplicates
+#   python -m benchmarks.near_duplicates --thresholds 0.5 0.6 0.7 --output neardup.json
+#
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from benchmarks import corpus
+from src.nlp import entities
+from src.nlp.near_duplicates import NearDuplicateIndex, anchors, similarity
+
+# Hand-labeled pairs: (headline, variant, is_near_duplicate).
+LABELED_PAIRS: List[Tuple[str, str, bool]] = [
+    ("Apple beats quarterly earnings estimates on strong iPhone sales",
+     "UPDATE 2-Apple beats quarterly earnings estimates on strong iPhone sales", True),
+    ("Tesla shares plunge after deliveries miss expectations",
+     "Tesla shares plunge after deliveries miss expectations - Reuters", True),
+    ("Federal Reserve holds interest rates steady",
+     "Federal Reserve holds interest rates steady.", True),
+    ("Amazon announces layoffs of 10,000 corporate employees",
+     "Amazon announces layoffs of 10,000 corporate employees, memo shows", True),
+    ("Microsoft raises full-year revenue guidance",
+     "BRIEF-Microsoft raises full-year revenue guidance", True),
+    ("Nvidia stock hits record high on AI chip demand",
+     "Nvidia stock hits record high on AI chip demand | Yahoo Finance", True),
+    ("Retailer files for Chapter 11 bankruptcy protection",
+     "EXCLUSIVE: Retailer files for Chapter 11 bankruptcy protection", True),
+    ("Pfizer wins FDA approval for new RSV vaccine",
+     "Pfizer wins FDA approval for new RSV vaccine for older adults", True),
+    ("Boeing faces new probe over 737 MAX safety lapses",
+     "Boeing faces new probe over 737 MAX safety lapses, sources say", True),
+    ("JPMorgan profit jumps 25% on higher rates",
+     "JPMorgan profit jumps 25% on higher interest rates", True),
+    ("Netflix subscriber growth surpasses forecasts",
+     "UPDATE 1-Netflix subscriber growth surpasses forecasts", True),
+    ("Intel cuts dividend amid falling PC demand",
+     "Intel cuts dividend amid falling PC demand - CNBC", True),
+    ("Meta shares drop as ad revenue growth slows",
+     "Meta shares drop as ad-revenue growth slows", True),
+    ("Ford recalls 500,000 vehicles over brake defect",
+     "Ford recalls 500,000 vehicles over brake defect, NHTSA says", True),
+    ("Costco same-store sales rise 7% in October",
+     "RPT-Costco same-store sales rise 7% in October", True),
+    ("Goldman Sachs downgrades outlook for European stocks",
+     "Goldman Sachs downgrades its outlook for European stocks", True),
+    ("Chinese property developer defaults on offshore bonds",
+     "Chinese property developer defaults on offshore bonds as crisis deepens", True),
+    ("Shopify swings to a loss as costs balloon",
+     "Shopify swings to a loss as costs balloon — MarketWatch", True),
+    ("Visa and Mastercard settle merchant fee lawsuit",
+     "CORRECTED-Visa and Mastercard settle merchant fee lawsuit", True),
+    ("Starbucks upgrades outlook after record holiday quarter",
+     "Starbucks upgrades outlook after a record holiday quarter", True),
+
+    # Hard negatives: most words shared, different story.
+    ("Tesla shares rise after deliveries beat expectations",
+     "Tesla shares fall after deliveries miss expectations", False),
+    ("Apple beats quarterly earnings estimates on strong iPhone sales",
+     "Apple misses quarterly earnings estimates on weak iPhone sales", False),
+    ("Microsoft raises full-year revenue guidance",
+     "Oracle raises full-year revenue guidance", False),
+    ("Amazon announces layoffs of 10,000 corporate employees",
+     "Amazon announces hiring of 10,000 warehouse employees", False),
+    ("Federal Reserve holds interest rates steady",
+     "Federal Reserve raises interest rates by half a point", False),
+    ("JPMorgan profit jumps 25% on higher rates",
+     "Wells Fargo profit falls 10% on higher costs", False),
+    ("Intel cuts dividend amid falling PC demand",
+     "AMD raises prices amid rising PC demand", False),
+    ("Costco same-store sales rise 7% in October",
+     "Target same-store sales fall 3% in October", False),
+    ("Goldman Sachs downgrades outlook for European stocks",
+     "Morgan Stanley upgrades outlook for Asian stocks", False),
+    ("Ford recalls 500,000 vehicles over brake defect",
+     "GM recalls 20,000 vehicles over airbag defect", False),
+    ("Boeing faces new probe over 737 MAX safety lapses",
+     "Airbus wins new orders for A321 jets", False),
+    ("Nvidia stock hits record high on AI chip demand",
+     "Nvidia stock slides from record high as AI chip demand cools", False),
+    ("Oil prices slip as OPEC output rises",
+     "Oil prices jump as OPEC cuts output", False),
+    ("Gold edges higher as dollar weakens",
+     "Gold edges lower as dollar strengthens", False),
+    ("Home sales fall for the sixth straight month",
+     "Home prices rise for the sixth straight month", False),
+    ("Unemployment rate unchanged at 3.7%",
+     "Inflation rate unchanged at 3.2%", False),
+    ("Disney names new chief financial officer",
+     "Disney names new chief executive officer", False),
+    ("Netflix subscriber growth surpasses forecasts",
+     "Spotify subscriber growth misses forecasts", False),
+    ("Coca-Cola to report earnings next Tuesday",
+     "PepsiCo to report earnings next Thursday", False),
+    ("Alphabet announces $70 billion share buyback",
+     "Alphabet announces $5 billion bond sale", False),
+]
+
+_PREFIXES = ["UPDATE 1-", "UPDATE 2-", "BRIEF-", "EXCLUSIVE: ", "RPT-"]
+_SUFFIXES = [" - Reuters", " | Yahoo Finance", ", sources say", ", analysts say", "."]
+
+def synthetic_pairs(count: int, seed: int = 7) -> List[Tuple[str, str, bool]]:
+    """
+    Generates labeled pairs from the benchmark corpus: wire-style edits of a
+    headline (positives) and a sibling from the same template with another
+    company or filler (negatives).
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for n in range(count):
+        template = rng.choice(corpus.TEMPLATES)
+        values = {key: rng.choice(options) for key, options in corpus.FILLERS.items()}
+        company = rng.choice(corpus.COMPANIES)
+        headline = template.format(company=company, **values)
+        if n % 2 == 0:
+            variant = headline
+            if rng.random() < 0.6:
+                variant = rng.choice(_PREFIXES) + variant
+            if rng.random() < 0.6 or variant == headline:
+                variant += rng.choice(_SUFFIXES)
+            pairs.append((headline, variant, True))
+        else:
+            other = dict(values)
+            key = rng.choice(list(corpus.FILLERS))
+            other[key] = rng.choice([v for v in corpus.FILLERS[key] if v != values[key]])
+            other_company = rng.choice([c for c in corpus.COMPANIES if c != company])
+            pairs.append((headline, template.format(company=other_company, **other), False))
+    return pairs
+
+def evaluate(pairs: Sequence[Tuple[str, str, bool]], thresholds: Sequence[float]) -> List[dict]:
+    """
+    Precision, recall and F1 on labeled pairs, with the index's match rule:
+    same anchors and `similarity >= threshold`.
+    """
+    index = NearDuplicateIndex(persist=False)
+    tagger = entities.get_entity_tagger()
+
+    def anchor(headline):
+        return anchors(headline, tagger.tag(headline) if tagger else None)
+
+    scored = [
+        (similarity(index.signature(a), index.signature(b)) if anchor(a) == anchor(b) else 0.0, label)
+        for a, b, label in pairs
+    ]
+    report = []
+    for threshold in thresholds:
+        tp = sum(1 for s, label in scored if s >= threshold and label)
+        fp = sum(1 for s, label in scored if s >= threshold and not label)
+        fn = sum(1 for s, label in scored if s < threshold and label)
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        report.append({'threshold': threshold, 'precision': precision, 'recall': recall, 'f1': f1,
+                       'true_positives': tp, 'false_positives': fp, 'false_negatives': fn})
+    return report
+
+def measure_throughput(index_size: int, batch_size: int, seed: int = 42) -> dict:
+    """ Headlines per second for `plan_batch` (entity tagging included) against an index of `index_size` headlines. """
+    index = NearDuplicateIndex(persist=False)
+    indexed = corpus.generate_headlines(index_size, seed=seed)
+    started = time.perf_counter()
+    for n, (headline, tags) in enumerate(zip(indexed, entities.tag_headlines(indexed))):
+        index._insert(str(n), index.signature(headline), anchors(headline, tags),
+                      {'label': 'Neutral', 'score': 0.5}, time.time())
+    build_seconds = time.perf_counter() - started
+
+    batch = corpus.generate_headlines(batch_size, seed=seed + 1)
+    started = time.perf_counter()
+    plan = index.plan_batch(batch)
+    seconds = time.perf_counter() - started
+    matched = sum(1 for entry in plan if entry['similarity'] is not None)
+    return {
+        'index_size': index_size,
+        'batch_size': batch_size,
+        'index_build_per_second': index_size / build_seconds if build_seconds else 0.0,
+        'lookup_per_second': batch_size / seconds if seconds else 0.0,
+        'matched': matched,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Near-duplicate detection precision/recall and throughput.")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    parser.add_argument('--synthetic', type=int, default=400, help="Synthetic labeled pairs added to the sample.")
+    parser.add_argument('--index-size', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--output', help="Write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    results = {
+        'labeled': evaluate(LABELED_PAIRS, args.thresholds),
+        'labeled_plus_synthetic': evaluate(LABELED_PAIRS + synthetic_pairs(args.synthetic), args.thresholds),
+        'throughput': measure_throughput(args.index_size, args.batch_size),
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    for name in ('labeled', 'labeled_plus_synthetic'):
+        print(f"{name}:")
+        for r in results[name]:
+            print(f"  threshold {r['threshold']:.2f}  precision {r['precision']:.3f}  "
+                  f"recall {r['recall']:.3f}  f1 {r['f1']:.3f}")
+    t = results['throughput']
+    print(f"throughput: {t['lookup_per_second']:.0f} lookups/s against {t['index_size']} indexed headlines "
+          f"(index build {t['index_build_per_second']:.0f}/s, {t['matched']} of {t['batch_size']} matched)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#
+# benchmarks/run.py
+#
+# Offline benchmark harness for every pipeline stage. No network access is
+# needed: feeds come from a local HTTP server filled with a synthetic corpus,
+# the database is a temporary file, and the model is either the real FinBERT
+# (only if it is already in the local Hugging Face cache) or a pure-Python stub.
+#
+# Each stage is measured on its own, in records (headlines) per second:
+#
+#   scrape      HTTP fetch of every feed from the local server
+#   parse       turning the feed documents into articles
+#   tokenize    tokenizing + bucketing headlines for the model
+#   infer       the model forward passes
+#   load        bulk insert into SQLite
+#   end_to_end  pipeline.run_pipeline() against the local server
+#
+# Usage:
+#   python -m benchmarks.run --output bench.json
+#   python -m benchmarks.run --output bench.json --compare benchmarks/baseline.json
+#
+# With --compare, any stage whose throughput falls more than --tolerance
+# below the baseline is reported as a regression and the exit code is 1.
+#
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks import corpus
+from benchmarks.feed_server import LocalFeedServer
+from benchmarks.stub_model import real_model_available, stub_model
+
+STAGES = ['scrape', 'parse', 'tokenize', 'infer', 'load', 'end_to_end']
+
+def _timed(records: int, fn: Callable[[], object], repeats: int) -> dict:
+    """ Runs `fn` `repeats` times and reports the best run. """
+    best = float('inf')
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return {'records': records, 'seconds': best, 'per_second': records / best if best > 0 else 0.0}
+
+def _skipped(reason: str) -> dict:
+    return {'records': 0, 'seconds': 0.0, 'per_second': 0.0, 'skipped': reason}
+
+def _fetch_all(urls: List[str]) -> List[bytes]:
+    import urllib.request
+
+    def fetch(url):
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.read()
+
+    with ThreadPoolExecutor(max_workers=min(16, len(urls))) as executor:
+        return list(executor.map(fetch, urls))
+
+def run_benchmarks(headline_count: int = 2000, feed_count: int = 10, model: str = 'auto',
+                   batch_size: Optional[int] = None, repeats: int = 3, seed: int = 42) -> dict:
+    """
+    Runs every stage benchmark and returns the results as a dictionary.
+
+    Args:
+        headline_count (int): Total synthetic headlines, spread across the feeds.
+        feed_count (int): Number of feeds served by the local server.
+        model (str): 'stub', 'real', or 'auto' (real if cached, else stub).
+        batch_size (int, optional): Headlines per forward pass.
+        repeats (int): Timed repetitions per stage; the best one is reported.
+        seed (int): Corpus seed.
+    """
+    if model == 'auto':
+        model = 'real' if real_model_available() else 'stub'
+    if model == 'real':
+        # Never reach for the network: the model must already be cached.
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+
+    from src.database import db_manager
+    from src.etl import pipeline
+    from src.nlp import near_duplicates, sentiment, sentiment_cache
+    from src.scraper import feed_scraper
+
+    headlines = corpus.generate_headlines(headline_count, seed=seed)
+    per_feed = max(1, headline_count // feed_count)
+    feeds = {
+        f"feed{n:03d}": corpus.generate_rss(headlines[n * per_feed:(n + 1) * per_feed], f"feed{n:03d}")
+        for n in range(feed_count)
+    }
+    results: Dict[str, dict] = {}
+
+    with ExitStack() as stack:
+        tmp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(patch.object(sentiment_cache, 'CACHE_ENABLED', False))
+        # Measured separately by benchmarks/near_duplicates.py; the synthetic
+        # corpus is templated, so most of it would skip the model here.
+        stack.enter_context(patch.object(near_duplicates, 'NEAR_DUPLICATES_ENABLED', False))
+        if model == 'stub':
+            stack.enter_context(stub_model())
+        server = stack.enter_context(LocalFeedServer(feeds))
+        sources = server.sources()
+        total_items = per_feed * feed_count
+
+        # --- scrape ---
+        urls = [s['url'] for s in sources]
+        results['scrape'] = _timed(total_items, lambda: _fetch_all(urls), repeats)
+
+        # --- parse ---
+        bodies = _fetch_all(urls)
+        try:
+            feed_scraper._parse_entries(bodies[0], 'bench')
+            results['parse'] = _timed(
+                total_items, lambda: [feed_scraper._parse_entries(b, 'bench') for b in bodies], repeats
+            )
+        except ImportError as e:
+            results['parse'] = _skipped(f"parser unavailable: {e}")
+
+        # --- tokenize / infer ---
+        if not sentiment.warm_up():
+            results['tokenize'] = _skipped("model failed to load")
+            results['infer'] = _skipped("model failed to load")
+        else:
+            results['tokenize'] = _timed(len(headlines), lambda: sentiment._encode_buckets(headlines, batch_size), repeats)
+            buckets = sentiment._encode_buckets(headlines, batch_size)
+            results['infer'] = _timed(len(headlines), lambda: sentiment._run_buckets(buckets, len(headlines)), repeats)
+
+        # --- load ---
+        def load_once():
+            db_path = os.path.join(tmp_dir, f"load_{time.perf_counter_ns()}.db")
+            with patch.object(db_manager, 'DB_PATH', db_path):
+                db_manager.create_database()
+                db_manager.insert_articles(rows)
+
+        rows = [
+            {'source': 'bench', 'headline': h, 'article_url': f"https://news.example.com/{n}",
+             'finbert_result': {'label': 'Neutral', 'score': 0.5}}
+            for n, h in enumerate(headlines)
+        ]
+        results['load'] = _timed(len(rows), load_once, repeats)
+
+        # --- end to end ---
+        def end_to_end():
+            db_path = os.path.join(tmp_dir, f"e2e_{time.perf_counter_ns()}.db")
+            with patch.object(db_manager, 'DB_PATH', db_path):
+                db_manager.create_database()
+                return pipeline.run_pipeline(batch_size=batch_size, sources=sources)
+
+        if results['parse'].get('skipped'):
+            results['end_to_end'] = _skipped(results['parse']['skipped'])
+        elif end_to_end().get('inserted'):
+            results['end_to_end'] = _timed(total_items, end_to_end, repeats)
+        else:
+            results['end_to_end'] = _skipped("pipeline loaded no articles (see log)")
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model': model,
+            'headlines': headline_count,
+            'feeds': feed_count,
+            'batch_size': batch_size,
+            'repeats': repeats,
+            'seed': seed,
+        },
+        'stages': results,
+    }
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15) -> List[dict]:
+    """
+    Compares stage throughput against a baseline run.
+
+    Stages that were skipped in either run, or measured with a different
+    model, are not compared.
+
+    Returns:
+        List[dict]: One entry per compared stage with 'stage', 'baseline',
+                    'current', 'ratio' and 'regression' (ratio below 1 - tolerance).
+    """
+    if current.get('meta', {}).get('model') != baseline.get('meta', {}).get('model'):
+        return []
+    report = []
+    for stage in STAGES:
+        now = current['stages'].get(stage, {})
+        before = baseline.get('stages', {}).get(stage, {})
+        if not now.get('per_second') or not before.get('per_second') or now.get('skipped') or before.get('skipped'):
+            continue
+        ratio = now['per_second'] / before['per_second']
+        report.append({
+            'stage': stage,
+            'baseline': before['per_second'],
+            'current': now['per_second'],
+            'ratio': ratio,
+            'regression': ratio < 1 - tolerance,
+        })
+    return report
+
+def _print_results(results: dict, comparison: Optional[List[dict]]):
+    meta = results['meta']
+    print(f"Benchmark ({meta['model']} model, {meta['headlines']} headlines, {meta['feeds']} feeds)")
+    for stage in STAGES:
+        r = results['stages'].get(stage, {})
+        if r.get('skipped'):
+            print(f"  {stage:<11} skipped: {r['skipped']}")
+        else:
+            print(f"  {stage:<11} {r['per_second']:>12.1f} headlines/s  ({r['seconds']:.3f}s)")
+    if comparison is not None:
+        if not comparison:
+            print("No comparable stages in the baseline (different model or all skipped).")
+        for c in comparison:
+            flag = "REGRESSION" if c['regression'] else "ok"
+            print(f"  {c['stage']:<11} {c['ratio']:>6.2f}x baseline  {flag}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for every pipeline stage.")
+    parser.add_argument('--headlines', type=int, default=2000)
+    parser.add_argument('--feeds', type=int, default=10)
+    parser.add_argument('--model', choices=['auto', 'stub', 'real'], default='auto')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results to this JSON file.")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed fractional throughput drop before flagging a regression.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.headlines, args.feeds, args.model, args.batch_size, args.repeats, args.seed)
+
+    comparison = None
+    if args.compare:
+        with open(args.compare) as f:
+            comparison = compare(results, json.load(f), args.tolerance)
+        results['comparison'] = comparison
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    _print_results(results, comparison)
+    return 1 if comparison and any(c['regression'] for c in comparison) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
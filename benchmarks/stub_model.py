@@ -0,0 +1,60 @@
+#
+# benchmarks/stub_model.py
+#
+# A pure-Python stand-in for FinBERT, so the pipeline can be benchmarked on
+# machines without torch or a cached model. It keeps the real batching
+# structure (tokenize -> length-sorted buckets -> padded "forward pass") and
+# does work proportional to the padded token count, but the labels are
+# meaningless. Inference numbers measured with it are only comparable with
+# other stub runs.
+#
+
+import importlib.util
+import zlib
+from contextlib import contextmanager
+from typing import List, Optional
+from unittest.mock import patch
+
+from src.nlp import sentiment
+
+STUB_MODEL_VERSION = "stub_v1"
+
+def _stub_encode_buckets(headlines: List[str], batch_size: Optional[int] = None) -> List[tuple]:
+    batch_size = max(1, int(batch_size or sentiment.DEFAULT_BATCH_SIZE))
+    encoded = [[101] + [zlib.crc32(word.encode()) % 30000 for word in h.lower().split()] + [102] for h in headlines]
+    order = sorted(range(len(headlines)), key=lambda i: len(encoded[i]))
+    buckets = []
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        width = max(len(encoded[i]) for i in bucket)
+        buckets.append((bucket, {'input_ids': [encoded[i] + [0] * (width - len(encoded[i])) for i in bucket]}))
+    return buckets
+
+def _stub_run_buckets(buckets: List[tuple], count: int) -> List[dict]:
+    results: List[dict] = [{} for _ in range(count)]
+    for bucket, inputs in buckets:
+        for position, ids in zip(bucket, inputs['input_ids']):
+            # Work proportional to the padded sequence, like a real forward pass.
+            activation = sum((token * 31 + n) % 97 for n, token in enumerate(ids * 8))
+            results[position] = {'label': sentiment.LABELS[activation % 3], 'score': 0.5 + (activation % 50) / 100}
+    return results
+
+@contextmanager
+def stub_model():
+    """ Replaces the model inside `sentiment` with the stub for the duration of the block. """
+    with patch.object(sentiment, '_ensure_model', return_value=True), \
+         patch.object(sentiment, '_encode_buckets', _stub_encode_buckets), \
+         patch.object(sentiment, '_run_buckets', _stub_run_buckets), \
+         patch.object(sentiment, 'MODEL_VERSION', STUB_MODEL_VERSION):
+        yield
+
+def real_model_available() -> bool:
+    """ True if torch/transformers are installed and FinBERT is in the local cache. """
+    if not (importlib.util.find_spec('torch') and importlib.util.find_spec('transformers')):
+        return False
+    try:
+        from transformers import AutoConfig
+        AutoConfig.from_pretrained(sentiment.MODEL_NAME, local_files_only=True)
+        return True
+    except Exception:
+        return False
@@ -4,16 +4,47 @@
 # This is the main entry point for the entire application.
 # Its purpose is to initialize the necessary components and start the ETL pipeline.
 #
+# Usage:
+#   python main.py                 # one-shot run (e.g. from cron); same as `run`
+#   python main.py run             # Extract -> Transform -> Load, once
+#   python main.py serve           # long-running daemon with a warm model
+#   python main.py init-db         # create the database schema
+#   python main.py scrape-only     # fetch feeds and print articles as JSON lines
+#   python main.py score "..."     # score headlines (or stdin, one per line)
+#   python main.py stats           # summarize what is stored
+#   python main.py runs            # recent pipeline runs (durations, counts, duplicate rates)
+#   python main.py series          # hourly/daily sentiment series from the rollup tables
+#   python main.py ticker AAPL     # recent articles mentioning a ticker
+#   python main.py parity          # compare sentiment backends on a fixed corpus
+#   python main.py cascade         # lexicon-first cascade: agreement and speedup per threshold
+#   python main.py rescore         # re-score stored rows with the current model (resumable)
+#   python main.py export out.parquet --incremental nightly   # stream rows to Parquet/Arrow/CSV
+#   python main.py writer          # single-writer group-commit service (see writer.address)
+#   python main.py compact         # archive months beyond partitions.hot_months, apply retention
+#   python main.py partitions      # list the archived months
+#   python main.py worker          # score queued articles (pipeline.mode: "queue")
+#   python main.py queue           # scoring queue depth: pending, leased and dead jobs
+#
+# Only `run`, `serve`, `score`, `parity`, `cascade`, `rescore` and `worker` import torch/transformers; the other
+# commands start in well under a second.
+#
+
+# Standard library imports
+import argparse
+import json
+import sys
 
 # Local application/library specific imports
 from src.database import db_manager
-from src.etl import pipeline
 from src.utils.logger import logger
 
 def main():
     """
     The main function that orchestrates the application startup.
     """
+    from src.database import writer
+    from src.etl import pipeline
+
     logger.info("Application starting...")
     
     # --- 1. Initialize Database ---
@@ -21,6 +52,7 @@ def main():
     # before any data processing begins. This function is idempotent,
     # meaning it's safe to run even if the database already exists.
     db_manager.create_database()
+    writer.use_configured_writer()
     
     # --- 2. Run the ETL Pipeline ---
     # This call kicks off the main logic of the application:
@@ -29,8 +61,243 @@ def main():
     
     logger.info("Application finished its run.")
 
+def serve(args):
+    """
+    Starts the long-running daemon: the model is loaded once and each feed
+    is polled on its own schedule until SIGTERM.
+    """
+    from src.etl import daemon
+    daemon.serve()
+
+def init_db(args):
+    """ Creates the database schema. Safe to run repeatedly. """
+    db_manager.create_database()
+
+def scrape_only(args):
+    """ Fetches every feed (unconditionally) and prints the articles as JSON lines. """
+    from src.scraper import feed_scraper
+
+    articles, _ = feed_scraper.scrape_feeds()
+    for article in articles:
+        print(json.dumps(article))
+
+def score(args):
+    """ Scores headlines given as arguments, or read from stdin one per line. """
+    from src.nlp import sentiment
+
+    headlines = args.headlines or [line.strip() for line in sys.stdin if line.strip()]
+    if args.processes and args.processes > 1:
+        from src.nlp import pool
+        results = pool.score_in_processes(headlines, processes=args.processes, batch_size=args.batch_size)
+    else:
+        results = sentiment.analyze_sentiment_batch(headlines, batch_size=args.batch_size)
+    for headline, result in zip(headlines, results):
+        print(json.dumps({'headline': headline, **result}))
+
+def stats(args):
+    """ Prints a JSON summary of the stored articles. """
+    if args.archives:
+        db_manager.create_database()
+    print(json.dumps(db_manager.get_stats(include_archives=args.archives), indent=2, default=str))
+
+def runs(args):
+    """ Prints the most recent pipeline runs as JSON, newest first. """
+    print(json.dumps(db_manager.get_pipeline_runs(args.limit), indent=2, default=str))
+
+def series(args):
+    """ Prints a sentiment series from the rollup tables as JSON. """
+    from src.database import rollups
+
+    if args.rebuild:
+        rollups.rebuild_rollups()
+    print(json.dumps(rollups.get_sentiment_series(args.source, args.granularity, args.start, args.end), indent=2))
+
+def ticker(args):
+    """ Prints recent articles that mention a ticker symbol as JSON. """
+    if args.archives:
+        db_manager.create_database()
+    articles = db_manager.get_articles_for_symbol(args.symbol, limit=args.limit, include_archives=args.archives)
+    print(json.dumps(articles, indent=2, default=str))
+
+def parity(args):
+    """ Compares sentiment backends on a fixed corpus and prints a JSON report. """
+    from src.nlp import parity as parity_check
+
+    reports = parity_check.run_parity_check(args.backends, num_threads=args.threads, batch_size=args.batch_size)
+    print(json.dumps(reports, indent=2))
+
+def cascade(args):
+    """ Reports cascade agreement with FinBERT-only labels and speedup per threshold as JSON. """
+    from src.nlp import parity as parity_check
+
+    corpus = parity_check.PARITY_CORPUS
+    if args.from_db:
+        db_manager.create_database()
+        corpus = db_manager.get_recent_headlines(args.from_db)
+        if not corpus:
+            logger.error("No stored headlines to build the corpus from.")
+            sys.exit(2)
+    reports = parity_check.run_cascade_check(args.thresholds, corpus, batch_size=args.batch_size)
+    print(json.dumps(reports, indent=2))
+
+def rescore(args):
+    """ Re-scores stored articles with the current (or given) backend, resuming if interrupted. """
+    from src.etl import rescore as rescore_job
+    from src.nlp import sentiment
+
+    if args.backend:
+        sentiment.set_backend(args.backend, num_threads=args.threads)
+    db_manager.create_database()
+    summary = rescore_job.rescore(chunk_size=args.chunk_size, batch_size=args.batch_size,
+                                  processes=args.processes, restart=args.restart)
+    print(json.dumps(summary, indent=2))
+
+def export(args):
+    """ Streams stored articles to a Parquet, Arrow IPC or gzipped CSV file and prints a JSON summary. """
+    from datetime import datetime
+    from src.etl import export as exporter
+
+    db_manager.create_database()
+    try:
+        summary = exporter.export_articles(
+            args.output, export_format=args.format,
+            start=datetime.fromisoformat(args.start) if args.start else None,
+            end=datetime.fromisoformat(args.end) if args.end else None,
+            after_id=args.after_id, incremental=args.incremental, chunk_size=args.chunk_size,
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(2)
+    print(json.dumps(summary, indent=2))
+    if not summary['ok']:
+        sys.exit(1)
+
+def run_writer(args):
+    """ Runs the single-writer service that other processes send their inserts to. """
+    from src.database import writer
+    writer.serve()
+
+def compact(args):
+    """ Archives every month beyond partitions.hot_months (one at a time) and applies retention. """
+    from src.database import partitions
+
+    db_manager.create_database()
+    print(json.dumps(partitions.compact(), indent=2))
+
+def list_partitions(args):
+    """ Prints the catalog of archived months as JSON. """
+    from src.database import partitions
+
+    db_manager.create_database()
+    print(json.dumps(partitions.list_partitions(), indent=2, default=str))
+
+def worker(args):
+    """ Runs a scoring worker on the queue until SIGTERM (or until it is empty, with --drain). """
+    from src.etl import work_queue
+
+    totals = work_queue.serve(claim_size=args.claim_size, batch_size=args.batch_size, drain=args.drain)
+    print(json.dumps(totals, indent=2))
+
+def queue_stats(args):
+    """ Prints the scoring queue's job counts as JSON. """
+    from src.etl import work_queue
+
+    db_manager.create_database()
+    print(json.dumps(work_queue.queue_stats(), indent=2))
+
+def build_parser() -> argparse.ArgumentParser:
+    """ Builds the command-line interface. """
+    parser = argparse.ArgumentParser(description="Financial news sentiment ETL pipeline.")
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('run', help="Run the ETL pipeline once (default).")
+    subparsers.add_parser('serve', help="Run as a daemon with a warm model.").set_defaults(func=serve)
+    subparsers.add_parser('init-db', help="Create the database schema.").set_defaults(func=init_db)
+    subparsers.add_parser('scrape-only', help="Fetch feeds and print articles as JSON lines.").set_defaults(func=scrape_only)
+
+    score_parser = subparsers.add_parser('score', help="Score headlines and print JSON lines.")
+    score_parser.add_argument('headlines', nargs='*', help="Headlines to score; reads stdin if omitted.")
+    score_parser.add_argument('--batch-size', type=int, default=None)
+    score_parser.add_argument('--processes', type=int, default=None,
+                              help="Score on a forked process pool (for large inputs).")
+    score_parser.set_defaults(func=score)
+
+    stats_parser = subparsers.add_parser('stats', help="Summarize the stored articles.")
+    stats_parser.add_argument('--archives', action='store_true', help="Include archived months.")
+    stats_parser.set_defaults(func=stats)
+
+    runs_parser = subparsers.add_parser('runs', help="Show recent pipeline runs.")
+    runs_parser.add_argument('--limit', type=int, default=20)
+    runs_parser.set_defaults(func=runs)
+
+    series_parser = subparsers.add_parser('series', help="Show sentiment per hour or day from the rollups.")
+    series_parser.add_argument('--source', default=None, help="One source; all sources if omitted.")
+    series_parser.add_argument('--granularity', choices=['hour', 'day'], default='day')
+    series_parser.add_argument('--start', default=None, help="ISO date/time of the first bucket.")
+    series_parser.add_argument('--end', default=None, help="ISO date/time; buckets from here on are excluded.")
+    series_parser.add_argument('--rebuild', action='store_true',
+                               help="Recompute the rollups from news_sentiment first.")
+    series_parser.set_defaults(func=series)
+
+    ticker_parser = subparsers.add_parser('ticker', help="Show recent articles mentioning a ticker.")
+    ticker_parser.add_argument('symbol')
+    ticker_parser.add_argument('--limit', type=int, default=20)
+    ticker_parser.add_argument('--archives', action='store_true', help="Include archived months.")
+    ticker_parser.set_defaults(func=ticker)
+
+    parity_parser = subparsers.add_parser('parity', help="Compare backends' labels and throughput.")
+    parity_parser.add_argument('--backends', nargs='+', default=['fp32', 'int8'],
+                               help="Backends to compare; the first is the reference.")
+    parity_parser.add_argument('--threads', type=int, default=None, help="Intra-op threads per backend.")
+    parity_parser.add_argument('--batch-size', type=int, default=None)
+    parity_parser.set_defaults(func=parity)
+
+    cascade_parser = subparsers.add_parser('cascade', help="Lexicon-first cascade vs FinBERT alone, per threshold.")
+    cascade_parser.add_argument('--thresholds', nargs='+', type=float, default=[0.5, 0.6, 0.7, 0.75, 0.8, 0.9])
+    cascade_parser.add_argument('--from-db', type=int, default=0, metavar='N',
+                                help="Use the N newest stored headlines instead of the fixed corpus.")
+    cascade_parser.add_argument('--batch-size', type=int, default=None)
+    cascade_parser.set_defaults(func=cascade)
+
+    rescore_parser = subparsers.add_parser('rescore', help="Re-score stored rows with the current model.")
+    rescore_parser.add_argument('--backend', default=None, help="Backend to score with (default: configured).")
+    rescore_parser.add_argument('--threads', type=int, default=None, help="Intra-op threads for --backend.")
+    rescore_parser.add_argument('--chunk-size', type=int, default=None, help="Rows per transaction/checkpoint.")
+    rescore_parser.add_argument('--batch-size', type=int, default=None)
+    rescore_parser.add_argument('--processes', type=int, default=None, help="Score chunks on a process pool.")
+    rescore_parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start over.")
+    rescore_parser.set_defaults(func=rescore)
+
+    export_parser = subparsers.add_parser('export', help="Stream stored articles to a columnar or CSV file.")
+    export_parser.add_argument('output', help="File to write, e.g. exports/news.parquet.")
+    export_parser.add_argument('--format', choices=['auto', 'parquet', 'arrow', 'csv'], default=None,
+                               help="Default: export.format ('auto' = parquet if pyarrow is installed, else csv).")
+    export_parser.add_argument('--start', default=None, help="ISO date/time; earliest scraped_timestamp.")
+    export_parser.add_argument('--end', default=None, help="ISO date/time; rows from here on are excluded.")
+    export_parser.add_argument('--after-id', type=int, default=None, help="Only rows with a larger id.")
+    export_parser.add_argument('--incremental', metavar='NAME', default=None,
+                               help="Continue from (and advance) the watermark stored under NAME.")
+    export_parser.add_argument('--chunk-size', type=int, default=None, help="Rows per read and write.")
+    export_parser.set_defaults(func=export)
+
+    subparsers.add_parser('writer', help="Serve group-committed inserts to other processes.").set_defaults(func=run_writer)
+    subparsers.add_parser('compact', help="Archive old months and apply retention.").set_defaults(func=compact)
+    subparsers.add_parser('partitions', help="List the archived months.").set_defaults(func=list_partitions)
+
+    worker_parser = subparsers.add_parser('worker', help="Claim, score and load queued articles.")
+    worker_parser.add_argument('--claim-size', type=int, default=None, help="Jobs per lease (default: queue.claim_size).")
+    worker_parser.add_argument('--batch-size', type=int, default=None)
+    worker_parser.add_argument('--drain', action='store_true', help="Exit once the queue is empty.")
+    worker_parser.set_defaults(func=worker)
+    subparsers.add_parser('queue', help="Show the scoring queue's depth.").set_defaults(func=queue_stats)
+    return parser
+
 # The __name__ == "__main__" block is a standard Python construct.
 # It ensures that the code inside this block only runs when the script
 # is executed directly (e.g., `python main.py`).
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = build_parser().parse_args()
+    if getattr(args, 'func', None):
+        args.func(args)
+    else:
+        main()
@@ -4,16 +4,25 @@
 #
 
 import sqlite3
+import threading
+import time
 import hashlib
 from datetime import datetime
 import json
+from typing import Dict, Iterable, List, Optional, Set
 
-from src.utils.config_loader import load_config
+from src.utils import metrics
+from src.utils.config_loader import get_settings
 from src.utils.logger import logger
 
-config = load_config()
-DB_PATH = config.get('database', {}).get('path', 'data/news_sentiment.db')
-SCHEMA_PATH = config.get('database', {}).get('schema', 'src/database/schema.sql')
+settings = get_settings()
+DB_PATH = settings.get('database.path', 'data/news_sentiment.db')
+SCHEMA_PATH = settings.get('database.schema', 'src/database/schema.sql')
+
+DB_SECONDS = metrics.histogram('etl_db_operation_seconds', "Time spent in database operations.", ['operation'])
+ARTICLES_WRITTEN = metrics.counter(
+    'etl_db_articles_total', "Articles offered to the database by result (inserted, duplicate).", ['result']
+)
 
 # --- UPDATED HASH FUNCTION ---
 def _generate_hash(headline: str, url: str, scraped_date: str) -> str:
@@ -32,6 +41,32 @@ def _generate_hash(headline: str, url: str, scraped_date: str) -> str:
     hash_input = f"{headline}-{url}-{scraped_date}"
     return hashlib.md5(hash_input.encode()).hexdigest()
 
+def compute_article_hash(headline: str, url: str, scraped_timestamp: datetime) -> str:
+    """
+    Computes the article fingerprint exactly as it will be stored, using the
+    date part of `scraped_timestamp`. Lets callers probe for existing rows
+    before doing any expensive work on an article.
+    """
+    return _generate_hash(headline, url, scraped_timestamp.strftime('%Y-%m-%d'))
+
+# Columns added to existing tables since they were first created. CREATE
+# TABLE IF NOT EXISTS leaves an older database's tables alone, so
+# `create_database` adds these where they are missing.
+ADDED_COLUMNS = {
+    'feed_state': [
+        ('high_water_published', 'DATETIME NULL'),
+        ('high_water_guid', 'TEXT NULL'),
+    ],
+}
+
+def _add_missing_columns(conn: sqlite3.Connection):
+    """ Brings tables created by an older schema.sql up to date. """
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table});")}
+        for name, definition in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition};")
+
 def create_database():
     """ Creates the database and table(s) based on the schema.sql file. """
     try:
@@ -40,8 +75,12 @@ def create_database():
             schema_sql = f.read()
         
         conn = sqlite3.connect(DB_PATH)
+        # Only takes effect on a new database: lets partition archiving give
+        # freed pages back without a whole-database VACUUM.
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
         cursor = conn.cursor()
         cursor.executescript(schema_sql)
+        _add_missing_columns(conn)
         conn.commit()
         conn.close()
         logger.info(f"Database setup complete. Ready at {DB_PATH}")
@@ -50,19 +89,83 @@ def create_database():
     except sqlite3.Error as e:
         logger.error(f"An error occurred during database creation: {e}")
 
-# --- UPDATED INSERT FUNCTION ---
-def insert_article(source: str, headline: str, article_url: str, finbert_result: dict):
+# --- Connection Reuse ---
+# One-shot runs open and close a connection per call. A long-running process
+# (the daemon) calls `enable_connection_reuse()` so each thread keeps one open
+# connection across cycles; `close_connections()` releases them at shutdown.
+# Threads that come and go (e.g. a streaming run's stage workers) have their
+# connection closed once they have exited, the next time one is opened.
+_reuse_connections = False
+_thread_connections = threading.local()
+_open_connections: Dict[threading.Thread, sqlite3.Connection] = {}
+_open_connections_lock = threading.Lock()
+
+# Set by `use_writer`: inserts go through a GroupCommitWriter or WriterClient
+# (see src/database/writer.py) instead of a connection of our own.
+_writer = None
+
+def use_writer(writer):
     """
-    Inserts a single news article and its sentiment analysis into the database.
-    Prevents duplicates based on headline, URL, and scraped date hash.
+    Routes `insert_articles` (and `insert_article`) through `writer`, anything
+    with a blocking `write(rows) -> {'inserted', 'duplicates'}`. None goes back
+    to writing directly.
     """
-    scraped_timestamp = datetime.now()
-    scraped_date_str = scraped_timestamp.strftime('%Y-%m-%d')
-    
-    # Generate the unique fingerprint using headline, URL, and date
-    article_hash = _generate_hash(headline, article_url, scraped_date_str)
-    
-    sql = """
+    global _writer
+    _writer = writer
+
+def enable_connection_reuse():
+    """ Keeps one connection per thread open across calls until `close_connections()`. """
+    global _reuse_connections
+    _reuse_connections = True
+
+def close_connections():
+    """ Closes every reused connection and goes back to a connection per call. """
+    global _reuse_connections
+    _reuse_connections = False
+    with _open_connections_lock:
+        for conn in _open_connections.values():
+            _close_quietly(conn)
+        _open_connections.clear()
+    _thread_connections.__dict__.clear()
+
+def _close_quietly(conn: sqlite3.Connection):
+    try:
+        conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Error closing database connection: {e}")
+
+def _open_connection() -> sqlite3.Connection:
+    """
+    Opens a connection to the database tuned for bulk writes.
+
+    WAL lets readers keep working while we write, and synchronous=NORMAL
+    only fsyncs at checkpoints instead of on every commit.
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=not _reuse_connections)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    return conn
+
+def _connect() -> sqlite3.Connection:
+    """ Returns this thread's reused connection, or a new one. Pair with `_release`. """
+    if not _reuse_connections:
+        return _open_connection()
+    conn = getattr(_thread_connections, 'conn', None)
+    if conn is None:
+        conn = _open_connection()
+        _thread_connections.conn = conn
+        with _open_connections_lock:
+            for thread in [t for t in _open_connections if not t.is_alive()]:
+                _close_quietly(_open_connections.pop(thread))
+            _open_connections[threading.current_thread()] = conn
+    return conn
+
+def _release(conn: Optional[sqlite3.Connection]):
+    """ Closes a connection from `_connect`, unless it is being reused. """
+    if conn is not None and not _reuse_connections:
+        conn.close()
+
+INSERT_SQL = """
     INSERT OR IGNORE INTO news_sentiment (
         scraped_timestamp, 
         published_timestamp,
@@ -76,34 +179,758 @@ def insert_article(source: str, headline: str, article_url: str, finbert_result:
         sentiment_model_version
     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
     """
-    
-    model_version = "finbert_v1_base"
-    params = (
+
+# Used when a result doesn't say which model produced it.
+MODEL_VERSION = "finbert_v1_base"
+
+def _aspects_json(entities: Optional[List[dict]], finbert_result: dict) -> Optional[str]:
+    """ Serializes tagged entities for aspects_json, each carrying the headline's sentiment. """
+    if entities is None:
+        return None
+    return json.dumps([
+        {'entity': e['name'], 'symbol': e['symbol'], 'matched': e['matched'], 'sentiment': finbert_result.get('label')}
+        for e in entities
+    ])
+
+def _build_params(source: str, headline: str, article_url: str, finbert_result: dict,
+                  scraped_timestamp: datetime, entities: Optional[List[dict]] = None,
+                  published_timestamp: Optional[datetime] = None) -> tuple:
+    """ Builds the INSERT parameters for one article, including its fingerprint. """
+    # Generate the unique fingerprint using headline, URL, and date
+    article_hash = compute_article_hash(headline, article_url, scraped_timestamp)
+
+    return (
         scraped_timestamp,
-        None, # published_timestamp
+        published_timestamp,
         article_hash,
         source,
         article_url,
         headline,
         finbert_result.get('label'),
         finbert_result.get('score'),
-        None, # aspects_json
-        model_version
+        _aspects_json(entities, finbert_result),
+        finbert_result.get('model_version') or MODEL_VERSION
     )
-    
+
+# --- UPDATED INSERT FUNCTION ---
+def insert_article(source: str, headline: str, article_url: str, finbert_result: dict):
+    """
+    Inserts a single news article and its sentiment analysis into the database.
+    Prevents duplicates based on headline, URL, and scraped date hash.
+    """
+    if _writer is not None:
+        insert_articles([{'source': source, 'headline': headline, 'article_url': article_url,
+                          'finbert_result': finbert_result}])
+        return
+
+    params = _build_params(source, headline, article_url, finbert_result, datetime.now())
+
+    conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
-        cursor.execute(sql, params)
+        cursor.execute(INSERT_SQL, params)
         conn.commit()
         
         if cursor.rowcount > 0:
-            logger.info(f"Inserted [{source}]: '{headline[:50]}...'")
+            logger.debug("Inserted [%s]: '%.50s...'", source, headline)
         else:
-            logger.debug(f"Duplicate ignored [{source}]: '{headline[:50]}...'")
+            logger.debug("Duplicate ignored [%s]: '%.50s...'", source, headline)
             
     except sqlite3.Error as e:
         logger.error(f"Database error inserting article: {e}", exc_info=True)
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+def _rows_to_params(rows: List[dict]) -> List[tuple]:
+    """ Builds the INSERT parameters for `insert_articles`-style row dicts. """
+    scraped_timestamp = datetime.now()
+    return [
+        _build_params(row['source'], row['headline'], row['article_url'], row['finbert_result'],
+                      row.get('scraped_timestamp') or scraped_timestamp, row.get('entities'),
+                      row.get('published_timestamp'))
+        for row in rows
+    ]
+
+def _execute_inserts(conn: sqlite3.Connection, param_lists: List[List[tuple]]) -> List[int]:
+    """
+    Inserts several lists of parameters in one transaction on `conn`.
+
+    Returns:
+        List[int]: Rows inserted per list (the rest were duplicates).
+
+    Raises:
+        sqlite3.Error: The transaction was rolled back.
+    """
+    started = time.perf_counter()
+    # `with conn` wraps the inserts in one transaction: commit on success,
+    # rollback on error.
+    with conn:
+        # rowcount counts only rows this statement inserted; unlike
+        # total_changes it excludes rows written by triggers (the rollups).
+        inserted = [conn.executemany(INSERT_SQL, params).rowcount for params in param_lists]
+    DB_SECONDS.observe(time.perf_counter() - started, operation='insert')
+    total, offered = sum(inserted), sum(len(params) for params in param_lists)
+    ARTICLES_WRITTEN.inc(total, result='inserted')
+    ARTICLES_WRITTEN.inc(offered - total, result='duplicate')
+    return inserted
+
+def insert_articles(rows: List[dict]) -> dict:
+    """
+    Inserts many articles in a single transaction over one connection.
+
+    Each row is a dictionary with the same fields as `insert_article`'s
+    arguments: 'source', 'headline', 'article_url' and 'finbert_result'.
+    An optional 'scraped_timestamp' pins the timestamp (and so the hash)
+    that was used to probe for the row with `get_existing_hashes`, and an
+    optional 'entities' list (from `entities.tag_headlines`) is stored in
+    aspects_json and, through a trigger, in article_entities. An optional
+    'published_timestamp' (naive UTC, from the feed) is stored as is.
+    Duplicates are ignored based on the article hash, exactly as in
+    `insert_article`, but nothing is logged per row. After `use_writer`, the
+    rows are handed to that writer and this returns once they are committed.
+
+    Args:
+        rows (List[dict]): The articles to insert.
+
+    Returns:
+        dict: {'inserted': int, 'duplicates': int}. If the transaction
+              fails, it is rolled back and both counts are 0.
+    """
+    stats = {'inserted': 0, 'duplicates': 0}
+    if not rows:
+        return stats
+
+    if _writer is not None:
+        try:
+            return _writer.write(rows)
+        except (sqlite3.Error, RuntimeError, OSError) as e:
+            logger.error(f"Writer failed to store {len(rows)} articles: {e}")
+            return stats
+
+    params = _rows_to_params(rows)
+    conn = None
+    try:
+        conn = _connect()
+        inserted = _execute_inserts(conn, [params])[0]
+        stats['inserted'] = inserted
+        stats['duplicates'] = len(params) - inserted
+        logger.info(
+            f"Bulk insert complete: {stats['inserted']} inserted, "
+            f"{stats['duplicates']} duplicates ignored."
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Database error during bulk insert of {len(params)} articles: {e}", exc_info=True)
+    finally:
+        _release(conn)
+
+    return stats
+
+
+# SQLite caps the number of '?' placeholders per statement (999 on older builds),
+# so large probes are split into chunks of this size.
+HASH_PROBE_CHUNK_SIZE = 500
+
+def get_existing_hashes(hashes: Iterable[str]) -> Set[str]:
+    """
+    Returns the subset of `hashes` that is already stored in news_sentiment,
+    live or archived (see archived_hashes in schema.sql).
+
+    The lookup is set-based: each chunk of hashes is resolved with one
+    `IN (...)` query against the UNIQUE index on article_hash and one
+    against archived_hashes, rather than one query per article.
+
+    Args:
+        hashes (Iterable[str]): Article fingerprints from `compute_article_hash`.
+
+    Returns:
+        Set[str]: The fingerprints that already exist. Empty if the probe fails,
+                  in which case every article is treated as new and
+                  `INSERT OR IGNORE` still prevents duplicates.
+    """
+    unique_hashes = list(set(hashes))
+    existing: Set[str] = set()
+    if not unique_hashes:
+        return existing
+
+    conn = None
+    try:
+        conn = _connect()
+        with DB_SECONDS.time(operation='probe'):
+            for start in range(0, len(unique_hashes), HASH_PROBE_CHUNK_SIZE):
+                chunk = unique_hashes[start:start + HASH_PROBE_CHUNK_SIZE]
+                placeholders = ", ".join("?" for _ in chunk)
+                for table in ('news_sentiment', 'archived_hashes'):
+                    cursor = conn.execute(
+                        f"SELECT article_hash FROM {table} WHERE article_hash IN ({placeholders});",
+                        chunk
+                    )
+                    existing.update(row[0] for row in cursor)
+    except sqlite3.Error as e:
+        logger.error(f"Database error probing for existing articles: {e}", exc_info=True)
+        existing = set()
+    finally:
+        _release(conn)
+
+    return existing
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """ Reads back a DATETIME column stored through sqlite3's default adapter. """
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+def get_feed_states() -> Dict[str, dict]:
+    """
+    Loads the stored HTTP validators and high-water mark for every feed.
+
+    Returns:
+        Dict[str, dict]: {feed_name: {'url', 'etag', 'last_modified', 'status',
+                         'high_water_published', 'high_water_guid'}}.
+                         Empty if nothing is stored or the read fails.
+    """
+    states: Dict[str, dict] = {}
+    conn = None
+    try:
+        conn = _connect()
+        cursor = conn.execute(
+            "SELECT feed_name, url, etag, last_modified, last_status, high_water_published, high_water_guid "
+            "FROM feed_state;"
+        )
+        for feed_name, url, etag, last_modified, last_status, high_water_published, high_water_guid in cursor:
+            states[feed_name] = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'status': last_status,
+                'high_water_published': _parse_timestamp(high_water_published),
+                'high_water_guid': high_water_guid,
+            }
+    except sqlite3.Error as e:
+        logger.error(f"Database error loading feed state: {e}", exc_info=True)
+    finally:
+        _release(conn)
+    return states
+
+def save_feed_states(states: Dict[str, dict]):
+    """ Upserts the HTTP validators and high-water mark for each feed in a single transaction. """
+    if not states:
+        return
+
+    checked_at = datetime.now()
+    params = [
+        (name, state['url'], state.get('etag'), state.get('last_modified'), state.get('status'), checked_at,
+         state.get('high_water_published'), state.get('high_water_guid'))
+        for name, state in states.items()
+    ]
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO feed_state (feed_name, url, etag, last_modified, last_status, last_checked_at,
+                                        high_water_published, high_water_guid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(feed_name) DO UPDATE SET
+                    url = excluded.url,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    last_status = excluded.last_status,
+                    last_checked_at = excluded.last_checked_at,
+                    high_water_published = excluded.high_water_published,
+                    high_water_guid = excluded.high_water_guid;
+                """,
+                params
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Database error saving feed state: {e}", exc_info=True)
+    finally:
+        _release(conn)
+
+def get_stats(include_archives: bool = False) -> dict:
+    """
+    Summarizes what is stored in news_sentiment.
+
+    Args:
+        include_archives (bool): Also count the months archived by
+                                 src/database/partitions.py.
+
+    Returns:
+        dict: {'total', 'by_source', 'by_label', 'by_model_version',
+               'first_scraped', 'last_scraped'}. Empty if the read fails.
+    """
+    table = 'news_sentiment_all' if include_archives else 'news_sentiment'
+    conn = None
+    try:
+        if include_archives:
+            from src.database import partitions
+            conn = partitions.open_history()
+        else:
+            conn = _connect()
+        total, first_scraped, last_scraped = conn.execute(
+            f"SELECT COUNT(*), MIN(scraped_timestamp), MAX(scraped_timestamp) FROM {table};"
+        ).fetchone()
+
+        def _counts(column):
+            cursor = conn.execute(
+                f"SELECT {column}, COUNT(*) FROM {table} GROUP BY {column} ORDER BY COUNT(*) DESC;"
+            )
+            return {value: count for value, count in cursor}
+
+        return {
+            'total': total,
+            'by_source': _counts('source'),
+            'by_label': _counts('sentiment_label'),
+            'by_model_version': _counts('sentiment_model_version'),
+            'first_scraped': first_scraped,
+            'last_scraped': last_scraped,
+        }
+    except (sqlite3.Error, ValueError, OSError) as e:
+        logger.error(f"Database error reading stats: {e}", exc_info=True)
+        return {}
+    finally:
+        if include_archives:
+            if conn is not None:
+                conn.close()
+        else:
+            _release(conn)
+
+# Columns of pipeline_runs that `record_pipeline_run` accepts, in insert order.
+PIPELINE_RUN_COLUMNS = (
+    'started_at', 'finished_at', 'mode', 'status', 'model_version',
+    'duration_seconds', 'extract_seconds', 'transform_seconds', 'load_seconds',
+    'feeds_polled', 'feeds_not_modified', 'feeds_failed',
+    'articles_scraped', 'articles_skipped', 'articles_inserted', 'articles_duplicate', 'articles_failed',
+    'duplicate_rate', 'throughput',
+)
+
+def record_pipeline_run(run: dict) -> Optional[int]:
+    """
+    Stores one row in pipeline_runs.
+
+    Args:
+        run (dict): Values keyed by the names in PIPELINE_RUN_COLUMNS. Missing
+                    counts default to 0 and missing timings to NULL.
+
+    Returns:
+        int: The new row's id, or None if the write fails.
+    """
+    defaults = {'status': 'ok', 'feeds_polled': 0, 'feeds_not_modified': 0, 'feeds_failed': 0,
+                'articles_scraped': 0, 'articles_skipped': 0, 'articles_inserted': 0,
+                'articles_duplicate': 0, 'articles_failed': 0}
+    params = [run.get(column, defaults.get(column)) for column in PIPELINE_RUN_COLUMNS]
+    placeholders = ", ".join("?" for _ in PIPELINE_RUN_COLUMNS)
+
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO pipeline_runs ({', '.join(PIPELINE_RUN_COLUMNS)}) VALUES ({placeholders});",
+                params
+            )
+        return cursor.lastrowid
+    except sqlite3.Error as e:
+        logger.error(f"Database error recording pipeline run: {e}", exc_info=True)
+        return None
+    finally:
+        _release(conn)
+
+def get_pipeline_runs(limit: int = 20) -> List[dict]:
+    """
+    Returns the most recent pipeline runs, newest first.
+
+    Returns:
+        List[dict]: One dict per run with 'id' and every column in
+                    PIPELINE_RUN_COLUMNS. Empty if the read fails.
+    """
+    columns = ('id',) + PIPELINE_RUN_COLUMNS
+    conn = None
+    try:
+        conn = _connect()
+        cursor = conn.execute(
+            f"SELECT {', '.join(columns)} FROM pipeline_runs ORDER BY id DESC LIMIT ?;", (limit,)
+        )
+        return [dict(zip(columns, row)) for row in cursor]
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading pipeline runs: {e}", exc_info=True)
+        return []
+    finally:
+        _release(conn)
+
+def get_rescore_checkpoint(job_name: str) -> Optional[dict]:
+    """
+    Loads a re-scoring job's checkpoint.
+
+    Returns:
+        dict: {'job_name', 'model_version', 'last_id', 'rows_updated', 'rows_failed',
+               'started_at', 'updated_at', 'finished_at'}, or None if the job
+               has never run (or the read fails).
+    """
+    columns = ('job_name', 'model_version', 'last_id', 'rows_updated', 'rows_failed',
+               'started_at', 'updated_at', 'finished_at')
+    conn = None
+    try:
+        conn = _connect()
+        row = conn.execute(
+            f"SELECT {', '.join(columns)} FROM rescore_checkpoints WHERE job_name = ?;", (job_name,)
+        ).fetchone()
+        return dict(zip(columns, row)) if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Database error loading rescore checkpoint '{job_name}': {e}", exc_info=True)
+        return None
+    finally:
+        _release(conn)
+
+def reset_rescore_checkpoint(job_name: str, model_version: str):
+    """ Starts (or restarts) a re-scoring job from the first row. """
+    now = datetime.now()
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO rescore_checkpoints (job_name, model_version, last_id, rows_updated, rows_failed,
+                                                 started_at, updated_at, finished_at)
+                VALUES (?, ?, 0, 0, 0, ?, ?, NULL)
+                ON CONFLICT(job_name) DO UPDATE SET
+                    model_version = excluded.model_version,
+                    last_id = 0, rows_updated = 0, rows_failed = 0,
+                    started_at = excluded.started_at,
+                    updated_at = excluded.updated_at,
+                    finished_at = NULL;
+                """,
+                (job_name, model_version, now, now)
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Database error resetting rescore checkpoint '{job_name}': {e}", exc_info=True)
+    finally:
+        _release(conn)
+
+def fetch_rows_after(last_id: int, limit: int, exclude_model_version: Optional[str] = None) -> List[tuple]:
+    """
+    Returns the next page of (id, headline) rows after `last_id`, in id order.
+    Only the live table is read; archived months are read-only and are not re-scored.
+
+    Keyset pagination: each page is a range scan on the primary key that
+    starts where the previous one ended, so the cost per page stays flat no
+    matter how deep into the table the job is (unlike OFFSET).
+
+    Args:
+        last_id (int): Only rows with a larger id are returned.
+        limit (int): Page size.
+        exclude_model_version (str, optional): Skip rows already scored by this version.
+
+    Returns:
+        List[tuple]: (id, headline) pairs. Empty at the end of the table or on error.
+    """
+    sql = "SELECT id, headline FROM news_sentiment WHERE id > ?"
+    params: list = [last_id]
+    if exclude_model_version:
+        sql += " AND sentiment_model_version != ?"
+        params.append(exclude_model_version)
+    sql += " ORDER BY id LIMIT ?;"
+    params.append(limit)
+
+    conn = None
+    try:
+        conn = _connect()
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading rows after id {last_id}: {e}", exc_info=True)
+        return []
+    finally:
+        _release(conn)
+
+def apply_rescore_chunk(job_name: str, updates: List[tuple], last_id: int, failed: int = 0) -> bool:
+    """
+    Writes one chunk of new scores and advances the job's checkpoint in the
+    same short transaction, so a chunk is either fully applied and
+    checkpointed or not at all. Readers keep working throughout (WAL).
+
+    Args:
+        job_name (str): The job whose checkpoint to advance.
+        updates (List[tuple]): (label, score, model_version, id) per row.
+        last_id (int): The largest id in the chunk, including rows that failed.
+        failed (int): Rows in the chunk that could not be scored.
+
+    Returns:
+        bool: True if the chunk was committed.
+    """
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.executemany(
+                """
+                UPDATE news_sentiment
+                SET sentiment_label = ?, sentiment_score = ?, sentiment_model_version = ?
+                WHERE id = ?;
+                """,
+                updates
+            )
+            conn.execute(
+                """
+                UPDATE rescore_checkpoints
+                SET last_id = ?, rows_updated = rows_updated + ?, rows_failed = rows_failed + ?, updated_at = ?
+                WHERE job_name = ?;
+                """,
+                (last_id, len(updates), failed, datetime.now(), job_name)
+            )
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Database error applying rescore chunk ending at id {last_id}: {e}", exc_info=True)
+        return False
+    finally:
+        _release(conn)
+
+def finish_rescore_checkpoint(job_name: str):
+    """ Marks a re-scoring job as finished. """
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute(
+                "UPDATE rescore_checkpoints SET finished_at = ?, updated_at = ? WHERE job_name = ?;",
+                (datetime.now(), datetime.now(), job_name)
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Database error finishing rescore checkpoint '{job_name}': {e}", exc_info=True)
+    finally:
+        _release(conn)
+
+EXPORT_COLUMNS = (
+    'id', 'scraped_timestamp', 'published_timestamp', 'article_hash', 'source', 'article_url',
+    'headline', 'sentiment_label', 'sentiment_score', 'aspects_json', 'sentiment_model_version',
+)
+
+def get_max_article_id() -> int:
+    """ Returns the largest news_sentiment id, or 0 if the table is empty (or the read fails). """
+    conn = None
+    try:
+        conn = _connect()
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM news_sentiment;").fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading the last article id: {e}", exc_info=True)
+        return 0
+    finally:
+        _release(conn)
+
+def fetch_export_page(after_id: int, up_to_id: int, limit: int, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Optional[List[tuple]]:
+    """
+    Returns the next page of full rows (EXPORT_COLUMNS) with
+    after_id < id <= up_to_id, in id order. Keyset pagination, as in
+    `fetch_rows_after`: each page is one short read on the primary key.
+    Only the live table is read, not the months archived by partitions.py.
+
+    Args:
+        start (datetime, optional): Earliest scraped_timestamp (inclusive).
+        end (datetime, optional): Latest scraped_timestamp (exclusive).
+
+    Returns:
+        List[tuple]: Rows; empty at the end of the range. None if the read fails.
+    """
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM news_sentiment WHERE id > ? AND id <= ?"
+    params: list = [after_id, up_to_id]
+    if start is not None:
+        sql += " AND scraped_timestamp >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND scraped_timestamp < ?"
+        params.append(end)
+    sql += " ORDER BY id LIMIT ?;"
+    params.append(limit)
+
+    conn = None
+    try:
+        conn = _connect()
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading export rows after id {after_id}: {e}", exc_info=True)
+        return None
+    finally:
+        _release(conn)
+
+def get_export_watermark(export_name: str) -> int:
+    """ Returns the last id written by a named incremental export, or 0 if it never ran. """
+    conn = None
+    try:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT last_id FROM export_watermarks WHERE export_name = ?;", (export_name,)
+        ).fetchone()
+        return row[0] if row else 0
+    except sqlite3.Error as e:
+        logger.error(f"Database error loading export watermark '{export_name}': {e}", exc_info=True)
+        return 0
+    finally:
+        _release(conn)
+
+def save_export_watermark(export_name: str, last_id: int, rows_exported: int, output_path: Optional[str]):
+    """ Advances a named incremental export's watermark once its file is complete. """
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO export_watermarks (export_name, last_id, rows_exported, output_path, exported_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(export_name) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    rows_exported = excluded.rows_exported,
+                    output_path = excluded.output_path,
+                    exported_at = excluded.exported_at;
+                """,
+                (export_name, last_id, rows_exported, output_path, datetime.now())
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Database error saving export watermark '{export_name}': {e}", exc_info=True)
+    finally:
+        _release(conn)
+
+def get_recent_headlines(limit: int = 1000) -> List[str]:
+    """ Returns the newest `limit` distinct stored headlines, newest first. Empty if the read fails. """
+    conn = None
+    try:
+        conn = _connect()
+        rows = conn.execute(
+            "SELECT headline FROM news_sentiment GROUP BY headline ORDER BY MAX(id) DESC LIMIT ?;", (limit,)
+        ).fetchall()
+        return [row[0] for row in rows]
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading recent headlines: {e}", exc_info=True)
+        return []
+    finally:
+        _release(conn)
+
+def get_articles_for_symbol(symbol: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            limit: int = 100, include_archives: bool = False) -> List[dict]:
+    """
+    Returns the newest articles mentioning `symbol`, via article_entities.
+
+    Args:
+        symbol (str): Ticker symbol, e.g. 'AAPL'.
+        start (datetime, optional): Earliest scraped_timestamp (inclusive).
+        end (datetime, optional): Latest scraped_timestamp (exclusive).
+        limit (int): Maximum number of articles.
+        include_archives (bool): Also search the months archived by
+                                 src/database/partitions.py (those from
+                                 `start` to `end`, or all of them).
+
+    Returns:
+        List[dict]: {'id', 'scraped_timestamp', 'source', 'headline', 'article_url',
+                     'sentiment_label', 'sentiment_score', 'matched_text'} per article,
+                    newest first. Empty if the read fails.
+    """
+    columns = ('id', 'scraped_timestamp', 'source', 'headline', 'article_url',
+               'sentiment_label', 'sentiment_score', 'matched_text')
+    table, entities_table = (('news_sentiment_all', 'article_entities_all') if include_archives
+                             else ('news_sentiment', 'article_entities'))
+    sql = f"""
+        SELECT {', '.join('e.matched_text' if c == 'matched_text' else 'n.' + c for c in columns)}
+        FROM {entities_table} e JOIN {table} n ON n.id = e.article_id
+        WHERE e.symbol = ?
+    """
+    params: list = [symbol.upper()]
+    if start is not None:
+        sql += " AND n.scraped_timestamp >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND n.scraped_timestamp < ?"
+        params.append(end)
+    sql += " ORDER BY e.article_id DESC LIMIT ?;"
+    params.append(limit)
+
+    conn = None
+    try:
+        if include_archives:
+            from src.database import partitions
+            conn = partitions.open_history(start, end)
+        else:
+            conn = _connect()
+        return [dict(zip(columns, row)) for row in conn.execute(sql, params)]
+    except (sqlite3.Error, ValueError, OSError) as e:
+        logger.error(f"Database error reading articles for symbol '{symbol}': {e}", exc_info=True)
+        return []
+    finally:
+        if include_archives:
+            if conn is not None:
+                conn.close()
+        else:
+            _release(conn)
+
+def load_near_duplicate_entries(since: float) -> List[tuple]:
+    """
+    Returns the near-duplicate index entries seen at or after `since` (unix time).
+
+    Returns:
+        List[tuple]: (article_hash, signature, anchors, label, score, model_version, seen_at).
+                     Empty if the read fails.
+    """
+    conn = None
+    try:
+        conn = _connect()
+        return conn.execute(
+            """
+            SELECT article_hash, signature, anchors, sentiment_label, sentiment_score, model_version, seen_at
+            FROM near_duplicate_index WHERE seen_at >= ? ORDER BY seen_at;
+            """,
+            (since,)
+        ).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Database error loading the near-duplicate index: {e}", exc_info=True)
+        return []
+    finally:
+        _release(conn)
+
+def save_near_duplicates(entries: List[tuple], links: List[tuple]):
+    """
+    Stores new near-duplicate index entries and duplicate links in one transaction.
+
+    Args:
+        entries (List[tuple]): (article_hash, signature, anchors, label, score, model_version, seen_at).
+        links (List[tuple]): (article_hash, canonical_hash, similarity, linked_at).
+    """
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO near_duplicate_index
+                    (article_hash, signature, anchors, sentiment_label, sentiment_score, model_version, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+                """,
+                entries
+            )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO near_duplicate_links (article_hash, canonical_hash, similarity, linked_at)
+                VALUES (?, ?, ?, ?);
+                """,
+                links
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Database error saving near-duplicates: {e}", exc_info=True)
+    finally:
+        _release(conn)
+
+def prune_near_duplicate_entries(before: float):
+    """ Deletes near-duplicate index entries older than `before` (unix time). Links are kept. """
+    conn = None
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM near_duplicate_index WHERE seen_at < ?;", (before,))
+    except sqlite3.Error as e:
+        logger.error(f"Database error pruning the near-duplicate index: {e}", exc_info=True)
+    finally:
+        _release(conn)
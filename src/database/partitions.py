@@ -0,0 +1,475 @@
+#
+# src/database/partitions.py
+#
+# Monthly partitioning of news_sentiment. The live table only keeps the
+# most recent `partitions.hot_months` months, so it and its indexes stay
+# the size of a few months of data however long the pipeline runs.
+# Older months are moved out, one month at a time, into archive files:
+#
+#   - each month becomes its own SQLite file under `partitions.archive_dir`
+#     (news_sentiment_YYYY_MM.db) with that month's news_sentiment and
+#     article_entities rows, same columns and same ids;
+#   - the file is written once, made read-only, and gzipped when
+#     `partitions.compress` is set (it is decompressed into a cache the
+#     first time it is read);
+#   - the `partitions` table catalogs the archives; archives older than
+#     `partitions.retention_months` are deleted (0 keeps them forever);
+#   - rows leave the live table in small transactions, so ingestion carries
+#     on while a month is archived. The pages they free are reused by new
+#     rows (and returned to the OS on databases created with incremental
+#     auto-vacuum), so no whole-database VACUUM is needed;
+#   - each of those transactions also records the rows' hashes in
+#     archived_hashes, so the pipeline's probe and INSERT OR IGNORE keep
+#     treating archived articles as already stored.
+#
+# The rollup tables keep counting archived rows, so sentiment series for
+# any period still come straight from the rollups. For article-level
+# history, `open_history()` attaches the archives a time range needs and
+# exposes live plus archived rows as the temporary views
+# news_sentiment_all and article_entities_all. `db_manager.get_stats` and
+# `get_articles_for_symbol` read through it with include_archives=True;
+# export and rescore only ever see the live table.
+#
+# Archiving runs on the daemon's background thread (`Compactor`) or with
+# `python main.py compact`.
+#
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import stat
+import threading
+from datetime import datetime
+from typing import List, Optional, Union
+from urllib.parse import quote
+
+from src.database import db_manager
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+HOT_MONTHS = settings.get('partitions.hot_months', 0)
+ARCHIVE_DIR = settings.get('partitions.archive_dir', 'data/archive')
+COMPRESS = settings.get('partitions.compress', True)
+RETENTION_MONTHS = settings.get('partitions.retention_months', 0)
+DELETE_BATCH_SIZE = settings.get('partitions.delete_batch_size', 5000)
+COMPACTION_INTERVAL = settings.get('partitions.compaction_interval', 3600.0)
+
+# Tables whose rows move into the archives, parents first.
+ARCHIVED_TABLES = ('news_sentiment', 'article_entities')
+
+TimeBound = Optional[Union[datetime, str]]
+
+# --- Months ---
+# Partitions are calendar months of scraped_timestamp, named 'YYYY-MM'.
+# Stored timestamps are 'YYYY-MM-DD HH:MM:SS' text, so a month is exactly
+# the rows with month <= scraped_timestamp < next month as strings.
+
+def month_of(value: Union[datetime, str]) -> str:
+    return value.strftime('%Y-%m') if isinstance(value, datetime) else str(value)[:7]
+
+def add_months(month: str, count: int) -> str:
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def archive_path(month: str, compressed: bool) -> str:
+    name = f"news_sentiment_{month.replace('-', '_')}.db"
+    return os.path.join(ARCHIVE_DIR, name + ('.gz' if compressed else ''))
+
+def _cache_path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, 'cache', os.path.basename(archive_path(month, False)))
+
+# --- Catalog ---
+
+_PARTITION_COLUMNS = ('month', 'path', 'row_count', 'min_id', 'max_id', 'compressed', 'bytes', 'status', 'archived_at')
+
+def list_partitions(status: Optional[str] = None) -> List[dict]:
+    """
+    Returns the catalog of archived months, oldest first.
+
+    Args:
+        status (str, optional): Only 'moving', 'archived' or 'expired' entries.
+
+    Returns:
+        List[dict]: One dict per month with the `partitions` columns. Empty if the read fails.
+    """
+    sql = f"SELECT {', '.join(_PARTITION_COLUMNS)} FROM partitions"
+    params: list = []
+    if status is not None:
+        sql += " WHERE status = ?"
+        params.append(status)
+    conn = None
+    try:
+        conn = db_manager._connect()
+        rows = conn.execute(sql + " ORDER BY month;", params).fetchall()
+        return [dict(zip(_PARTITION_COLUMNS, row)) for row in rows]
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading the partition catalog: {e}", exc_info=True)
+        return []
+    finally:
+        db_manager._release(conn)
+
+def _get_partition(conn: sqlite3.Connection, month: str) -> Optional[dict]:
+    row = conn.execute(f"SELECT {', '.join(_PARTITION_COLUMNS)} FROM partitions WHERE month = ?;", (month,)).fetchone()
+    return dict(zip(_PARTITION_COLUMNS, row)) if row else None
+
+def _save_partition(conn: sqlite3.Connection, entry: dict):
+    with conn:
+        conn.execute(
+            f"INSERT OR REPLACE INTO partitions ({', '.join(_PARTITION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in _PARTITION_COLUMNS)});",
+            [entry[column] for column in _PARTITION_COLUMNS]
+        )
+
+# --- Files ---
+
+def _fsync_replace(source: str, target: str):
+    """ Durably renames `source` over `target`. """
+    with open(source, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(source, target)
+    directory = os.open(os.path.dirname(target) or '.', os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+def _make_read_only(path: str):
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def readable_path(entry: dict) -> str:
+    """ Path of an archive as a plain SQLite file, decompressing a gzipped one into the cache if needed. """
+    if not entry['compressed']:
+        return entry['path']
+    cached = _cache_path(entry['month'])
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(entry['path']):
+        return cached
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    building = cached + '.tmp'
+    with gzip.open(entry['path'], 'rb') as source, open(building, 'wb') as target:
+        shutil.copyfileobj(source, target, 1 << 20)
+    _fsync_replace(building, cached)
+    _make_read_only(cached)
+    return cached
+
+def _read_only_uri(path: str) -> str:
+    # immutable: the file never changes once written, so readers skip locking entirely.
+    return f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+
+def open_archive(entry: dict) -> sqlite3.Connection:
+    """ Opens one archive read-only. Close it when done. """
+    return sqlite3.connect(_read_only_uri(readable_path(entry)), uri=True)
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table});")]
+
+# --- Archiving ---
+
+def _connect_main(**kwargs) -> sqlite3.Connection:
+    # Opened as a URI so archives can be attached with URI parameters (read-only, immutable).
+    return sqlite3.connect(f"file:{quote(os.path.abspath(db_manager.DB_PATH))}", uri=True, **kwargs)
+
+def _open_connection() -> sqlite3.Connection:
+    conn = _connect_main(timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+def _create_archive_tables(conn: sqlite3.Connection):
+    """ Creates the archived tables in the attached 'archive' database, exactly as they are in main. """
+    for table in ARCHIVED_TABLES:
+        ddl = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?;",
+                           (table,)).fetchone()[0]
+        conn.execute(re.sub(r'^CREATE TABLE\s+"?\w+"?', f"CREATE TABLE archive.{table}", ddl, count=1))
+
+def _copy_previous_archive(conn: sqlite3.Connection, entry: dict):
+    """ Carries the rows of an earlier archive of the same month into the one being built. """
+    conn.execute("ATTACH DATABASE ? AS previous;", (_read_only_uri(readable_path(entry)),))
+    try:
+        with conn:
+            for table in ARCHIVED_TABLES:
+                columns = ", ".join(_columns(conn, 'previous', table))
+                conn.execute(f"INSERT OR IGNORE INTO archive.{table} ({columns}) SELECT {columns} FROM previous.{table};")
+    finally:
+        conn.execute("DETACH DATABASE previous;")
+
+def _delete_archived_rows(conn: sqlite3.Connection, month: str, max_id: int, batch_size: int,
+                          stop_event: Optional[threading.Event] = None) -> bool:
+    """
+    Deletes a month's archived rows from the live tables, `batch_size` rows
+    per transaction so concurrent writers only ever wait for one batch.
+    The same transaction records their hashes in archived_hashes.
+
+    Returns:
+        bool: True once no archived rows are left; False if stopped first.
+    """
+    batch = (
+        "SELECT id FROM main.news_sentiment WHERE scraped_timestamp >= ? AND scraped_timestamp < ? "
+        "AND id <= ? ORDER BY id LIMIT ?"
+    )
+    params = (month, add_months(month, 1), max_id, max(1, batch_size))
+    incremental = conn.execute("PRAGMA main.auto_vacuum;").fetchone()[0] == 2
+    while True:
+        with conn:
+            conn.execute(
+                f"INSERT OR IGNORE INTO main.archived_hashes (article_hash, month) "
+                f"SELECT article_hash, ? FROM main.news_sentiment WHERE id IN ({batch});",
+                (month,) + params
+            )
+            conn.execute(f"DELETE FROM main.article_entities WHERE article_id IN ({batch});", params)
+            deleted = conn.execute(f"DELETE FROM main.news_sentiment WHERE id IN ({batch});", params).rowcount
+        if incremental:
+            # executescript steps the pragma to completion; execute() frees a single page.
+            conn.executescript("PRAGMA main.incremental_vacuum;")
+        if deleted < params[-1]:
+            return True
+        if stop_event is not None and stop_event.is_set():
+            return False
+
+def _finish_move(conn: sqlite3.Connection, entry: dict, batch_size: int,
+                 stop_event: Optional[threading.Event] = None) -> bool:
+    if not _delete_archived_rows(conn, entry['month'], entry['max_id'], batch_size, stop_event):
+        return False
+    entry['status'] = 'archived'
+    _save_partition(conn, entry)
+    return True
+
+def archive_month(month: str, compress: bool = COMPRESS, batch_size: int = DELETE_BATCH_SIZE,
+                  stop_event: Optional[threading.Event] = None) -> Optional[dict]:
+    """
+    Moves one month of rows from the live tables into its archive file.
+    A month that was archived before (rows can arrive late) is rebuilt
+    with its earlier rows included.
+
+    The archive is complete and cataloged before any live row is deleted,
+    so an interruption at any point loses nothing; a partly deleted month
+    stays 'moving' and is finished by the next `compact_once`.
+
+    Returns:
+        dict: The month's catalog entry, or None if the month could not be archived.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    building = os.path.join(ARCHIVE_DIR, f".{os.path.basename(archive_path(month, False))}.building")
+    _remove(building)
+    conn = None
+    try:
+        conn = _open_connection()
+        previous = _get_partition(conn, month)
+        if previous is not None and previous['status'] == 'expired':
+            previous = None
+        conn.execute("ATTACH DATABASE ? AS archive;", (building,))
+        _create_archive_tables(conn)
+        if previous is not None:
+            _copy_previous_archive(conn, previous)
+        # One transaction: the archive gets a consistent snapshot of the month.
+        # Only the archive is written, so live writers are never blocked here.
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO archive.news_sentiment SELECT * FROM main.news_sentiment "
+                "WHERE scraped_timestamp >= ? AND scraped_timestamp < ? ORDER BY id;",
+                (month, add_months(month, 1))
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO archive.article_entities SELECT e.* FROM main.article_entities e "
+                "JOIN archive.news_sentiment n ON n.id = e.article_id;"
+            )
+            conn.execute("CREATE INDEX archive.idx_scraped_timestamp ON news_sentiment (scraped_timestamp);")
+            conn.execute("CREATE INDEX archive.idx_source ON news_sentiment (source);")
+            conn.execute("CREATE INDEX archive.idx_article_entities_article ON article_entities (article_id);")
+        row_count, min_id, max_id = conn.execute(
+            "SELECT COUNT(*), COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM archive.news_sentiment;"
+        ).fetchone()
+        conn.execute("DETACH DATABASE archive;")
+
+        path = archive_path(month, compress)
+        if compress:
+            with open(building, 'rb') as source, gzip.open(building + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            _remove(building)
+            _fsync_replace(building + '.gz', path)
+        else:
+            _fsync_replace(building, path)
+        _make_read_only(path)
+        # Whatever an earlier archive of this month left behind is stale now.
+        _remove(archive_path(month, not compress))
+        _remove(_cache_path(month))
+
+        entry = {
+            'month': month, 'path': path, 'row_count': row_count, 'min_id': min_id, 'max_id': max_id,
+            'compressed': int(compress), 'bytes': os.path.getsize(path), 'status': 'moving',
+            'archived_at': datetime.now(),
+        }
+        _save_partition(conn, entry)
+        logger.info(f"Archived {month}: {row_count} rows to {path} ({entry['bytes'] / 1e6:.1f} MB).")
+        _finish_move(conn, entry, batch_size, stop_event)
+        return entry
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Error archiving {month}: {e}", exc_info=True)
+        return None
+    finally:
+        if conn is not None:
+            conn.close()
+        _remove(building)
+        _remove(building + '.gz')
+
+def expire_partition(entry: dict) -> bool:
+    """
+    Deletes an archive file under the retention policy, keeping its catalog
+    entry as 'expired'. Its archived_hashes go too: a hash includes the
+    scrape date, so no new scrape can match a month this old.
+    """
+    conn = None
+    try:
+        _remove(entry['path'])
+        _remove(_cache_path(entry['month']))
+        conn = _open_connection()
+        entry = dict(entry, status='expired', bytes=0)
+        _save_partition(conn, entry)
+        with conn:
+            conn.execute("DELETE FROM archived_hashes WHERE month = ?;", (entry['month'],))
+        logger.info(f"Deleted the {entry['month']} archive ({entry['row_count']} rows) under the retention policy.")
+        return True
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Error expiring the {entry['month']} archive: {e}", exc_info=True)
+        return False
+    finally:
+        if conn is not None:
+            conn.close()
+
+def compact_once(now: Optional[datetime] = None, hot_months: int = HOT_MONTHS,
+                 retention_months: int = RETENTION_MONTHS, compress: bool = COMPRESS,
+                 batch_size: int = DELETE_BATCH_SIZE, stop_event: Optional[threading.Event] = None) -> Optional[dict]:
+    """
+    Does the next single unit of partition work, in this order: finishes a
+    month left 'moving', archives the oldest month beyond `hot_months`
+    (counting the current month), or deletes the oldest archive beyond
+    `retention_months`.
+
+    Returns:
+        dict: {'action': 'resumed' | 'archived' | 'expired', 'month'}, or None
+              if there is nothing to do (or the step failed).
+    """
+    current = month_of(now or datetime.now())
+    conn = None
+    try:
+        conn = _open_connection()
+        moving = list_partitions('moving')
+        if moving:
+            if _finish_move(conn, moving[0], batch_size, stop_event):
+                return {'action': 'resumed', 'month': moving[0]['month']}
+            return None
+
+        if hot_months > 0:
+            oldest = conn.execute("SELECT MIN(scraped_timestamp) FROM news_sentiment;").fetchone()[0]
+            if oldest is not None and month_of(oldest) < add_months(current, 1 - hot_months):
+                month = month_of(oldest)
+                conn.close()
+                conn = None
+                if archive_month(month, compress, batch_size, stop_event) is None:
+                    return None
+                return {'action': 'archived', 'month': month}
+
+        archived = list_partitions('archived') if retention_months > 0 else []
+        if archived and archived[0]['month'] < add_months(current, -retention_months):
+            if expire_partition(archived[0]):
+                return {'action': 'expired', 'month': archived[0]['month']}
+    except sqlite3.Error as e:
+        logger.error(f"Database error compacting partitions: {e}", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+    return None
+
+def compact(stop_event: Optional[threading.Event] = None, **kwargs) -> List[dict]:
+    """ Runs `compact_once` until nothing is left to do (or `stop_event` is set). Returns its actions. """
+    actions = []
+    while stop_event is None or not stop_event.is_set():
+        action = compact_once(stop_event=stop_event, **kwargs)
+        if action is None:
+            break
+        actions.append(action)
+    return actions
+
+class Compactor:
+    """ Runs `compact` on a background thread every `interval` seconds, one partition at a time. """
+
+    def __init__(self, interval: float = COMPACTION_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'Compactor':
+        self._thread = threading.Thread(target=self._run, name='partition-compactor', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                compact(stop_event=self._stop)
+            except Exception as e:
+                logger.error(f"Partition compaction failed: {e}", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def stop(self, timeout: Optional[float] = None):
+        """ Stops after the current batch; a half-moved month is finished on the next run. """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+# --- Reading history ---
+
+def _union(conn: sqlite3.Connection, table: str, attached: List[tuple]) -> str:
+    """ SELECT over the live table and every attached archive, NULL-filling columns an older archive lacks. """
+    columns = _columns(conn, 'main', table)
+    selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+    for alias, entry in attached:
+        present = set(_columns(conn, alias, table))
+        select = f"SELECT {', '.join(c if c in present else f'NULL AS {c}' for c in columns)} FROM {alias}.{table}"
+        if entry['status'] == 'moving':
+            # Rows not yet deleted from the live table would otherwise appear twice.
+            key = 'id' if table == 'news_sentiment' else 'article_id'
+            select += f" WHERE {key} NOT IN (SELECT id FROM main.news_sentiment)"
+        selects.append(select)
+    return " UNION ALL ".join(selects)
+
+def open_history(start: TimeBound = None, end: TimeBound = None) -> sqlite3.Connection:
+    """
+    Opens a connection on which the temporary views news_sentiment_all and
+    article_entities_all cover live rows plus every archived month from
+    `start`'s month to `end`'s. Filter on scraped_timestamp as usual; close
+    the connection when done.
+
+    Raises:
+        ValueError: The range spans more archives than SQLite can attach at once.
+    """
+    entries = [
+        entry for entry in list_partitions()
+        if entry['status'] != 'expired'
+        and (start is None or entry['month'] >= month_of(start))
+        and (end is None or entry['month'] <= month_of(end))
+    ]
+    conn = _connect_main()
+    try:
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(conn, 'getlimit') else 10
+        if len(entries) > limit:
+            raise ValueError(f"{len(entries)} archived months in range but only {limit} can be attached; "
+                             "narrow start/end.")
+        attached = []
+        for entry in entries:
+            alias = f"p_{entry['month'].replace('-', '_')}"
+            conn.execute(f"ATTACH DATABASE ? AS {alias};", (_read_only_uri(readable_path(entry)),))
+            attached.append((alias, entry))
+        for table in ARCHIVED_TABLES:
+            conn.execute(f"CREATE TEMP VIEW {table}_all AS {_union(conn, table, attached)};")
+    except Exception:
+        conn.close()
+        raise
+    return conn
@@ -0,0 +1,166 @@
+#
+# src/database/rollups.py
+#
+# Query API over the sentiment rollup tables (see schema.sql). The rollups
+# are kept up to date by triggers on news_sentiment, so reading a series
+# touches one row per source and bucket instead of every article.
+#
+
+import sqlite3
+from datetime import datetime
+from typing import List, Optional, Union
+
+from src.database import db_manager
+from src.utils.logger import logger
+
+# granularity -> (table, strftime format of its bucket_start)
+GRANULARITIES = {
+    'hour': ('sentiment_rollup_hourly', '%Y-%m-%d %H:00:00'),
+    'day': ('sentiment_rollup_daily', '%Y-%m-%d 00:00:00'),
+}
+
+_AGGREGATES = ('article_count', 'positive_count', 'negative_count', 'neutral_count', 'score_sum', 'signed_score_sum')
+
+TimeBound = Optional[Union[datetime, str]]
+
+def _bucket_bound(value: TimeBound, granularity: str) -> Optional[str]:
+    """ Normalizes a start/end bound to the bucket_start text format. """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime(GRANULARITIES[granularity][1])
+
+def _series_row(bucket_start: str, source: Optional[str], values: tuple) -> dict:
+    count, positive, negative, neutral, score_sum, signed_sum = values
+    return {
+        'bucket_start': bucket_start,
+        'source': source,
+        'article_count': count,
+        'positive_count': positive,
+        'negative_count': negative,
+        'neutral_count': neutral,
+        'mean_score': score_sum / count if count else None,
+        'sentiment_index': signed_sum / count if count else None,
+    }
+
+def get_sentiment_series(source: Optional[str] = None, granularity: str = 'hour',
+                         start: TimeBound = None, end: TimeBound = None) -> List[dict]:
+    """
+    Returns sentiment aggregates per time bucket, oldest first.
+
+    Args:
+        source (str, optional): One source (the news_sentiment.source value).
+                                None aggregates across all sources.
+        granularity (str): 'hour' or 'day'.
+        start (datetime | str, optional): First bucket to include (inclusive).
+        end (datetime | str, optional): Buckets starting at or after `end` are
+                                        excluded. ISO strings are accepted.
+
+    Returns:
+        List[dict]: One dict per non-empty bucket with 'bucket_start', 'source',
+                    'article_count', 'positive_count', 'negative_count',
+                    'neutral_count', 'mean_score' (mean model confidence) and
+                    'sentiment_index' (mean of +score for Positive, -score for
+                    Negative, 0 for Neutral). Empty if the read fails.
+
+    Raises:
+        ValueError: For an unknown granularity or an unparseable bound.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}.")
+    table = GRANULARITIES[granularity][0]
+
+    conditions, params = ["article_count > 0"], []
+    if source is not None:
+        conditions.append("source = ?")
+        params.append(source)
+    start_bound, end_bound = _bucket_bound(start, granularity), _bucket_bound(end, granularity)
+    if start_bound is not None:
+        conditions.append("bucket_start >= ?")
+        params.append(start_bound)
+    if end_bound is not None:
+        conditions.append("bucket_start < ?")
+        params.append(end_bound)
+    where = " AND ".join(conditions)
+
+    if source is not None:
+        # Served by the (source, bucket_start) primary key.
+        sql = f"SELECT bucket_start, {', '.join(_AGGREGATES)} FROM {table} WHERE {where} ORDER BY bucket_start;"
+    else:
+        # Served by the covering bucket_start index.
+        sums = ", ".join(f"SUM({column})" for column in _AGGREGATES)
+        sql = f"SELECT bucket_start, {sums} FROM {table} WHERE {where} GROUP BY bucket_start ORDER BY bucket_start;"
+
+    conn = None
+    try:
+        conn = db_manager._connect()
+        return [_series_row(row[0], source, row[1:]) for row in conn.execute(sql, params)]
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading {granularity} sentiment series: {e}", exc_info=True)
+        return []
+    finally:
+        db_manager._release(conn)
+
+_REBUILD_SELECT = """
+    SELECT source, strftime('{bucket_format}', scraped_timestamp), COUNT(*),
+           SUM(sentiment_label = 'Positive'), SUM(sentiment_label = 'Negative'),
+           SUM(sentiment_label = 'Neutral'), SUM(sentiment_score),
+           SUM(CASE sentiment_label WHEN 'Positive' THEN sentiment_score
+                                    WHEN 'Negative' THEN -sentiment_score ELSE 0 END)
+    FROM news_sentiment
+    GROUP BY 1, 2
+"""
+
+def _archived_aggregates() -> dict:
+    """ Per-bucket aggregates of every archived month (see partitions.py), by granularity. """
+    from src.database import partitions
+
+    aggregates = {granularity: [] for granularity in GRANULARITIES}
+    for entry in partitions.list_partitions():
+        if entry['status'] == 'expired':
+            continue
+        conn = partitions.open_archive(entry)
+        try:
+            for granularity, (_, bucket_format) in GRANULARITIES.items():
+                aggregates[granularity].extend(conn.execute(_REBUILD_SELECT.format(bucket_format=bucket_format)))
+        finally:
+            conn.close()
+    return aggregates
+
+def rebuild_rollups() -> bool:
+    """
+    Recomputes both rollup tables from news_sentiment and its archived
+    months in one transaction. Needed once for rows stored before the
+    rollups existed, or to drop rows that were deleted since (including
+    archives deleted under the retention policy).
+
+    Returns:
+        bool: True if the rollups were rebuilt.
+    """
+    conn = None
+    try:
+        # Read before the write transaction: archives are separate files.
+        archived = _archived_aggregates()
+        conn = db_manager._connect()
+        with conn:
+            for granularity, (table, bucket_format) in GRANULARITIES.items():
+                conn.execute(f"DELETE FROM {table};")
+                conn.execute(
+                    f"INSERT INTO {table} (source, bucket_start, {', '.join(_AGGREGATES)}) "
+                    + _REBUILD_SELECT.format(bucket_format=bucket_format) + ";"
+                )
+                # An archived month can share a bucket with live rows that arrived late.
+                updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in _AGGREGATES)
+                conn.executemany(
+                    f"INSERT INTO {table} (source, bucket_start, {', '.join(_AGGREGATES)}) "
+                    f"VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (source, bucket_start) DO UPDATE SET {updates};",
+                    archived[granularity]
+                )
+        logger.info("Sentiment rollups rebuilt from news_sentiment and its archives.")
+        return True
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Database error rebuilding sentiment rollups: {e}", exc_info=True)
+        return False
+    finally:
+        db_manager._release(conn)
@@ -52,4 +52,359 @@ CREATE TABLE IF NOT EXISTS news_sentiment (
 CREATE INDEX IF NOT EXISTS idx_scraped_timestamp ON news_sentiment (scraped_timestamp);
 
 -- Creates an index on the source for fast filtering by 'Finviz' or 'Yahoo'.
-CREATE INDEX IF NOT EXISTS idx_source ON news_sentiment (source);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_source ON news_sentiment (source);
+
+-- === SENTIMENT CACHE ===
+
+-- 'sentiment_cache' stores model output keyed by the normalized headline text
+-- and model version, so a headline seen again under a new URL or date is not
+-- re-scored. See src/nlp/sentiment_cache.py.
+CREATE TABLE IF NOT EXISTS sentiment_cache (
+    cache_key TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    sentiment_label TEXT NOT NULL,
+    sentiment_score REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+
+-- Lets the cache find its least recently used entries quickly when evicting.
+CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache (last_used_at);
+
+-- === FEED STATE ===
+
+-- 'feed_state' remembers the HTTP validators from each feed's last fetch,
+-- so the scraper can send conditional GETs and skip unchanged feeds.
+-- 'high_water_published' / 'high_water_guid' identify the newest item
+-- seen (published time in UTC), so a changed feed is only read up to
+-- where the previous fetch began.
+CREATE TABLE IF NOT EXISTS feed_state (
+    feed_name TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT NULL,
+    last_modified TEXT NULL,
+    last_status INTEGER NULL,
+    last_checked_at DATETIME NOT NULL,
+    high_water_published DATETIME NULL,
+    high_water_guid TEXT NULL
+);
+
+-- === RUN HISTORY ===
+
+-- 'pipeline_runs' stores one row per ETL run, so throughput, duplicate
+-- rates and model versions can be tracked over time with plain SQL.
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NOT NULL,
+    -- 'batch' or 'streaming'.
+    mode TEXT NOT NULL,
+    -- 'ok', 'no_articles' or 'error'.
+    status TEXT NOT NULL,
+    model_version TEXT NULL,
+
+    -- Wall time of the whole run and of each phase, in seconds.
+    duration_seconds REAL NOT NULL,
+    extract_seconds REAL NULL,
+    transform_seconds REAL NULL,
+    load_seconds REAL NULL,
+
+    feeds_polled INTEGER NOT NULL DEFAULT 0,
+    feeds_not_modified INTEGER NOT NULL DEFAULT 0,
+    feeds_failed INTEGER NOT NULL DEFAULT 0,
+    articles_scraped INTEGER NOT NULL DEFAULT 0,
+    articles_skipped INTEGER NOT NULL DEFAULT 0,
+    articles_inserted INTEGER NOT NULL DEFAULT 0,
+    articles_duplicate INTEGER NOT NULL DEFAULT 0,
+    articles_failed INTEGER NOT NULL DEFAULT 0,
+    -- Share of scraped articles that were already stored (skipped + duplicate).
+    duplicate_rate REAL NULL,
+    -- Articles inserted per second of wall time.
+    throughput REAL NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started_at ON pipeline_runs (started_at);
+
+-- === RESCORE CHECKPOINTS ===
+
+-- 'rescore_checkpoints' records how far each re-scoring job has got
+-- (the last news_sentiment.id it committed), so a killed job resumes
+-- where it stopped. See src/etl/rescore.py.
+CREATE TABLE IF NOT EXISTS rescore_checkpoints (
+    job_name TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    rows_updated INTEGER NOT NULL DEFAULT 0,
+    rows_failed INTEGER NOT NULL DEFAULT 0,
+    started_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    finished_at DATETIME NULL
+);
+
+-- 'export_watermarks' records the last news_sentiment.id each named
+-- incremental export has written, so the next run only exports newer rows.
+-- See src/etl/export.py.
+CREATE TABLE IF NOT EXISTS export_watermarks (
+    export_name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL,
+    rows_exported INTEGER NOT NULL,
+    output_path TEXT NULL,
+    exported_at DATETIME NOT NULL
+);
+
+-- === SENTIMENT ROLLUPS ===
+
+-- Pre-aggregated sentiment per source and hour / day, so dashboards read a
+-- few rows per bucket instead of scanning news_sentiment with GROUP BY.
+-- They are maintained incrementally by the triggers below as rows are
+-- inserted or re-scored; src/database/rollups.py queries them and can
+-- rebuild them from scratch.
+--
+-- Buckets are keyed by scraped_timestamp. 'signed_score_sum' adds +score
+-- for Positive rows and -score for Negative ones (Neutral adds 0), so
+-- signed_score_sum / article_count is a sentiment index in [-1, 1].
+-- The (source, bucket_start) primary key of a WITHOUT ROWID table is the
+-- table itself, so per-source range queries are served from one B-tree.
+CREATE TABLE IF NOT EXISTS sentiment_rollup_hourly (
+    source TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    signed_score_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, bucket_start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sentiment_rollup_daily (
+    source TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    signed_score_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, bucket_start)
+) WITHOUT ROWID;
+
+-- Covering indexes for all-source series: a time-range query reads every
+-- aggregate straight from the index, without touching the table.
+CREATE INDEX IF NOT EXISTS idx_rollup_hourly_bucket ON sentiment_rollup_hourly (
+    bucket_start, article_count, positive_count, negative_count, neutral_count, score_sum, signed_score_sum
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_daily_bucket ON sentiment_rollup_daily (
+    bucket_start, article_count, positive_count, negative_count, neutral_count, score_sum, signed_score_sum
+);
+
+-- A new row adds itself to its hour and day.
+CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON news_sentiment
+BEGIN
+    INSERT INTO sentiment_rollup_hourly (source, bucket_start, article_count, positive_count, negative_count,
+                                         neutral_count, score_sum, signed_score_sum)
+    VALUES (NEW.source, strftime('%Y-%m-%d %H:00:00', NEW.scraped_timestamp), 1,
+            NEW.sentiment_label = 'Positive', NEW.sentiment_label = 'Negative', NEW.sentiment_label = 'Neutral',
+            NEW.sentiment_score,
+            CASE NEW.sentiment_label WHEN 'Positive' THEN NEW.sentiment_score
+                                     WHEN 'Negative' THEN -NEW.sentiment_score ELSE 0 END)
+    ON CONFLICT (source, bucket_start) DO UPDATE SET
+        article_count = article_count + excluded.article_count,
+        positive_count = positive_count + excluded.positive_count,
+        negative_count = negative_count + excluded.negative_count,
+        neutral_count = neutral_count + excluded.neutral_count,
+        score_sum = score_sum + excluded.score_sum,
+        signed_score_sum = signed_score_sum + excluded.signed_score_sum;
+
+    INSERT INTO sentiment_rollup_daily (source, bucket_start, article_count, positive_count, negative_count,
+                                        neutral_count, score_sum, signed_score_sum)
+    VALUES (NEW.source, strftime('%Y-%m-%d 00:00:00', NEW.scraped_timestamp), 1,
+            NEW.sentiment_label = 'Positive', NEW.sentiment_label = 'Negative', NEW.sentiment_label = 'Neutral',
+            NEW.sentiment_score,
+            CASE NEW.sentiment_label WHEN 'Positive' THEN NEW.sentiment_score
+                                     WHEN 'Negative' THEN -NEW.sentiment_score ELSE 0 END)
+    ON CONFLICT (source, bucket_start) DO UPDATE SET
+        article_count = article_count + excluded.article_count,
+        positive_count = positive_count + excluded.positive_count,
+        negative_count = negative_count + excluded.negative_count,
+        neutral_count = neutral_count + excluded.neutral_count,
+        score_sum = score_sum + excluded.score_sum,
+        signed_score_sum = signed_score_sum + excluded.signed_score_sum;
+END;
+
+-- A re-scored (or re-labelled) row moves its contribution: the old values
+-- are subtracted from their buckets and the new ones added.
+CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+AFTER UPDATE OF source, scraped_timestamp, sentiment_label, sentiment_score ON news_sentiment
+BEGIN
+    UPDATE sentiment_rollup_hourly SET
+        article_count = article_count - 1,
+        positive_count = positive_count - (OLD.sentiment_label = 'Positive'),
+        negative_count = negative_count - (OLD.sentiment_label = 'Negative'),
+        neutral_count = neutral_count - (OLD.sentiment_label = 'Neutral'),
+        score_sum = score_sum - OLD.sentiment_score,
+        signed_score_sum = signed_score_sum - CASE OLD.sentiment_label WHEN 'Positive' THEN OLD.sentiment_score
+                                                                       WHEN 'Negative' THEN -OLD.sentiment_score ELSE 0 END
+    WHERE source = OLD.source AND bucket_start = strftime('%Y-%m-%d %H:00:00', OLD.scraped_timestamp);
+
+    UPDATE sentiment_rollup_daily SET
+        article_count = article_count - 1,
+        positive_count = positive_count - (OLD.sentiment_label = 'Positive'),
+        negative_count = negative_count - (OLD.sentiment_label = 'Negative'),
+        neutral_count = neutral_count - (OLD.sentiment_label = 'Neutral'),
+        score_sum = score_sum - OLD.sentiment_score,
+        signed_score_sum = signed_score_sum - CASE OLD.sentiment_label WHEN 'Positive' THEN OLD.sentiment_score
+                                                                       WHEN 'Negative' THEN -OLD.sentiment_score ELSE 0 END
+    WHERE source = OLD.source AND bucket_start = strftime('%Y-%m-%d 00:00:00', OLD.scraped_timestamp);
+
+    INSERT INTO sentiment_rollup_hourly (source, bucket_start, article_count, positive_count, negative_count,
+                                         neutral_count, score_sum, signed_score_sum)
+    VALUES (NEW.source, strftime('%Y-%m-%d %H:00:00', NEW.scraped_timestamp), 1,
+            NEW.sentiment_label = 'Positive', NEW.sentiment_label = 'Negative', NEW.sentiment_label = 'Neutral',
+            NEW.sentiment_score,
+            CASE NEW.sentiment_label WHEN 'Positive' THEN NEW.sentiment_score
+                                     WHEN 'Negative' THEN -NEW.sentiment_score ELSE 0 END)
+    ON CONFLICT (source, bucket_start) DO UPDATE SET
+        article_count = article_count + excluded.article_count,
+        positive_count = positive_count + excluded.positive_count,
+        negative_count = negative_count + excluded.negative_count,
+        neutral_count = neutral_count + excluded.neutral_count,
+        score_sum = score_sum + excluded.score_sum,
+        signed_score_sum = signed_score_sum + excluded.signed_score_sum;
+
+    INSERT INTO sentiment_rollup_daily (source, bucket_start, article_count, positive_count, negative_count,
+                                        neutral_count, score_sum, signed_score_sum)
+    VALUES (NEW.source, strftime('%Y-%m-%d 00:00:00', NEW.scraped_timestamp), 1,
+            NEW.sentiment_label = 'Positive', NEW.sentiment_label = 'Negative', NEW.sentiment_label = 'Neutral',
+            NEW.sentiment_score,
+            CASE NEW.sentiment_label WHEN 'Positive' THEN NEW.sentiment_score
+                                     WHEN 'Negative' THEN -NEW.sentiment_score ELSE 0 END)
+    ON CONFLICT (source, bucket_start) DO UPDATE SET
+        article_count = article_count + excluded.article_count,
+        positive_count = positive_count + excluded.positive_count,
+        negative_count = negative_count + excluded.negative_count,
+        neutral_count = neutral_count + excluded.neutral_count,
+        score_sum = score_sum + excluded.score_sum,
+        signed_score_sum = signed_score_sum + excluded.signed_score_sum;
+END;
+
+-- There is deliberately no DELETE trigger: the rollups keep counting rows
+-- pruned from news_sentiment, so history survives retention. Use
+-- rollups.rebuild_rollups() to recompute them from the stored rows.
+
+-- === ARTICLE ENTITIES ===
+
+-- 'article_entities' is the normalized form of aspects_json: one row per
+-- (ticker, article), so per-ticker queries are a primary-key range scan
+-- instead of a LIKE scan over headlines. It is filled by the trigger below
+-- from each inserted row's aspects_json (see src/nlp/entities.py).
+CREATE TABLE IF NOT EXISTS article_entities (
+    symbol TEXT NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES news_sentiment (id),
+    -- The headline text that matched, e.g. 'Apple' or '$AAPL'.
+    matched_text TEXT NOT NULL,
+    PRIMARY KEY (symbol, article_id)
+) WITHOUT ROWID;
+
+-- Finds the entities of one article (the reverse direction).
+CREATE INDEX IF NOT EXISTS idx_article_entities_article ON article_entities (article_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_article_entities_insert AFTER INSERT ON news_sentiment
+WHEN NEW.aspects_json IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO article_entities (symbol, article_id, matched_text)
+    SELECT json_extract(value, '$.symbol'), NEW.id, json_extract(value, '$.matched')
+    FROM json_each(NEW.aspects_json)
+    WHERE json_extract(value, '$.symbol') IS NOT NULL;
+END;
+
+-- === NEAR-DUPLICATE INDEX ===
+
+-- 'near_duplicate_index' persists the MinHash signatures of recently scored
+-- (canonical) headlines between runs, with the sentiment a near-duplicate
+-- inherits. 'anchors' holds the ticker symbols and numbers a match must
+-- share. Only rows inside the configured time window are kept.
+-- See src/nlp/near_duplicates.py.
+CREATE TABLE IF NOT EXISTS near_duplicate_index (
+    article_hash TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    anchors TEXT NOT NULL DEFAULT '',
+    sentiment_label TEXT NOT NULL,
+    sentiment_score REAL NOT NULL,
+    model_version TEXT NULL,
+    seen_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_near_duplicate_index_seen_at ON near_duplicate_index (seen_at);
+
+-- 'near_duplicate_links' points each near-duplicate article at the
+-- canonical article whose sentiment it inherited (both by article_hash).
+CREATE TABLE IF NOT EXISTS near_duplicate_links (
+    article_hash TEXT PRIMARY KEY,
+    canonical_hash TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    linked_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_near_duplicate_links_canonical ON near_duplicate_links (canonical_hash);
+
+-- === PARTITIONS ===
+
+-- 'partitions' catalogs the months of news_sentiment that were moved out of
+-- the live table into read-only archive files (one per month, see
+-- src/database/partitions.py). 'status' is 'moving' while the month's rows
+-- are still being deleted from the live table, 'archived' once they are
+-- all gone, and 'expired' after the retention policy deleted the file.
+CREATE TABLE IF NOT EXISTS partitions (
+    -- 'YYYY-MM' of scraped_timestamp.
+    month TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    min_id INTEGER NOT NULL,
+    max_id INTEGER NOT NULL,
+    compressed INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    archived_at DATETIME NOT NULL
+);
+
+-- 'archived_hashes' keeps the article_hash of every row moved into an
+-- archive, with the archive's month. The UNIQUE index on
+-- news_sentiment.article_hash only covers live rows, so this is what
+-- stops an archived article from being stored (and scored) again.
+CREATE TABLE IF NOT EXISTS archived_hashes (
+    article_hash TEXT PRIMARY KEY,
+    month TEXT NOT NULL
+) WITHOUT ROWID;
+
+-- INSERT OR IGNORE skips an archived article exactly like a live duplicate.
+CREATE TRIGGER IF NOT EXISTS trg_skip_archived_hash BEFORE INSERT ON news_sentiment
+WHEN EXISTS (SELECT 1 FROM archived_hashes WHERE article_hash = NEW.article_hash)
+BEGIN
+    SELECT RAISE(IGNORE);
+END;
+
+-- === SCORING QUEUE ===
+
+-- 'scoring_jobs' holds scraped articles waiting for a scoring worker
+-- (pipeline.mode "queue", see src/etl/work_queue.py). A worker leases a
+-- batch by stamping it with its lease_id and an expiry (unix time), keeps
+-- renewing the expiry while it scores, and deletes the rows once their
+-- results are loaded. Rows whose lease has expired can be claimed again.
+CREATE TABLE IF NOT EXISTS scoring_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    -- Same fingerprint the row will have in news_sentiment.
+    article_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    headline TEXT NOT NULL,
+    article_url TEXT NOT NULL,
+    scraped_timestamp DATETIME NOT NULL,
+    published_timestamp DATETIME NULL,
+    enqueued_at REAL NOT NULL,
+    -- Times the job has been claimed.
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_id TEXT NULL,
+    lease_owner TEXT NULL,
+    lease_expires_at REAL NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_scoring_jobs_lease_id ON scoring_jobs (lease_id);
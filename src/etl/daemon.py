@@ -0,0 +1,170 @@
+#
+# src/etl/daemon.py
+#
+# Long-running service mode. Cron-style one-shot runs pay for importing
+# torch, loading FinBERT and setting up the database on every invocation.
+# The daemon does that once, then polls each feed on its own schedule:
+#
+#   - every feed has its own interval (scraper.sources.<name>.interval,
+#     falling back to daemon.poll_interval), randomized by `daemon.jitter`;
+#   - a feed that fails backs off exponentially up to `daemon.max_backoff`;
+#   - database connections are reused across cycles;
+#   - metrics are exposed as a Prometheus text file and/or HTTP endpoint
+#     (see `metrics` in settings.yaml);
+#   - months beyond `partitions.hot_months` are archived on a background
+#     thread, one at a time (see src/database/partitions.py);
+#   - with pipeline.mode "queue" it only extracts and enqueues, and never
+#     loads the model; `python main.py worker` processes do the scoring;
+#   - SIGTERM / SIGINT finish the current cycle and exit cleanly.
+#
+
+import random
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.database import db_manager
+from src.database import partitions
+from src.database import writer
+from src.etl import pipeline
+from src.nlp import sentiment
+from src.scraper import feed_scraper
+from src.utils import metrics
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+POLL_INTERVAL = settings.get('daemon.poll_interval', 300.0)
+JITTER = settings.get('daemon.jitter', 0.1)
+MAX_BACKOFF = settings.get('daemon.max_backoff', 3600.0)
+METRICS_TEXTFILE = settings.get('metrics.textfile', '')
+METRICS_PORT = settings.get('metrics.port', 0)
+
+# Backoff doublings applied at most. Past this the delay is far beyond any
+# sane max_backoff anyway, and 2 ** failures would eventually overflow a float.
+MAX_BACKOFF_DOUBLINGS = 30
+
+class FeedSchedule:
+    """ Tracks when each feed is next due, with jitter and failure backoff. """
+
+    def __init__(self, sources: List[dict], poll_interval: float = POLL_INTERVAL, jitter: float = JITTER,
+                 max_backoff: float = MAX_BACKOFF, clock=time.monotonic, rng: Optional[random.Random] = None):
+        self.sources = {source['name']: source for source in sources}
+        self.poll_interval = poll_interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.failures: Dict[str, int] = {name: 0 for name in self.sources}
+        # Every feed is due immediately on startup.
+        now = self.clock()
+        self.next_due: Dict[str, float] = {name: now for name in self.sources}
+
+    def interval_for(self, name: str) -> float:
+        return self.sources[name].get('interval') or self.poll_interval
+
+    def delay_for(self, name: str) -> float:
+        """ Seconds until the feed's next poll, given its current failure count. """
+        delay = self.interval_for(name) * (2 ** min(self.failures[name], MAX_BACKOFF_DOUBLINGS))
+        if self.failures[name]:
+            delay = min(delay, max(self.max_backoff, self.interval_for(name)))
+        return delay * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+    def due(self) -> List[dict]:
+        now = self.clock()
+        return [self.sources[name] for name, due_at in self.next_due.items() if due_at <= now]
+
+    def seconds_until_next(self) -> float:
+        return max(0.0, min(self.next_due.values()) - self.clock())
+
+    def record(self, name: str, succeeded: bool):
+        self.failures[name] = 0 if succeeded else self.failures[name] + 1
+        self.next_due[name] = self.clock() + self.delay_for(name)
+        if not succeeded:
+            logger.warning(
+                f"Feed '{name}' failed {self.failures[name]} time(s) in a row; "
+                f"next attempt in {self.next_due[name] - self.clock():.0f}s."
+            )
+
+def _feed_succeeded(state: Optional[dict]) -> bool:
+    """ A poll succeeded if the feed answered with anything below 400 (including 304). """
+    return bool(state) and state.get('status') is not None and state['status'] < 400
+
+def run_cycle(schedule: FeedSchedule) -> bool:
+    """
+    Runs the pipeline for every feed that is currently due.
+
+    Returns:
+        bool: True if any feed was polled.
+    """
+    due = schedule.due()
+    if not due:
+        return False
+
+    logger.info(f"Polling {len(due)} due feed(s): {', '.join(s['name'] for s in due)}")
+    try:
+        summary = pipeline.run_pipeline(sources=due)
+        feeds = summary.get('feeds', {})
+        for source in due:
+            schedule.record(source['name'], _feed_succeeded(feeds.get(source['name'])))
+    except Exception as e:
+        logger.error(f"Pipeline cycle failed: {e}", exc_info=True)
+        for source in due:
+            schedule.record(source['name'], False)
+    return True
+
+def serve(stop_event: Optional[threading.Event] = None):
+    """
+    Runs the daemon until SIGTERM/SIGINT (or until `stop_event` is set).
+
+    Args:
+        stop_event (threading.Event, optional): Lets callers stop the loop
+                                                without a signal.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def _request_stop(signum, frame):
+        logger.info(f"Received signal {signum}; finishing the current cycle and shutting down.")
+        stop_event.set()
+
+    # Signal handlers can only be installed from the main thread.
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+
+    sources = feed_scraper.load_sources()
+    if not sources:
+        logger.error("No feeds configured under scraper.sources; daemon not started.")
+        return
+
+    logger.info("Daemon starting: preparing database and loading the model once.")
+    db_manager.create_database()
+    db_manager.enable_connection_reuse()
+    writer_client = writer.use_configured_writer()
+    # In queue mode the daemon only extracts; workers load the model.
+    if pipeline.PIPELINE_MODE != 'queue' and not sentiment.warm_up():
+        logger.error("Model failed to load; daemon not started.")
+        db_manager.close_connections()
+        return
+
+    metrics_server = metrics.start_http_server(METRICS_PORT) if METRICS_PORT else None
+    compactor = partitions.Compactor().start() if partitions.HOT_MONTHS > 0 else None
+
+    schedule = FeedSchedule(sources)
+    logger.info(f"Daemon ready: polling {len(sources)} feed(s).")
+    try:
+        while not stop_event.is_set():
+            if run_cycle(schedule) and METRICS_TEXTFILE:
+                metrics.write_textfile(METRICS_TEXTFILE)
+            # Sleep until the next feed is due, waking early on shutdown.
+            stop_event.wait(schedule.seconds_until_next())
+    finally:
+        if compactor is not None:
+            compactor.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if writer_client is not None:
+            writer_client.close()
+        db_manager.close_connections()
+        logger.info("Daemon stopped.")
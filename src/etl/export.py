@@ -0,0 +1,208 @@
+#
+# src/etl/export.py
+#
+# Streams news_sentiment out of SQLite for analytics, without loading the
+# table into memory or holding a long read transaction:
+#
+#   - rows are read in pages of `export.chunk_size` with keyset pagination on
+#     `id`, each page one short query, and written out before the next is read;
+#   - Parquet (one row group per page) or Arrow IPC when pyarrow is
+#     installed, gzip-compressed CSV otherwise;
+#   - the file is written under a temporary name and renamed when complete,
+#     so readers never see a partial export;
+#   - a named incremental export remembers the last id it wrote
+#     (export_watermarks) and next time only exports newer rows.
+#
+# Only rows are exported that existed when the export started; rows inserted
+# meanwhile are picked up by the next incremental run. Re-scored rows keep
+# their id, so incremental exports don't repeat them. Only the live table is
+# exported: months already moved out by src/database/partitions.py are not
+# (read them with `partitions.open_history()`).
+#
+# Run with `python main.py export`.
+#
+
+import csv
+import gzip
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from src.database import db_manager
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+CHUNK_SIZE = settings.get('export.chunk_size', 50000)
+DEFAULT_FORMAT = settings.get('export.format', 'auto')
+
+FORMATS = ('auto', 'parquet', 'arrow', 'csv')
+_TIMESTAMP_COLUMNS = ('scraped_timestamp', 'published_timestamp')
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def resolve_format(export_format: str) -> str:
+    """
+    Returns the concrete format for `export_format`, resolving 'auto'.
+
+    Raises:
+        ValueError: For an unknown format, or a columnar one without pyarrow.
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Use one of: {', '.join(FORMATS)}.")
+    if export_format == 'auto':
+        return 'parquet' if _pyarrow_available() else 'csv'
+    if export_format in ('parquet', 'arrow') and not _pyarrow_available():
+        raise ValueError(f"The '{export_format}' format needs pyarrow (pip install pyarrow); use 'csv' instead.")
+    return export_format
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+class _CsvWriter:
+    """ Gzip-compressed CSV with a header row. """
+
+    def __init__(self, path: str):
+        self._file = gzip.open(path, 'wt', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(db_manager.EXPORT_COLUMNS)
+
+    def write(self, rows: List[tuple]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+class _ArrowWriter:
+    """ Parquet or Arrow IPC through pyarrow, one row group / record batch per page. """
+
+    def __init__(self, path: str, export_format: str):
+        import pyarrow as pa
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ('id', pa.int64()),
+            ('scraped_timestamp', pa.timestamp('us')),
+            ('published_timestamp', pa.timestamp('us')),
+            ('article_hash', pa.string()),
+            ('source', pa.string()),
+            ('article_url', pa.string()),
+            ('headline', pa.string()),
+            ('sentiment_label', pa.string()),
+            ('sentiment_score', pa.float64()),
+            ('aspects_json', pa.string()),
+            ('sentiment_model_version', pa.string()),
+        ])
+        if export_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+            self._write = lambda batch: self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema,
+                                           options=pa.ipc.IpcWriteOptions(compression='zstd'))
+            self._write = self._writer.write_batch
+
+    def write(self, rows: List[tuple]):
+        columns = {name: list(values) for name, values in zip(db_manager.EXPORT_COLUMNS, zip(*rows))}
+        for name in _TIMESTAMP_COLUMNS:
+            columns[name] = [_parse_timestamp(v) for v in columns[name]]
+        self._write(self._pa.RecordBatch.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+def _open_writer(path: str, export_format: str):
+    if export_format == 'csv':
+        return _CsvWriter(path)
+    return _ArrowWriter(path, export_format)
+
+def export_articles(output_path: str, export_format: Optional[str] = None, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, after_id: Optional[int] = None,
+                    incremental: Optional[str] = None, chunk_size: Optional[int] = None) -> dict:
+    """
+    Writes news_sentiment rows to `output_path`, streaming page by page.
+
+    Args:
+        output_path (str): File to create (replaced if it exists).
+        export_format (str, optional): 'parquet', 'arrow', 'csv' or 'auto'.
+                                       Defaults to `export.format`.
+        start (datetime, optional): Earliest scraped_timestamp (inclusive).
+        end (datetime, optional): Latest scraped_timestamp (exclusive).
+        after_id (int, optional): Only export rows with a larger id.
+        incremental (str, optional): Watermark name. Exports rows after that
+                                     watermark (unless `after_id` is given) and
+                                     advances it once the file is complete.
+        chunk_size (int, optional): Rows per page. Defaults to `export.chunk_size`.
+
+    Returns:
+        dict: {'path', 'format', 'rows', 'chunks', 'after_id', 'last_id', 'seconds', 'ok'}.
+              'path' is None when there was nothing to export (no file is written).
+
+    Raises:
+        ValueError: For an unknown format, or a columnar one without pyarrow.
+    """
+    export_format = resolve_format(export_format or DEFAULT_FORMAT)
+    chunk_size = max(1, int(chunk_size or CHUNK_SIZE))
+    if after_id is None:
+        after_id = db_manager.get_export_watermark(incremental) if incremental else 0
+    # Fix the upper bound up front, so a busy pipeline can't keep the export chasing new rows.
+    up_to_id = db_manager.get_max_article_id()
+
+    summary = {'path': None, 'format': export_format, 'rows': 0, 'chunks': 0,
+               'after_id': after_id, 'last_id': after_id, 'seconds': 0.0, 'ok': False}
+    started = time.perf_counter()
+    tmp_path = f"{output_path}.tmp"
+    writer = None
+    try:
+        last_id = after_id
+        while last_id < up_to_id:
+            rows = db_manager.fetch_export_page(last_id, up_to_id, chunk_size, start, end)
+            if rows is None:
+                return summary
+            if not rows:
+                break
+            if writer is None:
+                os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                writer = _open_writer(tmp_path, export_format)
+            writer.write(rows)
+            last_id = rows[-1][0]
+            summary['rows'] += len(rows)
+            summary['chunks'] += 1
+            summary['last_id'] = last_id
+            if len(rows) < chunk_size:
+                break
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, output_path)
+            summary['path'] = output_path
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    summary['ok'] = True
+    summary['seconds'] = time.perf_counter() - started
+    if incremental and summary['rows']:
+        db_manager.save_export_watermark(incremental, summary['last_id'], summary['rows'], output_path)
+
+    if summary['rows']:
+        logger.info(
+            f"Exported {summary['rows']} rows (ids {after_id + 1}..{summary['last_id']}) to {output_path} "
+            f"as {export_format} in {summary['seconds']:.1f}s."
+        )
+    else:
+        logger.info(f"No rows to export after id {after_id}; {output_path} not written.")
+    return summary
@@ -1,25 +1,74 @@
-from src.scraper import yahoo_rss_scraper
+import time
+from datetime import datetime
+
+from src.scraper import feed_scraper
+from src.nlp import entities
+from src.nlp import near_duplicates
 from src.nlp import sentiment
+from src.nlp import sentiment_cache
 from src.database import db_manager
+from src.etl import streaming
+from src.etl import work_queue
+from src.etl.run_history import RunRecorder
+from src.utils.config_loader import get_settings
 from src.utils.logger import logger
 
-def run_pipeline():
+settings = get_settings()
+PIPELINE_MODE = settings.get('pipeline.mode', 'batch')
+
+def run_pipeline(batch_size=None, mode=None, sources=None):
+    """
+    Runs one Extract -> Transform -> Load pass.
+
+    Args:
+        batch_size (int, optional): Headlines per FinBERT forward pass.
+        mode (str, optional): 'batch', 'streaming' or 'queue'. Defaults to `pipeline.mode`.
+                              'queue' only extracts and enqueues new articles for
+                              scoring workers (see work_queue.py).
+        sources (List[dict], optional): Feeds to scrape. Defaults to every
+                                        feed under `scraper.sources`.
+
+    Returns:
+        dict: Run summary with 'inserted', 'skipped', 'duplicates', 'failed'
+              counts and 'feeds', the per-feed fetch state (including status).
+              In 'queue' mode, also 'enqueued'.
+    """
+    # 'streaming' overlaps every phase; 'batch' runs them one after another.
+    mode = mode or PIPELINE_MODE
+    if mode == 'streaming':
+        return streaming.run_streaming_pipeline(batch_size=batch_size, sources=sources)
+
+    summary = {'inserted': 0, 'skipped': 0, 'duplicates': 0, 'failed': 0, 'feeds': {}}
+    run = RunRecorder('queue' if mode == 'queue' else 'batch')
+
     logger.info("=============================================")
     logger.info("====== Starting ETL Pipeline Run ======")
     logger.info("=============================================")
 
+    # Cache counters are reported per run.
+    cache = sentiment_cache.get_sentiment_cache()
+    if cache is not None:
+        cache.reset_stats()
+
     logger.info("--- Phase 1: EXTRACT ---")
-    all_articles = yahoo_rss_scraper.scrape_yahoo_rss()
+    with run.phase('extract'):
+        feed_state = db_manager.get_feed_states()
+        all_articles, new_feed_state = feed_scraper.scrape_feeds(sources, feed_state=feed_state)
+    summary['feeds'] = new_feed_state
 
     if not all_articles:
+        # Still persist validators so unchanged feeds keep answering 304.
+        db_manager.save_feed_states(new_feed_state)
         logger.warning("No articles were scraped. Ending pipeline run.")
-        return
+        run.finish(summary, scraped=0)
+        return summary
 
-    logger.info(f"Extracted a total of {len(all_articles)} articles from Yahoo RSS.")
+    logger.info(f"Extracted a total of {len(all_articles)} articles from {len(new_feed_state)} feeds.")
 
     logger.info("--- Phase 2 & 3: TRANSFORM and LOAD ---")
-    processed_count = 0
+    transform_started = time.perf_counter()
     seen_urls = set()
+    unique_articles = []
 
     for article in all_articles:
         url = article.get('url')
@@ -27,22 +76,94 @@ def run_pipeline():
         if not url or not headline or url in seen_urls:
             continue
         seen_urls.add(url)
-        source = 'Yahoo RSS'
+        unique_articles.append(article)
 
-        logger.debug(f"Processing: '{headline[:60]}...'")
-        finbert_result = sentiment.analyze_sentiment(headline)
+    # Fingerprint every article up front and drop the ones we already stored,
+    # so FinBERT only ever sees headlines that will actually be inserted.
+    scraped_timestamp = datetime.now()
+    for article in unique_articles:
+        article['article_hash'] = db_manager.compute_article_hash(
+            article['headline'], article['url'], scraped_timestamp
+        )
+    existing_hashes = db_manager.get_existing_hashes(a['article_hash'] for a in unique_articles)
+    new_articles = [a for a in unique_articles if a['article_hash'] not in existing_hashes]
+    skipped_count = len(unique_articles) - len(new_articles)
+    summary['skipped'] = skipped_count
+    logger.info(f"Skipped {skipped_count} already-stored articles; scoring {len(new_articles)} new ones.")
 
+    if mode == 'queue':
+        # Scoring and loading happen in the workers. Queued jobs are durable,
+        # so the feed validators can be saved as soon as the enqueue commits.
+        with run.phase('load'):
+            queued = work_queue.enqueue_articles(new_articles, scraped_timestamp)
+        summary['enqueued'] = queued['enqueued']
+        if queued['enqueued'] + queued['duplicates'] == len(new_articles):
+            db_manager.save_feed_states(new_feed_state)
+        logger.info(f"Enqueued {queued['enqueued']} articles for scoring ({queued['duplicates']} already queued).")
+        run.finish(summary, scraped=len(unique_articles))
+        return summary
+
+    headlines = [article['headline'] for article in new_articles]
+    # Near-duplicates of recently scored stories inherit their sentiment;
+    # only the rest go through FinBERT.
+    entity_tags = entities.tag_headlines(headlines)
+    dedup = near_duplicates.get_near_duplicate_index()
+    if dedup is not None:
+        plan = dedup.plan_batch(headlines, entity_tags)
+        positions = near_duplicates.scoring_positions(plan)
+        scored = sentiment.analyze_sentiment_batch([headlines[i] for i in positions], batch_size=batch_size)
+        finbert_results = near_duplicates.merge_results(plan, scored)
+        logger.info(f"{len(headlines) - len(positions)} near-duplicate headlines inherited their sentiment.")
+    else:
+        finbert_results = sentiment.analyze_sentiment_batch(headlines, batch_size=batch_size)
+
+    rows = []
+    for article, finbert_result, tags in zip(new_articles, finbert_results, entity_tags):
         if not finbert_result:
-            logger.warning(f"Sentiment analysis failed for: '{headline}'")
+            logger.warning(f"Sentiment analysis failed for: '{article['headline']}'")
+            summary['failed'] += 1
             continue
 
-        db_manager.insert_article(
-            source=source,
-            headline=headline,
-            article_url=url,
-            finbert_result=finbert_result
-        )
-        processed_count += 1
+        rows.append({
+            'source': article['source'],
+            'headline': article['headline'],
+            'article_url': article['url'],
+            'finbert_result': finbert_result,
+            'scraped_timestamp': scraped_timestamp,
+            'published_timestamp': article.get('published_timestamp'),
+            'entities': tags
+        })
+
+    run.add_phase('transform', time.perf_counter() - transform_started)
 
-    logger.info(f"Successfully processed and loaded {processed_count} unique articles.")
+    with run.phase('load'):
+        load_stats = db_manager.insert_articles(rows)
+        loaded = load_stats['inserted'] + load_stats['duplicates'] == len(rows)
+        # A rolled-back batch must not become the canonical for its own retry.
+        if dedup is not None and loaded:
+            dedup.remember([a['article_hash'] for a in new_articles], finbert_results, plan)
+    processed_count = load_stats['inserted']
+    summary['inserted'] = processed_count
+    summary['duplicates'] = load_stats['duplicates']
+
+    # Validators are only saved for feeds whose articles were all loaded;
+    # saving them otherwise would turn a failed run into a silent 304 next time.
+    if loaded:
+        unloaded = [a for a, result in zip(new_articles, finbert_results) if not result]
+    else:
+        unloaded = new_articles
+    db_manager.save_feed_states(feed_scraper.loaded_feed_states(new_feed_state, unloaded))
+
+    logger.info(
+        f"Successfully processed and loaded {processed_count} unique articles "
+        f"({load_stats['duplicates']} duplicates ignored)."
+    )
+    if cache is not None:
+        cache_stats = cache.stats()
+        logger.info(
+            f"Sentiment cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"(hit rate {cache_stats['hit_rate']:.1%})."
+        )
+    run.finish(summary, scraped=len(unique_articles))
     logger.info("====== ETL Pipeline Run Finished ======")
+    return summary
@@ -0,0 +1,122 @@
+#
+# src/etl/rescore.py
+#
+# Re-scores stored articles with the current model (e.g. after switching
+# backend or upgrading FinBERT). Built to run against a live database:
+#
+#   - rows are read in chunks with keyset pagination on `id`, so memory stays
+#     flat and every page is a primary-key range scan;
+#   - each chunk is scored with batched inference (optionally on the process
+#     pool) and written back in one short transaction, so readers are never
+#     blocked for long;
+#   - the same transaction advances a checkpoint in rescore_checkpoints, so a
+#     killed job resumes after the last committed chunk.
+#
+# Only rows in the live table are re-scored. Months archived by
+# src/database/partitions.py are read-only files and keep the scores they
+# were archived with.
+#
+# Run with `python main.py rescore`.
+#
+
+import time
+from typing import Optional
+
+from src.database import db_manager
+from src.nlp import sentiment
+from src.utils import metrics
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+CHUNK_SIZE = settings.get('rescore.chunk_size', 1000)
+
+ROWS_RESCORED = metrics.counter('etl_rescore_rows_total', "Rows processed by re-scoring jobs, by result.", ['result'])
+
+def default_job_name(model_version: str) -> str:
+    return f"rescore:{model_version}"
+
+def _score(headlines, batch_size: Optional[int], processes: Optional[int]):
+    if processes and processes > 1:
+        from src.nlp import pool
+        return pool.score_in_processes(headlines, processes=processes, batch_size=batch_size)
+    return sentiment.analyze_sentiment_batch(headlines, batch_size=batch_size)
+
+def rescore(chunk_size: Optional[int] = None, batch_size: Optional[int] = None,
+            processes: Optional[int] = None, job_name: Optional[str] = None,
+            restart: bool = False, max_chunks: Optional[int] = None) -> dict:
+    """
+    Re-scores every row not already scored by the current model version.
+
+    Args:
+        chunk_size (int, optional): Rows per page and per transaction.
+                                    Defaults to `rescore.chunk_size`.
+        batch_size (int, optional): Headlines per forward pass.
+        processes (int, optional): Score each chunk on this many worker processes.
+        job_name (str, optional): Checkpoint name. Defaults to one per model version,
+                                  so switching models starts a new job.
+        restart (bool): Ignore an unfinished checkpoint and start from the first row.
+        max_chunks (int, optional): Stop after this many chunks (the job can be resumed).
+
+    Returns:
+        dict: {'job', 'model_version', 'resumed_from', 'last_id', 'updated',
+               'failed', 'chunks', 'finished'}.
+    """
+    chunk_size = max(1, int(chunk_size or CHUNK_SIZE))
+    model_version = sentiment.MODEL_VERSION
+    job_name = job_name or default_job_name(model_version)
+
+    checkpoint = db_manager.get_rescore_checkpoint(job_name)
+    if restart or checkpoint is None or checkpoint['finished_at'] is not None \
+            or checkpoint['model_version'] != model_version:
+        db_manager.reset_rescore_checkpoint(job_name, model_version)
+        last_id = 0
+    else:
+        last_id = checkpoint['last_id']
+        logger.info(f"Resuming rescore job '{job_name}' after id {last_id} ({checkpoint['rows_updated']} rows done).")
+
+    summary = {'job': job_name, 'model_version': model_version, 'resumed_from': last_id, 'last_id': last_id,
+               'updated': 0, 'failed': 0, 'chunks': 0, 'finished': False}
+
+    if not sentiment.warm_up():
+        logger.error("Model failed to load; rescore not started.")
+        return summary
+
+    started = time.perf_counter()
+    while max_chunks is None or summary['chunks'] < max_chunks:
+        rows = db_manager.fetch_rows_after(last_id, chunk_size, exclude_model_version=model_version)
+        if not rows:
+            summary['finished'] = True
+            break
+
+        results = _score([headline for _, headline in rows], batch_size, processes)
+        # With the cascade on, the lexicon decides some rows; they keep its version.
+        updates = [
+            (result['label'], result['score'], result.get('model_version', model_version), row_id)
+            for (row_id, _), result in zip(rows, results) if result
+        ]
+        failed = len(rows) - len(updates)
+        chunk_last_id = rows[-1][0]
+
+        if not db_manager.apply_rescore_chunk(job_name, updates, chunk_last_id, failed):
+            logger.error(f"Stopping rescore job '{job_name}'; it will resume after id {last_id}.")
+            break
+
+        last_id = chunk_last_id
+        summary['last_id'] = last_id
+        summary['updated'] += len(updates)
+        summary['failed'] += failed
+        summary['chunks'] += 1
+        ROWS_RESCORED.inc(len(updates), result='updated')
+        ROWS_RESCORED.inc(failed, result='failed')
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Rescore '{job_name}': through id {last_id}, {summary['updated']} updated, "
+            f"{summary['failed']} failed ({summary['updated'] / elapsed if elapsed else 0:.1f} rows/s)."
+        )
+
+    if summary['finished']:
+        db_manager.finish_rescore_checkpoint(job_name)
+        logger.info(f"Rescore job '{job_name}' finished: {summary['updated']} rows now at {model_version}.")
+    return summary
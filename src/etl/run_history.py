@@ -0,0 +1,103 @@
+#
+# src/etl/run_history.py
+#
+# Records every ETL run: phase timers and run-level metrics while it runs,
+# then one row in the pipeline_runs table when it finishes. Used by both
+# the batch and the streaming pipeline.
+#
+
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from src.database import db_manager
+from src.nlp import sentiment
+from src.utils import metrics
+from src.utils.logger import logger
+
+PIPELINE_RUNS = metrics.counter('etl_pipeline_runs_total', "Pipeline runs by mode and status.", ['mode', 'status'])
+RUN_SECONDS = metrics.histogram('etl_pipeline_run_seconds', "Wall time of a whole pipeline run.", ['mode'])
+PHASE_SECONDS = metrics.histogram('etl_pipeline_phase_seconds', "Time spent in each pipeline phase.", ['phase'])
+LAST_RUN_TIMESTAMP = metrics.gauge('etl_last_run_timestamp_seconds', "Unix time the last run finished.")
+LAST_RUN_INSERTED = metrics.gauge('etl_last_run_articles_inserted', "Articles inserted by the last run.")
+LAST_RUN_DUPLICATE_RATE = metrics.gauge(
+    'etl_last_run_duplicate_rate', "Share of the last run's articles that were already stored."
+)
+
+class RunRecorder:
+    """ Times one pipeline run and records it when `finish` is called. """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.phase_seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """ Adds the time spent inside the block to phase `name`. """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def add_phase(self, name: str, seconds: float):
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+        PHASE_SECONDS.observe(seconds, phase=name)
+
+    def finish(self, summary: dict, scraped: int, status: Optional[str] = None) -> dict:
+        """
+        Updates the run metrics and stores the run in pipeline_runs.
+
+        Args:
+            summary (dict): The pipeline's run summary ('inserted', 'skipped',
+                            'duplicates', 'failed', 'feeds').
+            scraped (int): Unique articles extracted from the feeds.
+            status (str, optional): 'ok', 'no_articles' or 'error'. Defaults to
+                                    'ok', or 'no_articles' if nothing was scraped.
+
+        Returns:
+            dict: The recorded run, as passed to `db_manager.record_pipeline_run`.
+        """
+        duration = time.perf_counter() - self._started
+        status = status or ('ok' if scraped else 'no_articles')
+        feeds = summary.get('feeds') or {}
+        statuses = [state.get('status') for state in feeds.values()]
+        already_stored = summary.get('skipped', 0) + summary.get('duplicates', 0)
+
+        run = {
+            'started_at': self.started_at,
+            'finished_at': datetime.now(),
+            'mode': self.mode,
+            'status': status,
+            'model_version': sentiment.MODEL_VERSION,
+            'duration_seconds': duration,
+            'extract_seconds': self.phase_seconds.get('extract'),
+            'transform_seconds': self.phase_seconds.get('transform'),
+            'load_seconds': self.phase_seconds.get('load'),
+            'feeds_polled': len(feeds),
+            'feeds_not_modified': sum(1 for s in statuses if s == 304),
+            'feeds_failed': sum(1 for s in statuses if s is None or s >= 400),
+            'articles_scraped': scraped,
+            'articles_skipped': summary.get('skipped', 0),
+            'articles_inserted': summary.get('inserted', 0),
+            'articles_duplicate': summary.get('duplicates', 0),
+            'articles_failed': summary.get('failed', 0),
+            'duplicate_rate': already_stored / scraped if scraped else None,
+            'throughput': summary.get('inserted', 0) / duration if duration > 0 else None,
+        }
+
+        PIPELINE_RUNS.inc(mode=self.mode, status=status)
+        RUN_SECONDS.observe(duration, mode=self.mode)
+        LAST_RUN_TIMESTAMP.set(time.time())
+        LAST_RUN_INSERTED.set(run['articles_inserted'])
+        LAST_RUN_DUPLICATE_RATE.set(run['duplicate_rate'] or 0.0)
+
+        run['id'] = db_manager.record_pipeline_run(run)
+        logger.info(
+            f"Run finished in {duration:.2f}s ({status}): {run['articles_inserted']} inserted of "
+            f"{scraped} scraped, duplicate rate {run['duplicate_rate'] or 0.0:.1%}."
+        )
+        return run
@@ -0,0 +1,212 @@
+#
+# src/etl/stages.py
+#
+# A small framework for running a pipeline as concurrent stages.
+# Each stage is a worker thread that reads from a bounded queue and writes
+# to the next one. Bounded queues give backpressure: a slow stage makes its
+# upstream block instead of buffering unbounded work in memory.
+#
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+from src.utils.logger import logger
+
+# Marks the end of the stream. Each stage forwards it after draining its input.
+_END = object()
+
+# How often blocked workers wake up to check whether the run was aborted.
+_POLL_INTERVAL = 0.1
+
+def _default_size(item: Any) -> int:
+    """ Counts the records in an item: its length if it has one, else 1. """
+    try:
+        return len(item)
+    except TypeError:
+        return 1
+
+class Stage:
+    """
+    One step of a staged pipeline.
+
+    `fn` takes one item and returns the item to pass downstream, or None to
+    drop it. `size` counts the records in an item for throughput reporting
+    (e.g. headlines in a batch).
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], size: Callable[[Any], int] = _default_size):
+        self.name = name
+        self.fn = fn
+        self.size = size
+        self.stats = StageStats(name)
+
+class StageStats:
+    """ Per-stage counters. Busy time excludes time spent waiting on queues. """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.records = 0
+        self.busy_seconds = 0.0
+        self.wait_input_seconds = 0.0
+        self.wait_output_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'stage': self.name,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'records': self.records,
+            'busy_seconds': self.busy_seconds,
+            'wait_input_seconds': self.wait_input_seconds,
+            'wait_output_seconds': self.wait_output_seconds,
+            'records_per_second': (self.records / self.busy_seconds) if self.busy_seconds else 0.0,
+        }
+
+class StagedPipeline:
+    """
+    Runs a source iterable through a chain of stages, one thread per stage,
+    connected by queues of at most `queue_size` items.
+
+    If any stage (or the source) raises, the run is aborted: every worker
+    stops at its next queue operation, the threads are joined, and the first
+    error is re-raised from `run()`.
+    """
+
+    def __init__(self, source: Iterable, stages: List[Stage], queue_size: int = 8,
+                 source_name: str = 'extract', source_size: Callable[[Any], int] = _default_size):
+        self.source = source
+        self.source_stats = StageStats(source_name)
+        self.source_size = source_size
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._abort = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+        self.wall_seconds = 0.0
+
+    # --- Queue helpers that respect aborts ---
+
+    def _put(self, q: queue.Queue, item: Any, stats: StageStats) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self._abort.is_set():
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.wait_output_seconds += time.perf_counter() - started
+
+    def _get(self, q: queue.Queue, stats: StageStats) -> Any:
+        started = time.perf_counter()
+        try:
+            while not self._abort.is_set():
+                try:
+                    return q.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _END
+        finally:
+            stats.wait_input_seconds += time.perf_counter() - started
+
+    def _fail(self, name: str, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+                logger.error(f"Stage '{name}' failed, stopping pipeline: {error}", exc_info=True)
+        self._abort.set()
+
+    # --- Workers ---
+
+    def _run_source(self):
+        stats = self.source_stats
+        out_q = self.queues[0] if self.queues else None
+        try:
+            iterator = iter(self.source)
+            while not self._abort.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy_seconds += time.perf_counter() - started
+                stats.items_out += 1
+                stats.records += self.source_size(item)
+                if out_q is not None and not self._put(out_q, item, stats):
+                    return
+            if out_q is not None:
+                self._put(out_q, _END, stats)
+        except BaseException as e:
+            self._fail(stats.name, e)
+
+    def _run_stage(self, index: int):
+        stage = self.stages[index]
+        stats = stage.stats
+        in_q = self.queues[index]
+        out_q = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        try:
+            while True:
+                item = self._get(in_q, stats)
+                if item is _END:
+                    break
+                stats.items_in += 1
+                started = time.perf_counter()
+                result = stage.fn(item)
+                stats.busy_seconds += time.perf_counter() - started
+                stats.records += stage.size(item)
+                if result is None:
+                    continue
+                stats.items_out += 1
+                if out_q is not None and not self._put(out_q, result, stats):
+                    return
+            if out_q is not None and not self._abort.is_set():
+                self._put(out_q, _END, stats)
+        except BaseException as e:
+            self._fail(stage.name, e)
+
+    def run(self) -> List[dict]:
+        """
+        Runs the pipeline to completion.
+
+        Returns:
+            List[dict]: Stats for the source and each stage, in order.
+
+        Raises:
+            The first exception raised by any stage.
+        """
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self._run_source, name=f"stage-{self.source_stats.name}", daemon=True)]
+        threads += [
+            threading.Thread(target=self._run_stage, args=(i,), name=f"stage-{stage.name}", daemon=True)
+            for i, stage in enumerate(self.stages)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.wall_seconds = time.perf_counter() - started
+
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def stats(self) -> List[dict]:
+        return [self.source_stats.as_dict()] + [stage.stats.as_dict() for stage in self.stages]
+
+def log_stage_stats(stats: List[dict], wall_seconds: float):
+    """ Logs one throughput line per stage plus the end-to-end rate. """
+    for s in stats:
+        logger.info(
+            f"Stage {s['stage']:<9} items={s['items_in'] or s['items_out']:<5} records={s['records']:<6} "
+            f"busy={s['busy_seconds']:.2f}s rate={s['records_per_second']:.1f}/s "
+            f"waiting(in={s['wait_input_seconds']:.2f}s, out={s['wait_output_seconds']:.2f}s)"
+        )
+    if stats and wall_seconds:
+        logger.info(f"Pipeline wall time {wall_seconds:.2f}s, {stats[0]['records'] / wall_seconds:.1f} records/s end to end.")
@@ -0,0 +1,176 @@
+#
+# src/etl/streaming.py
+#
+# Streaming mode for the ETL pipeline. Instead of scraping everything, then
+# scoring everything, then loading everything, each step runs as its own
+# stage and articles flow through in small batches:
+#
+#   extract -> probe -> tokenize -> infer -> load
+#
+# Network I/O, tokenization, model compute and SQLite writes overlap, and the
+# bounded queues between stages keep memory flat regardless of feed volume.
+#
+
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from src.database import db_manager
+from src.etl.run_history import RunRecorder
+from src.etl.stages import Stage, StagedPipeline, log_stage_stats
+from src.nlp import entities
+from src.nlp import near_duplicates
+from src.nlp import sentiment
+from src.scraper import feed_scraper
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+QUEUE_SIZE = settings.get('pipeline.queue_size', 8)
+
+def _extract_batches(sources: Optional[List[dict]], feed_state: dict, new_feed_state: dict,
+                     scraped_timestamp: datetime, batch_size: int) -> Iterator[List[dict]]:
+    """
+    Yields batches of unique, fingerprinted articles as feeds complete.
+    Fills `new_feed_state` with each feed's validators along the way.
+    """
+    seen_urls = set()
+    pending: List[dict] = []
+    for result in feed_scraper.iter_feed_results(sources, feed_state=feed_state):
+        new_feed_state[result['name']] = feed_scraper.feed_state_entry(result)
+        for article in result['articles']:
+            url = article.get('url')
+            headline = article.get('headline')
+            if not url or not headline or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            article['article_hash'] = db_manager.compute_article_hash(headline, url, scraped_timestamp)
+            pending.append(article)
+            if len(pending) >= batch_size:
+                yield pending
+                pending = []
+    if pending:
+        yield pending
+
+def run_streaming_pipeline(batch_size: Optional[int] = None, queue_size: Optional[int] = None,
+                           sources: Optional[List[dict]] = None) -> dict:
+    """
+    Runs one ETL pass with every phase running concurrently.
+
+    Args:
+        batch_size (int, optional): Articles per batch flowing between stages.
+                                    Defaults to `sentiment.batch_size`.
+        queue_size (int, optional): Batches each inter-stage queue can hold
+                                    before its producer blocks. Defaults to
+                                    `pipeline.queue_size`.
+        sources (List[dict], optional): Feeds to scrape. Defaults to every
+                                        feed under `scraper.sources`.
+
+    Returns:
+        dict: The same run summary as `pipeline.run_pipeline`, plus 'stages',
+              the per-stage throughput stats (see `stages.StageStats`).
+
+    Raises:
+        The first error raised by any stage, after all stages have stopped.
+    """
+    batch_size = max(1, int(batch_size or sentiment.DEFAULT_BATCH_SIZE))
+    queue_size = queue_size or QUEUE_SIZE
+
+    logger.info("=============================================")
+    logger.info("====== Starting Streaming ETL Pipeline Run ======")
+    logger.info("=============================================")
+
+    run = RunRecorder('streaming')
+    scraped_timestamp = datetime.now()
+    feed_state = db_manager.get_feed_states()
+    new_feed_state: dict = {}
+    totals = {'skipped': 0, 'failed': 0, 'inserted': 0, 'duplicates': 0}
+    # Articles that failed scoring or whose load was rolled back.
+    unloaded: List[dict] = []
+    dedup = near_duplicates.get_near_duplicate_index()
+
+    def probe(articles):
+        existing = db_manager.get_existing_hashes(a['article_hash'] for a in articles)
+        new_articles = [a for a in articles if a['article_hash'] not in existing]
+        totals['skipped'] += len(articles) - len(new_articles)
+        return new_articles or None
+
+    def tokenize(articles):
+        headlines = [a['headline'] for a in articles]
+        # Entity tagging is cheap and CPU-bound, so it rides along with tokenization.
+        for article, tags in zip(articles, entities.tag_headlines(headlines)):
+            article['entities'] = tags
+        # Near-duplicates of recently scored stories skip the model.
+        plan = dedup.plan_batch(headlines, [a['entities'] for a in articles]) if dedup is not None else None
+        if plan is not None:
+            headlines = [headlines[i] for i in near_duplicates.scoring_positions(plan)]
+        return articles, (plan, sentiment.prepare_batch(headlines, batch_size))
+
+    def infer(item):
+        articles, (plan, prepared) = item
+        results = sentiment.complete_batch(prepared)
+        if plan is not None:
+            results = near_duplicates.merge_results(plan, results)
+        return articles, (plan, results)
+
+    def load(item):
+        articles, (plan, results) = item
+        rows = []
+        failed = []
+        for article, finbert_result in zip(articles, results):
+            if not finbert_result:
+                totals['failed'] += 1
+                failed.append(article)
+                continue
+            rows.append({
+                'source': article['source'],
+                'headline': article['headline'],
+                'article_url': article['url'],
+                'finbert_result': finbert_result,
+                'scraped_timestamp': scraped_timestamp,
+                'published_timestamp': article.get('published_timestamp'),
+                'entities': article.get('entities')
+            })
+        stats = db_manager.insert_articles(rows)
+        totals['inserted'] += stats['inserted']
+        totals['duplicates'] += stats['duplicates']
+        loaded = stats['inserted'] + stats['duplicates'] == len(rows)
+        unloaded.extend(failed if loaded else articles)
+        if plan is not None and loaded:
+            dedup.remember([a['article_hash'] for a in articles], results, plan)
+        return None
+
+    # Items after 'tokenize' are (articles, payload) pairs; count the articles.
+    pair_size = lambda item: len(item[0])
+    staged = StagedPipeline(
+        _extract_batches(sources, feed_state, new_feed_state, scraped_timestamp, batch_size),
+        [
+            Stage('probe', probe),
+            Stage('tokenize', tokenize),
+            Stage('infer', infer, size=pair_size),
+            Stage('load', load, size=pair_size),
+        ],
+        queue_size=queue_size,
+    )
+    try:
+        stage_stats = staged.run()
+    except Exception:
+        run.finish(dict(totals, feeds=new_feed_state), scraped=staged.source_stats.records, status='error')
+        raise
+
+    # Only persist validators for feeds whose articles were all loaded.
+    db_manager.save_feed_states(feed_scraper.loaded_feed_states(new_feed_state, unloaded))
+
+    # Stages overlap, so phase times are each stage's busy time, not wall time.
+    busy = {s['stage']: s['busy_seconds'] for s in stage_stats}
+    run.add_phase('extract', busy.get('extract', 0.0))
+    run.add_phase('transform', busy.get('probe', 0.0) + busy.get('tokenize', 0.0) + busy.get('infer', 0.0))
+    run.add_phase('load', busy.get('load', 0.0))
+
+    log_stage_stats(stage_stats, staged.wall_seconds)
+    logger.info(
+        f"Loaded {totals['inserted']} articles ({totals['skipped']} already stored, "
+        f"{totals['duplicates']} duplicates ignored, {totals['failed']} failed scoring)."
+    )
+    run.finish(dict(totals, feeds=new_feed_state), scraped=staged.source_stats.records)
+    logger.info("====== Streaming ETL Pipeline Run Finished ======")
+    return dict(totals, feeds=new_feed_state, stages=stage_stats)
@@ -0,0 +1,417 @@
+#
+# src/etl/work_queue.py
+#
+# A durable, leased work queue between extraction and scoring, so scoring can
+# scale out to as many worker processes as needed (pipeline.mode: "queue").
+#
+# The pipeline extracts and fingerprints articles as usual, then enqueues
+# each new one as a row of `scoring_jobs` instead of scoring it. Workers
+# (`python main.py worker`) are stateless:
+#
+#   1. claim up to `queue.claim_size` jobs under a lease that expires after
+#      `queue.lease_seconds`;
+#   2. score them with `sentiment` (entities and near-duplicates included),
+#      renewing the lease from a heartbeat thread every
+#      `queue.heartbeat_seconds`;
+#   3. load the results with `db_manager.insert_articles` (or the writer
+#      service, if one is configured) and ack, which deletes the jobs.
+#
+# If a worker dies, its lease runs out and the next claim picks the jobs up
+# again. Delivery is at-least-once: a job can be scored twice if its lease
+# expires mid-batch, but rows are keyed on article_hash, so the second load
+# is a duplicate and changes nothing. A job claimed `queue.max_attempts`
+# times without being acked is considered dead and is no longer handed out.
+#
+# Claims are a single UPDATE ... RETURNING inside BEGIN IMMEDIATE, so two
+# workers can never lease the same row. RETURNING needs SQLite 3.35 or newer
+# (sqlite3.sqlite_version); workers check this when they start.
+#
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from src.database import db_manager
+from src.database import writer
+from src.nlp import entities
+from src.nlp import near_duplicates
+from src.nlp import sentiment
+from src.utils import metrics
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+CLAIM_SIZE = settings.get('queue.claim_size', 256)
+LEASE_SECONDS = settings.get('queue.lease_seconds', 120.0)
+HEARTBEAT_SECONDS = settings.get('queue.heartbeat_seconds', 30.0)
+MAX_ATTEMPTS = settings.get('queue.max_attempts', 5)
+IDLE_SECONDS = settings.get('queue.idle_seconds', 2.0)
+
+JOBS_ENQUEUED = metrics.counter('etl_queue_jobs_enqueued_total', "Articles added to the scoring queue.")
+JOBS_CLAIMED = metrics.counter('etl_queue_jobs_claimed_total', "Jobs leased by workers, first claims vs reclaims.", ['claim'])
+JOBS_ACKED = metrics.counter('etl_queue_jobs_acked_total', "Jobs scored, loaded and removed from the queue.")
+LEASES_LOST = metrics.counter('etl_queue_leases_lost_total', "Leases that expired before their worker renewed them.")
+
+# Oldest SQLite that supports UPDATE ... RETURNING.
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+JOB_COLUMNS = ('id', 'article_hash', 'source', 'headline', 'article_url', 'scraped_timestamp',
+               'published_timestamp', 'attempts')
+
+def default_worker_id() -> str:
+    """ Identifies this process in lease_owner: host and pid. """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class Lease:
+    """ A batch of jobs claimed by one worker until `expires_at` (unix time). """
+
+    def __init__(self, lease_id: str, owner: str, jobs: List[dict], expires_at: float):
+        self.lease_id = lease_id
+        self.owner = owner
+        self.jobs = jobs
+        self.expires_at = expires_at
+        # Set by the heartbeat when a renewal finds the lease gone.
+        self.lost = False
+
+# --- Queue operations ---
+
+def enqueue_articles(articles: List[dict], scraped_timestamp: datetime) -> dict:
+    """
+    Adds extracted articles to the queue. Each article needs 'headline',
+    'url', 'source' and 'article_hash' (computed with `scraped_timestamp`);
+    'published_timestamp' is optional. Articles already queued are ignored.
+
+    Returns:
+        dict: {'enqueued', 'duplicates'}. Both 0 if the write fails.
+    """
+    if not articles:
+        return {'enqueued': 0, 'duplicates': 0}
+    now = time.time()
+    params = [(a['article_hash'], a['source'], a['headline'], a['url'], scraped_timestamp,
+               a.get('published_timestamp'), now) for a in articles]
+    conn = None
+    try:
+        conn = db_manager._connect()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO scoring_jobs (article_hash, source, headline, article_url,
+                                                   scraped_timestamp, published_timestamp, enqueued_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+                """,
+                params
+            )
+            enqueued = conn.total_changes - before
+    except sqlite3.Error as e:
+        logger.error(f"Database error enqueueing {len(articles)} articles: {e}", exc_info=True)
+        return {'enqueued': 0, 'duplicates': 0}
+    finally:
+        db_manager._release(conn)
+    JOBS_ENQUEUED.inc(enqueued)
+    return {'enqueued': enqueued, 'duplicates': len(articles) - enqueued}
+
+def claim(worker_id: Optional[str] = None, limit: Optional[int] = None, lease_seconds: Optional[float] = None,
+          now: Optional[float] = None) -> Optional[Lease]:
+    """
+    Leases up to `limit` of the oldest claimable jobs: never leased, or whose
+    lease has expired, and claimed fewer than `queue.max_attempts` times.
+
+    Returns:
+        Lease: The claimed batch, or None if nothing is claimable (or the claim failed).
+    """
+    worker_id = worker_id or default_worker_id()
+    limit = limit or CLAIM_SIZE
+    now = time.time() if now is None else now
+    expires_at = now + (lease_seconds or LEASE_SECONDS)
+    lease_id = uuid.uuid4().hex
+
+    conn = None
+    try:
+        conn = db_manager._connect()
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            rows = conn.execute(
+                f"""
+                UPDATE scoring_jobs
+                SET lease_id = ?, lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM scoring_jobs
+                    WHERE (lease_expires_at IS NULL OR lease_expires_at <= ?) AND attempts < ?
+                    ORDER BY id LIMIT ?
+                )
+                RETURNING {', '.join(JOB_COLUMNS)};
+                """,
+                (lease_id, worker_id, expires_at, now, MAX_ATTEMPTS, limit)
+            ).fetchall()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    except sqlite3.Error as e:
+        logger.error(f"Database error claiming scoring jobs: {e}", exc_info=True)
+        return None
+    finally:
+        db_manager._release(conn)
+
+    if not rows:
+        return None
+    jobs = sorted((dict(zip(JOB_COLUMNS, row)) for row in rows), key=lambda job: job['id'])
+    for job in jobs:
+        job['scraped_timestamp'] = db_manager._parse_timestamp(job['scraped_timestamp'])
+        job['published_timestamp'] = db_manager._parse_timestamp(job['published_timestamp'])
+    reclaimed = sum(1 for job in jobs if job['attempts'] > 1)
+    JOBS_CLAIMED.inc(len(jobs) - reclaimed, claim='first')
+    if reclaimed:
+        JOBS_CLAIMED.inc(reclaimed, claim='reclaim')
+        logger.warning(f"Reclaimed {reclaimed} scoring jobs left unfinished by an earlier attempt.")
+    return Lease(lease_id, worker_id, jobs, expires_at)
+
+def renew(lease: Lease, lease_seconds: Optional[float] = None) -> bool:
+    """
+    Extends a lease. Returns False if the lease is gone (it expired and
+    another worker claimed its jobs, or they were acked) or the write failed.
+    """
+    expires_at = time.time() + (lease_seconds or LEASE_SECONDS)
+    conn = None
+    try:
+        conn = db_manager._connect()
+        with conn:
+            renewed = conn.execute(
+                "UPDATE scoring_jobs SET lease_expires_at = ? WHERE lease_id = ?;", (expires_at, lease.lease_id)
+            ).rowcount
+    except sqlite3.Error as e:
+        logger.error(f"Database error renewing lease {lease.lease_id}: {e}", exc_info=True)
+        return False
+    finally:
+        db_manager._release(conn)
+    if renewed:
+        lease.expires_at = expires_at
+    return renewed > 0
+
+def _finish(lease: Lease, job_ids: List[int], sql: str, action: str) -> int:
+    if not job_ids:
+        return 0
+    conn = None
+    try:
+        conn = db_manager._connect()
+        with conn:
+            return conn.execute(
+                sql.format(placeholders=', '.join('?' * len(job_ids))), [lease.lease_id, *job_ids]
+            ).rowcount
+    except sqlite3.Error as e:
+        logger.error(f"Database error trying to {action} {len(job_ids)} jobs: {e}", exc_info=True)
+        return 0
+    finally:
+        db_manager._release(conn)
+
+def ack(lease: Lease, job_ids: List[int]) -> int:
+    """
+    Removes finished jobs from the queue, if they are still under `lease`.
+    Returns how many were removed.
+    """
+    acked = _finish(lease, job_ids, "DELETE FROM scoring_jobs WHERE lease_id = ? AND id IN ({placeholders});", 'ack')
+    JOBS_ACKED.inc(acked)
+    return acked
+
+def release(lease: Lease, job_ids: List[int]) -> int:
+    """
+    Hands jobs back without finishing them, so the next claim can retry them
+    (their attempts count stays). Returns how many were released.
+    """
+    return _finish(lease, job_ids, "UPDATE scoring_jobs SET lease_id = NULL, lease_owner = NULL, "
+                                   "lease_expires_at = NULL WHERE lease_id = ? AND id IN ({placeholders});",
+                   'release')
+
+def queue_stats(now: Optional[float] = None) -> dict:
+    """
+    Counts jobs by state: 'pending' (claimable now), 'leased' (under a live
+    lease) and 'dead' (out of attempts), plus the age of the oldest job.
+    Empty if the read fails.
+    """
+    now = time.time() if now is None else now
+    conn = None
+    try:
+        conn = db_manager._connect()
+        row = conn.execute(
+            """
+            SELECT
+                COALESCE(SUM(attempts >= ? AND (lease_expires_at IS NULL OR lease_expires_at <= ?)), 0),
+                COALESCE(SUM(lease_expires_at > ?), 0),
+                COUNT(*),
+                MIN(enqueued_at)
+            FROM scoring_jobs;
+            """,
+            (MAX_ATTEMPTS, now, now)
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading queue stats: {e}", exc_info=True)
+        return {}
+    finally:
+        db_manager._release(conn)
+    dead, leased, total, oldest = row
+    return {
+        'pending': total - dead - leased,
+        'leased': leased,
+        'dead': dead,
+        'oldest_job_age_seconds': now - oldest if oldest is not None else None,
+    }
+
+# --- Workers ---
+
+class Heartbeat:
+    """ Renews a lease on a background thread every `interval` seconds until stopped. """
+
+    def __init__(self, lease: Lease, interval: float = HEARTBEAT_SECONDS):
+        self.lease = lease
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'Heartbeat':
+        self._thread = threading.Thread(target=self._run, name='queue-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not renew(self.lease):
+                self.lease.lost = True
+                LEASES_LOST.inc()
+                logger.warning(f"Lost lease {self.lease.lease_id} on {len(self.lease.jobs)} jobs; "
+                               f"another worker may score them too.")
+                return
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+def process_lease(lease: Lease, batch_size: Optional[int] = None) -> dict:
+    """
+    Scores and loads one claimed batch, then acks the jobs that were loaded
+    and releases the rest (failed scoring or a failed load) for a retry.
+
+    Returns:
+        dict: {'inserted', 'duplicates', 'failed', 'acked'}.
+    """
+    jobs = lease.jobs
+    headlines = [job['headline'] for job in jobs]
+    with Heartbeat(lease):
+        entity_tags = entities.tag_headlines(headlines)
+        dedup = near_duplicates.get_near_duplicate_index()
+        if dedup is not None:
+            plan = dedup.plan_batch(headlines, entity_tags)
+            positions = near_duplicates.scoring_positions(plan)
+            scored = sentiment.analyze_sentiment_batch([headlines[i] for i in positions], batch_size=batch_size)
+            results = near_duplicates.merge_results(plan, scored)
+        else:
+            results = sentiment.analyze_sentiment_batch(headlines, batch_size=batch_size)
+
+        rows, loaded, failed = [], [], []
+        for job, result, tags in zip(jobs, results, entity_tags):
+            if not result:
+                failed.append(job['id'])
+                continue
+            loaded.append(job['id'])
+            rows.append({
+                'source': job['source'],
+                'headline': job['headline'],
+                'article_url': job['article_url'],
+                'finbert_result': result,
+                'scraped_timestamp': job['scraped_timestamp'],
+                'published_timestamp': job['published_timestamp'],
+                'entities': tags
+            })
+        load_stats = db_manager.insert_articles(rows)
+        if rows and load_stats['inserted'] + load_stats['duplicates'] < len(rows):
+            # The load was rolled back: nothing may be acked.
+            logger.error(f"Loading {len(rows)} scored articles failed; releasing the batch for retry.")
+            failed, loaded = failed + loaded, []
+        elif dedup is not None:
+            dedup.remember([job['article_hash'] for job in jobs], results, plan)
+
+    acked = ack(lease, loaded)
+    if failed:
+        logger.warning(f"Released {len(failed)} queued articles that were not loaded, for retry.")
+        release(lease, failed)
+    return {'inserted': load_stats['inserted'], 'duplicates': load_stats['duplicates'],
+            'failed': len(failed), 'acked': acked}
+
+def check_sqlite_version():
+    """
+    Raises:
+        RuntimeError: Python's sqlite3 module is linked against a SQLite too
+                      old for `claim` (before MIN_SQLITE_VERSION).
+    """
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        required = '.'.join(str(part) for part in MIN_SQLITE_VERSION)
+        raise RuntimeError(f"Scoring workers need SQLite {required} or newer (UPDATE ... RETURNING); "
+                           f"Python's sqlite3 module uses SQLite {sqlite3.sqlite_version}.")
+
+def run_worker(stop_event: Optional[threading.Event] = None, worker_id: Optional[str] = None,
+               claim_size: Optional[int] = None, batch_size: Optional[int] = None, drain: bool = False) -> dict:
+    """
+    Claims, scores and acks batches until `stop_event` is set. Waits
+    `queue.idle_seconds` between polls of an empty queue, or returns as soon
+    as the queue is empty with `drain`.
+
+    Returns:
+        dict: Totals over the run: 'batches', 'inserted', 'duplicates', 'failed', 'acked'.
+
+    Raises:
+        RuntimeError: SQLite is too old (see `check_sqlite_version`).
+    """
+    check_sqlite_version()
+    stop_event = stop_event or threading.Event()
+    worker_id = worker_id or default_worker_id()
+    totals = {'batches': 0, 'inserted': 0, 'duplicates': 0, 'failed': 0, 'acked': 0}
+    while not stop_event.is_set():
+        lease = claim(worker_id, claim_size)
+        if lease is None:
+            if drain:
+                break
+            stop_event.wait(IDLE_SECONDS)
+            continue
+        stats = process_lease(lease, batch_size)
+        totals['batches'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+        logger.info(f"Worker {worker_id}: batch of {len(lease.jobs)} jobs, {stats['inserted']} inserted, "
+                    f"{stats['duplicates']} duplicates, {stats['failed']} failed.")
+    return totals
+
+def serve(stop_event: Optional[threading.Event] = None, claim_size: Optional[int] = None,
+          batch_size: Optional[int] = None, drain: bool = False) -> dict:
+    """
+    Runs a scoring worker until SIGTERM/SIGINT (or until `stop_event` is set,
+    or the queue is empty with `drain`). The current batch is finished first.
+    """
+    import signal
+
+    stop_event = stop_event or threading.Event()
+
+    def _request_stop(signum, frame):
+        logger.info(f"Received signal {signum}; finishing the current batch and stopping the worker.")
+        stop_event.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+
+    db_manager.create_database()
+    writer_client = writer.use_configured_writer()
+    try:
+        if not sentiment.warm_up():
+            logger.error("Model failed to load; worker not started.")
+            return {}
+        logger.info(f"Scoring worker {default_worker_id()} ready.")
+        return run_worker(stop_event, claim_size=claim_size, batch_size=batch_size, drain=drain)
+    finally:
+        if writer_client is not None:
+            writer_client.close()
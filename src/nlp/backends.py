@@ -0,0 +1,97 @@
+#
+# src/nlp/backends.py
+#
+# Pluggable model backends for sentiment inference.
+# A backend decides how FinBERT is loaded and run on CPU; `sentiment.py`
+# still owns tokenization, batching and caching. Each backend has its own
+# `version`, which is written to sentiment_model_version and used in the
+# sentiment cache key, so results from different backends never mix.
+#
+# Available backends (sentiment.backend in settings.yaml):
+#   fp32  - the original float32 model.
+#   int8  - dynamically int8-quantized Linear layers; smaller and usually
+#           faster on CPU, at the cost of a few label flips near the boundaries.
+#
+
+from typing import Dict, Optional, Tuple, Type
+
+from src.utils.logger import logger
+
+class ModelBackend:
+    """
+    Base class for backends. Subclasses override `_build_model` to change how
+    the model is prepared after loading.
+    """
+
+    name = 'base'
+    version = 'base'
+
+    def __init__(self, model_name: str, num_threads: Optional[int] = None):
+        self.model_name = model_name
+        # 0 or None keeps PyTorch's default (one thread per physical core).
+        self.num_threads = num_threads or None
+
+    def load(self) -> Tuple[object, object]:
+        """
+        Loads the tokenizer and model, applying the backend's thread setting.
+
+        Returns:
+            Tuple: (tokenizer, model), ready for inference.
+        """
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.eval()
+        return tokenizer, self._build_model(model)
+
+    def _build_model(self, model):
+        return model
+
+    def describe(self) -> str:
+        threads = self.num_threads or 'default'
+        return f"{self.name} backend ({self.version}, intra-op threads: {threads})"
+
+class Fp32Backend(ModelBackend):
+    """ The original float32 model, unchanged. """
+
+    name = 'fp32'
+    # Kept identical to the pre-backend version string so existing rows and
+    # cache entries stay valid.
+    version = 'finbert_v1_base'
+
+class Int8Backend(ModelBackend):
+    """ FinBERT with its Linear layers dynamically quantized to int8. """
+
+    name = 'int8'
+    version = 'finbert_v1_int8_dynamic'
+
+    def _build_model(self, model):
+        import torch
+
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+BACKENDS: Dict[str, Type[ModelBackend]] = {
+    Fp32Backend.name: Fp32Backend,
+    Int8Backend.name: Int8Backend,
+}
+
+DEFAULT_BACKEND = Fp32Backend.name
+
+def get_backend(name: Optional[str], model_name: str, num_threads: Optional[int] = None) -> ModelBackend:
+    """
+    Creates the backend registered under `name`. Nothing is loaded until
+    `load()` is called.
+
+    An unknown name is logged and falls back to the fp32 backend rather than
+    stopping the pipeline.
+    """
+    backend_class = BACKENDS.get((name or DEFAULT_BACKEND).lower())
+    if backend_class is None:
+        logger.error(f"Unknown sentiment backend '{name}'. Available: {', '.join(BACKENDS)}. Using '{DEFAULT_BACKEND}'.")
+        backend_class = BACKENDS[DEFAULT_BACKEND]
+    return backend_class(model_name, num_threads=num_threads)
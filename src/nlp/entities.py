@@ -0,0 +1,231 @@
+#
+# src/nlp/entities.py
+#
+# Tags headlines with the companies they mention, using a dictionary of
+# ticker symbols and company aliases (config/tickers.csv by default).
+#
+# All patterns are compiled into one Aho-Corasick automaton, so tagging a
+# headline is a single pass over its characters no matter how many tens of
+# thousands of entries the dictionary holds. Matches are then filtered to
+# whole words and resolved leftmost-longest ("Bank of America" wins over
+# "America").
+#
+# Company names and aliases match case-insensitively. Ticker symbols are
+# ambiguous with ordinary words ("ALL", "ON"), so they only match as
+# cashtags ("$AAPL") or, when at least `entities.min_symbol_length`
+# characters long, as an exact upper-case word.
+#
+
+import csv
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+ENTITIES_ENABLED = settings.get('entities.enabled', True)
+DICTIONARY_PATH = settings.get('entities.dictionary', 'config/tickers.csv')
+MIN_SYMBOL_LENGTH = settings.get('entities.min_symbol_length', 3)
+
+# Pattern kinds: how a raw automaton hit is validated.
+_ALIAS, _SYMBOL, _CASHTAG = 0, 1, 2
+
+class AhoCorasick:
+    """
+    A multi-pattern string matcher. Built once from all patterns; `iter`
+    then reports every occurrence of every pattern in one pass over a text.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # Node 0 is the root. For each node: outgoing edges, failure link,
+        # and the indices of the patterns that end there.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self.lengths: List[int] = []
+
+        for index, pattern in enumerate(patterns):
+            self.lengths.append(len(pattern))
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(index)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Patterns ending at the failure target also end here.
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter(self, text: str) -> Iterable[Tuple[int, int]]:
+        """ Yields (end_position_exclusive, pattern_index) for every match in `text`. """
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                yield position + 1, index
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+class EntityTagger:
+    """ Finds dictionary entities in headlines. """
+
+    def __init__(self, entries: Iterable[dict], min_symbol_length: int = MIN_SYMBOL_LENGTH):
+        """
+        Args:
+            entries (Iterable[dict]): {'symbol', 'name', 'aliases'} per company;
+                                      'aliases' is a list of extra names.
+            min_symbol_length (int): Shortest bare symbol matched without a '$'.
+        """
+        self.entities: List[dict] = []
+        # Parallel to the automaton's patterns: (entity index, kind).
+        self._patterns: List[Tuple[int, int]] = []
+        texts: List[str] = []
+        seen = set()
+
+        def add(text: str, entity: int, kind: int):
+            key = (text, entity, kind)
+            if text and key not in seen:
+                seen.add(key)
+                texts.append(text)
+                self._patterns.append((entity, kind))
+
+        for entry in entries:
+            symbol = (entry.get('symbol') or '').strip().upper()
+            name = (entry.get('name') or '').strip()
+            if not symbol:
+                continue
+            entity = len(self.entities)
+            self.entities.append({'symbol': symbol, 'name': name or symbol})
+            for alias in [name] + list(entry.get('aliases') or []):
+                add(alias.strip().casefold(), entity, _ALIAS)
+            add('$' + symbol.casefold(), entity, _CASHTAG)
+            if len(symbol) >= min_symbol_length:
+                add(symbol.casefold(), entity, _SYMBOL)
+
+        self.automaton = AhoCorasick(texts)
+
+    def tag(self, headline: str) -> List[dict]:
+        """
+        Returns the entities mentioned in `headline`, in order of appearance,
+        each at most once.
+
+        Returns:
+            List[dict]: {'symbol', 'name', 'matched', 'start', 'end'} per entity.
+        """
+        if not headline:
+            return []
+        folded = headline.casefold()
+        if len(folded) != len(headline):
+            # A few characters (e.g. 'ß') expand when casefolded; leave those
+            # as they are so positions still line up with the headline.
+            folded = ''.join(c if len(c.casefold()) != 1 else c.casefold() for c in headline)
+
+        candidates = []
+        for end, index in self.automaton.iter(folded):
+            start = end - self.automaton.lengths[index]
+            entity, kind = self._patterns[index]
+            # Whole words only: "Meta" must not match inside "Metal".
+            if start > 0 and _is_word_char(headline[start - 1]):
+                continue
+            if end < len(headline) and _is_word_char(headline[end]):
+                continue
+            if kind == _SYMBOL and headline[start:end] != self.entities[entity]['symbol']:
+                continue
+            candidates.append((start, end, entity))
+
+        # Leftmost-longest, non-overlapping.
+        candidates.sort(key=lambda c: (c[0], -(c[1] - c[0])))
+        matches, taken_until, seen_entities = [], 0, set()
+        for start, end, entity in candidates:
+            if start < taken_until:
+                continue
+            taken_until = end
+            if entity in seen_entities:
+                continue
+            seen_entities.add(entity)
+            matches.append({
+                'symbol': self.entities[entity]['symbol'],
+                'name': self.entities[entity]['name'],
+                'matched': headline[start:end],
+                'start': start,
+                'end': end,
+            })
+        return matches
+
+def load_dictionary(path: str) -> List[dict]:
+    """
+    Reads a symbol dictionary CSV with columns 'symbol', 'name' and an
+    optional 'aliases' (separated by '|').
+
+    Returns:
+        List[dict]: {'symbol', 'name', 'aliases'} per row. Empty if the file
+                    cannot be read.
+    """
+    entries = []
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                aliases = [a for a in (row.get('aliases') or '').split('|') if a.strip()]
+                entries.append({'symbol': row.get('symbol'), 'name': row.get('name'), 'aliases': aliases})
+    except (OSError, csv.Error) as e:
+        logger.error(f"Could not read entity dictionary {path}: {e}")
+    return entries
+
+# --- Singleton accessor, mirroring the sentiment cache ---
+_tagger: Optional[EntityTagger] = None
+_tagger_loaded = False
+
+def get_entity_tagger() -> Optional[EntityTagger]:
+    """
+    Returns the process-wide tagger, building it from `entities.dictionary`
+    on first use. Returns None when tagging is disabled or the dictionary is
+    missing or empty.
+    """
+    global _tagger, _tagger_loaded
+    if not ENTITIES_ENABLED:
+        return None
+    if not _tagger_loaded:
+        _tagger_loaded = True
+        if not os.path.exists(DICTIONARY_PATH):
+            logger.warning(f"Entity dictionary not found at {DICTIONARY_PATH}; entity tagging disabled.")
+            return None
+        entries = load_dictionary(DICTIONARY_PATH)
+        if entries:
+            _tagger = EntityTagger(entries)
+            logger.info(f"Entity tagger ready: {len(_tagger.entities)} entities, {len(_tagger.automaton)} automaton states.")
+    return _tagger
+
+def tag_headlines(headlines: List[str]) -> List[Optional[List[dict]]]:
+    """
+    Tags each headline. Returns None per headline when tagging is disabled,
+    so callers can store NULL rather than an empty list.
+    """
+    tagger = get_entity_tagger()
+    if tagger is None:
+        return [None] * len(headlines)
+    return [tagger.tag(headline) for headline in headlines]
@@ -0,0 +1,172 @@
+#
+# src/nlp/lexicon.py
+#
+# The cheap first tier of cascaded sentiment scoring: a financial word list
+# (config/lexicon.csv by default) scored as a linear model. Each term has a
+# signed weight; a headline's score is the sum of the weights it matches.
+#
+# Terms are single words, multi-word phrases ("cuts guidance") or prefixes
+# ending in '*' ("plung*" matches plunge, plunges, plunged). Phrases win over
+# the words inside them, and a negator just before a term ("fails to beat")
+# flips its sign.
+#
+# The lexicon only ever says Positive or Negative, with a confidence that
+# grows with the net weight and shrinks when both directions are present.
+# When `sentiment.cascade.enabled` is set, headlines at or above
+# `sentiment.cascade.threshold` keep the lexicon's answer and everything
+# else goes to FinBERT. Pick the threshold with `python main.py cascade`.
+#
+
+import csv
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+CASCADE_ENABLED = settings.get('sentiment.cascade.enabled', False)
+CASCADE_THRESHOLD = settings.get('sentiment.cascade.threshold', 0.75)
+LEXICON_PATH = settings.get('sentiment.cascade.lexicon', 'config/lexicon.csv')
+
+# Stored as sentiment_model_version for rows the lexicon decided. Bump it
+# whenever the word list or the scoring changes.
+VERSION = "lexicon_v1"
+
+# A negator this many tokens or fewer before a term flips the term's sign.
+NEGATION_WINDOW = 3
+NEGATORS = frozenset({'not', 'no', 'never', 'without', 'fail', 'fails', 'failed', 'unable'})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'.][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    """ Lower-cases `text` and splits it into words, keeping hyphenated words ("all-time") whole. """
+    return _TOKEN_RE.findall(text.lower())
+
+class Lexicon:
+    """
+    Scores headlines against a weighted word list. Built once; `score` is a
+    single pass over the headline's tokens.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, float]]):
+        self.phrases: Dict[Tuple[str, ...], float] = {}
+        self.prefixes: Dict[str, float] = {}
+        for term, weight in entries:
+            if term.endswith('*'):
+                self.prefixes[term[:-1].lower()] = weight
+            else:
+                tokens = tuple(tokenize(term))
+                if tokens:
+                    self.phrases[tokens] = weight
+        self.max_phrase_length = max((len(p) for p in self.phrases), default=1)
+        self.prefix_lengths = sorted({len(p) for p in self.prefixes}, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.phrases) + len(self.prefixes)
+
+    def _match(self, tokens: List[str], start: int) -> Tuple[int, float]:
+        """ Returns (tokens consumed, weight) for the longest term starting at `start`; (1, 0.0) if none. """
+        for length in range(min(self.max_phrase_length, len(tokens) - start), 0, -1):
+            weight = self.phrases.get(tuple(tokens[start:start + length]))
+            if weight is not None:
+                return length, weight
+        token = tokens[start]
+        for length in self.prefix_lengths:
+            weight = self.prefixes.get(token[:length]) if len(token) >= length else None
+            if weight is not None:
+                return 1, weight
+        return 1, 0.0
+
+    def score(self, headline: str) -> dict:
+        """
+        Scores one headline.
+
+        Returns:
+            dict: {'label', 'score', 'model_version'}. 'score' is the lexicon's
+                  confidence in [0, 1); a headline with no net evidence is
+                  'Neutral' with score 0.0.
+        """
+        tokens = tokenize(headline)
+        positive = negative = 0.0
+        last_negator = -NEGATION_WINDOW - 1
+        i = 0
+        while i < len(tokens):
+            if tokens[i] in NEGATORS:
+                last_negator = i
+                i += 1
+                continue
+            consumed, weight = self._match(tokens, i)
+            if weight and i - last_negator <= NEGATION_WINDOW:
+                weight = -weight
+            if weight > 0:
+                positive += weight
+            elif weight < 0:
+                negative -= weight
+            i += consumed
+
+        margin = abs(positive - negative)
+        if margin == 0:
+            return {'label': 'Neutral', 'score': 0.0, 'model_version': VERSION}
+        confidence = margin / (margin + 1 + min(positive, negative))
+        label = 'Positive' if positive > negative else 'Negative'
+        return {'label': label, 'score': confidence, 'model_version': VERSION}
+
+def load_lexicon(path: str) -> List[Tuple[str, float]]:
+    """
+    Reads a CSV with columns term,weight. Rows with a missing term or a
+    weight that isn't a number are skipped.
+    """
+    entries = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            term = (row.get('term') or '').strip()
+            try:
+                weight = float(row.get('weight') or '')
+            except ValueError:
+                continue
+            if term and weight:
+                entries.append((term, weight))
+    return entries
+
+_lexicon: Optional[Lexicon] = None
+_lexicon_loaded = False
+
+def get_lexicon() -> Optional[Lexicon]:
+    """
+    Returns the process-wide lexicon, loading `sentiment.cascade.lexicon` on
+    first use. Returns None if the file is missing or empty.
+    """
+    global _lexicon, _lexicon_loaded
+    if not _lexicon_loaded:
+        _lexicon_loaded = True
+        if not os.path.exists(LEXICON_PATH):
+            logger.warning(f"Sentiment lexicon not found at {LEXICON_PATH}; cascaded scoring disabled.")
+            return None
+        entries = load_lexicon(LEXICON_PATH)
+        if entries:
+            _lexicon = Lexicon(entries)
+            logger.info(f"Sentiment lexicon ready: {len(_lexicon)} terms.")
+    return _lexicon
+
+def is_confident(result: dict, threshold: float) -> bool:
+    """ Whether a lexicon result is good enough to skip the model at `threshold`. """
+    return result['label'] != 'Neutral' and result['score'] >= threshold
+
+def first_tier(headlines: List[str], threshold: Optional[float] = None) -> List[Optional[dict]]:
+    """
+    Runs the lexicon tier of the cascade. Returns the lexicon's result for
+    each headline it is confident about (score >= `threshold`, default
+    `sentiment.cascade.threshold`) and None for the rest, which need the
+    model. All None when the cascade is disabled.
+    """
+    lexicon = get_lexicon() if CASCADE_ENABLED else None
+    if lexicon is None:
+        return [None] * len(headlines)
+    threshold = CASCADE_THRESHOLD if threshold is None else threshold
+    results = []
+    for headline in headlines:
+        result = lexicon.score(headline)
+        results.append(result if is_confident(result, threshold) else None)
+    return results
@@ -0,0 +1,303 @@
+#
+# src/nlp/near_duplicates.py
+#
+# Near-duplicate detection for syndicated headlines. Wire stories come back
+# with small edits ("UPDATE 2-" prefixes, punctuation, a rewritten tail),
+# which the exact article hash treats as new articles. This module keeps a
+# MinHash-LSH index of recently scored headlines so those variants can
+# inherit the canonical article's sentiment instead of going through FinBERT.
+#
+#   - Each headline becomes a set of word 1- and 2-gram shingles, after
+#     stripping common wire boilerplate; its MinHash signature estimates the
+#     Jaccard similarity between two such sets.
+#   - Signatures are split into LSH bands, so a lookup only compares against
+#     headlines that share at least one band, not the whole window.
+#   - Short templated headlines about different companies ("Ford raises
+#     guidance" / "Oracle raises guidance") share most shingles, so a match
+#     also needs the same anchors: the tagged ticker symbols and the numbers
+#     in the headline.
+#   - Only canonical (actually scored) headlines are indexed, so chains of
+#     small edits can't drift away from the original.
+#   - The index is persisted in the database and only covers the last
+#     `near_duplicates.window_hours`.
+#
+# Inherited results are tagged with model version "<version>+neardup", and
+# each duplicate is linked to its canonical article in near_duplicate_links.
+#
+
+import hashlib
+import re
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.database import db_manager
+from src.nlp import entities
+from src.nlp.sentiment_cache import normalize_headline
+from src.utils import metrics
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+NEAR_DUPLICATES_ENABLED = settings.get('near_duplicates.enabled', True)
+THRESHOLD = settings.get('near_duplicates.threshold', 0.6)
+NUM_PERM = settings.get('near_duplicates.num_perm', 64)
+BANDS = settings.get('near_duplicates.bands', 16)
+WINDOW_HOURS = settings.get('near_duplicates.window_hours', 72.0)
+
+# Appended to the canonical result's model version on inherited results.
+VERSION_SUFFIX = '+neardup'
+
+NEAR_DUPLICATES_FOUND = metrics.counter(
+    'etl_near_duplicates_total', "Headlines that inherited sentiment from a near-duplicate, by where it was found.",
+    ['found_in']
+)
+
+# Wire boilerplate that says nothing about the story itself.
+_PREFIX_RE = re.compile(r"^\s*(?:(?:update|refile|rpt|corrected|brief|exclusive|wrapup|breakingviews)\s*\d*\s*[-:]\s*)+",
+                        re.IGNORECASE)
+_SUFFIX_RE = re.compile(r"\s+[-|]\s+[A-Za-z][\w .&]{1,40}$")
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _strip_boilerplate(headline: str) -> str:
+    return _SUFFIX_RE.sub('', _PREFIX_RE.sub('', headline))
+
+def shingles(headline: str) -> set:
+    """ Word 1- and 2-grams of a headline, ignoring case, punctuation and wire boilerplate. """
+    words = _NON_WORD_RE.sub('', normalize_headline(_strip_boilerplate(headline))).split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+def anchors(headline: str, tags: Optional[List[dict]] = None) -> str:
+    """
+    The facts two headlines must share to be near-duplicates: the ticker
+    symbols in `tags` (from the entity tagger) and the numbers in the
+    headline, as one canonical string.
+    """
+    numbers = {n.replace(',', '') for n in _NUMBER_RE.findall(_strip_boilerplate(headline))}
+    symbols = {tag['symbol'] for tag in tags or ()}
+    return ' '.join(sorted(symbols) + sorted(numbers))
+
+class MinHasher:
+    """ Computes MinHash signatures with `num_perm` seeded universal hash functions. """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        self.num_perm = num_perm
+        self._params = []
+        for n in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{n}".encode(), digest_size=16).digest()
+            a, b = struct.unpack('<QQ', digest)
+            self._params.append(((a % (_MERSENNE_PRIME - 1)) + 1, b % _MERSENNE_PRIME))
+
+    def signature(self, items: set) -> Tuple[int, ...]:
+        if not items:
+            return tuple([_MAX_HASH] * self.num_perm)
+        values = [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), 'little') for item in items]
+        return tuple(
+            min(((a * v + b) % _MERSENNE_PRIME) & _MAX_HASH for v in values)
+            for a, b in self._params
+        )
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """ Estimated Jaccard similarity: the share of signature positions that agree. """
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first) if first else 0.0
+
+def pack_signature(signature: Sequence[int]) -> bytes:
+    return struct.pack(f'<{len(signature)}I', *signature)
+
+def unpack_signature(blob: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f'<{len(blob) // 4}I', blob)
+
+class NearDuplicateIndex:
+    """
+    An in-memory MinHash-LSH index over canonical headlines, mirrored to the
+    near_duplicate_index table.
+    """
+
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                 window_hours: float = WINDOW_HOURS, persist: bool = True):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.window_seconds = window_hours * 3600
+        self.persist = persist
+        self.hasher = MinHasher(num_perm)
+        # article_hash -> (signature, anchors, result, seen_at)
+        self.entries: Dict[str, tuple] = {}
+        self._buckets: Dict[tuple, List[str]] = {}
+        # In streaming mode lookups and inserts happen on different stage threads.
+        self._lock = threading.Lock()
+        self._next_prune = time.time() + 3600
+
+    def _band_keys(self, signature: Sequence[int]):
+        for band in range(self.bands):
+            yield (band,) + tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def signature(self, headline: str) -> Tuple[int, ...]:
+        return self.hasher.signature(shingles(headline))
+
+    def load(self) -> int:
+        """ Loads the persisted entries inside the time window. Returns how many were loaded. """
+        cutoff = time.time() - self.window_seconds
+        db_manager.prune_near_duplicate_entries(cutoff)
+        for article_hash, blob, anchor, label, score, model_version, seen_at in \
+                db_manager.load_near_duplicate_entries(cutoff):
+            result = {'label': label, 'score': score, 'model_version': model_version}
+            self._insert(article_hash, unpack_signature(blob), anchor, result, seen_at)
+        return len(self.entries)
+
+    def _insert(self, article_hash: str, signature: Tuple[int, ...], anchor: str, result: dict, seen_at: float):
+        with self._lock:
+            if article_hash in self.entries:
+                return
+            self.entries[article_hash] = (signature, anchor, result, seen_at)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(article_hash)
+
+    def _prune_expired(self, now: float):
+        """ Drops entries that left the window, so a long-running process doesn't grow forever. """
+        cutoff = now - self.window_seconds
+        with self._lock:
+            live = {h: entry for h, entry in self.entries.items() if entry[3] >= cutoff}
+            if len(live) == len(self.entries):
+                return
+            self.entries = live
+            self._buckets = {}
+            for article_hash, (signature, *_) in live.items():
+                for key in self._band_keys(signature):
+                    self._buckets.setdefault(key, []).append(article_hash)
+
+    def query(self, signature: Sequence[int], anchor: str) -> Optional[Tuple[str, float, dict]]:
+        """
+        Finds the most similar indexed headline with the same anchors, at or
+        above the threshold.
+
+        Returns:
+            Tuple[str, float, dict]: (canonical article hash, similarity, its
+                sentiment result), or None. The result is read under the same
+                lock as the match, so a concurrent prune can't remove it in between.
+        """
+        cutoff = time.time() - self.window_seconds
+        best, best_similarity, best_result = None, self.threshold, None
+        seen = set()
+        with self._lock:
+            for key in self._band_keys(signature):
+                for article_hash in self._buckets.get(key, ()):
+                    if article_hash in seen:
+                        continue
+                    seen.add(article_hash)
+                    candidate_signature, candidate_anchor, result, seen_at = self.entries[article_hash]
+                    if seen_at < cutoff or candidate_anchor != anchor:
+                        continue
+                    score = similarity(signature, candidate_signature)
+                    if score >= best_similarity:
+                        best, best_similarity, best_result = article_hash, score, result
+        return (best, best_similarity, best_result) if best is not None else None
+
+    def plan_batch(self, headlines: List[str], entity_tags: Optional[List[Optional[List[dict]]]] = None) -> List[dict]:
+        """
+        Decides, before inference, which headlines need scoring.
+
+        Each headline is matched against the index and then against earlier
+        headlines of the same batch that will be scored.
+
+        Args:
+            headlines (List[str]): The batch.
+            entity_tags (list, optional): `entities.tag_headlines(headlines)`, if
+                                          the caller already has it.
+
+        Returns:
+            List[dict]: One plan per headline with 'signature', 'anchors' and 'similarity'
+                (None if the headline must be scored). A near-duplicate also has
+                either 'canonical_hash' and 'result' (found in the index) or
+                'canonical_position' (an earlier headline in this batch).
+        """
+        plan: List[dict] = []
+        batch = NearDuplicateIndex(self.threshold, self.hasher.num_perm, self.bands, persist=False)
+        batch.hasher = self.hasher
+        if entity_tags is None:
+            entity_tags = entities.tag_headlines(headlines)
+        for position, (headline, tags) in enumerate(zip(headlines, entity_tags)):
+            signature, anchor = self.signature(headline), anchors(headline, tags)
+            entry = {'signature': signature, 'anchors': anchor, 'similarity': None}
+            found = self.query(signature, anchor)
+            if found:
+                entry.update(canonical_hash=found[0], similarity=found[1], result=found[2])
+                NEAR_DUPLICATES_FOUND.inc(found_in='index')
+            else:
+                found = batch.query(signature, anchor)
+                if found:
+                    entry.update(canonical_position=int(found[0]), similarity=found[1])
+                    NEAR_DUPLICATES_FOUND.inc(found_in='batch')
+                else:
+                    batch._insert(str(position), signature, anchor, {}, time.time())
+            plan.append(entry)
+        return plan
+
+    def remember(self, article_hashes: List[str], results: List[dict], plan: List[dict]):
+        """
+        Records a loaded batch: scored headlines join the index and
+        near-duplicates are linked to their canonical article. Call once the
+        rows are stored; headlines that failed scoring are skipped.
+        """
+        now = time.time()
+        entries, links = [], []
+        for article_hash, result, entry in zip(article_hashes, results, plan):
+            if not result:
+                continue
+            if entry['similarity'] is None:
+                self._insert(article_hash, entry['signature'], entry['anchors'], result, now)
+                entries.append((article_hash, pack_signature(entry['signature']), entry['anchors'],
+                                result.get('label'), result.get('score'), result.get('model_version'), now))
+            else:
+                canonical_hash = entry.get('canonical_hash') or article_hashes[entry['canonical_position']]
+                links.append((article_hash, canonical_hash, entry['similarity'], now))
+        if self.persist and (entries or links):
+            db_manager.save_near_duplicates(entries, links)
+        if now >= self._next_prune:
+            self._next_prune = now + 3600
+            self._prune_expired(now)
+
+def scoring_positions(plan: List[dict]) -> List[int]:
+    """ Positions in a planned batch that still need the model. """
+    return [i for i, entry in enumerate(plan) if entry['similarity'] is None]
+
+def merge_results(plan: List[dict], scored: List[dict]) -> List[dict]:
+    """
+    Combines model results for the `scoring_positions` of a plan with the
+    results near-duplicates inherit, in batch order.
+    """
+    results: List[dict] = [{} for _ in plan]
+    for position, result in zip(scoring_positions(plan), scored):
+        results[position] = result
+    for position, entry in enumerate(plan):
+        if entry['similarity'] is None:
+            continue
+        canonical = entry['result'] if 'result' in entry else results[entry['canonical_position']]
+        if canonical:
+            version = (canonical.get('model_version') or '').replace(VERSION_SUFFIX, '')
+            results[position] = {'label': canonical['label'], 'score': canonical['score'],
+                                 'model_version': version + VERSION_SUFFIX}
+    return results
+
+# --- Singleton accessor, mirroring the sentiment cache ---
+_index: Optional[NearDuplicateIndex] = None
+
+def get_near_duplicate_index() -> Optional[NearDuplicateIndex]:
+    """
+    Returns the process-wide index, loading the persisted window on first use.
+    Returns None when `near_duplicates.enabled` is false.
+    """
+    global _index
+    if not NEAR_DUPLICATES_ENABLED:
+        return None
+    if _index is None:
+        _index = NearDuplicateIndex()
+        logger.info(f"Near-duplicate index loaded {_index.load()} headlines from the last {WINDOW_HOURS:g}h.")
+    return _index
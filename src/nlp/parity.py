@@ -0,0 +1,200 @@
+#
+# src/nlp/parity.py
+#
+# Parity check for sentiment backends. Scores a fixed corpus with every
+# backend and reports, for each one, how often its labels agree with the
+# reference backend (the first one listed, normally fp32) and how many
+# headlines per second it sustains. Run with `python main.py parity`.
+#
+# Also the cascade report (`python main.py cascade`): for each candidate
+# `sentiment.cascade.threshold`, how many headlines the lexicon would decide,
+# how often the cascade's labels agree with FinBERT alone, and how much
+# faster it is.
+#
+
+import time
+from typing import List, Optional, Sequence
+
+from src.nlp import lexicon, sentiment
+from src.utils.logger import logger
+
+# A fixed, mixed-sentiment corpus so results are comparable between runs.
+PARITY_CORPUS = [
+    "Apple beats quarterly earnings estimates on strong iPhone sales",
+    "Tesla shares plunge after deliveries miss expectations",
+    "Federal Reserve holds interest rates steady",
+    "Amazon announces layoffs of 10,000 corporate employees",
+    "Microsoft raises full-year revenue guidance",
+    "Oil prices slip as OPEC output rises",
+    "Nvidia stock hits record high on AI chip demand",
+    "Retailer files for Chapter 11 bankruptcy protection",
+    "Bank of America reports flat net interest income",
+    "Pfizer wins FDA approval for new RSV vaccine",
+    "Boeing faces new probe over 737 MAX safety lapses",
+    "Gold edges higher as dollar weakens",
+    "Netflix subscriber growth surpasses forecasts",
+    "Intel cuts dividend amid falling PC demand",
+    "Walmart maintains annual outlook",
+    "Credit Suisse shares tumble to all-time low",
+    "Alphabet announces $70 billion share buyback",
+    "Home sales fall for the sixth straight month",
+    "JPMorgan profit jumps 25% on higher rates",
+    "Meta shares drop as ad revenue growth slows",
+    "Coca-Cola to report earnings next Tuesday",
+    "Ford recalls 500,000 vehicles over brake defect",
+    "Costco same-store sales rise 7% in October",
+    "Disney names new chief financial officer",
+    "Natural gas futures steady ahead of storage report",
+    "Shopify swings to a loss as costs balloon",
+    "Visa and Mastercard settle merchant fee lawsuit",
+    "Unemployment rate unchanged at 3.7%",
+    "Starbucks upgrades outlook after record holiday quarter",
+    "Chinese property developer defaults on offshore bonds",
+    "AMD unveils new data center processors",
+    "Goldman Sachs downgrades outlook for European stocks",
+]
+
+def _best_seconds(fn, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def score_with_backend(name: str, corpus: Sequence[str], num_threads: Optional[int] = None,
+                       batch_size: Optional[int] = None, repeats: int = 3) -> dict:
+    """
+    Loads one backend and scores `corpus` with it, bypassing the sentiment cache.
+
+    The first pass warms the model up and is not timed; throughput is the
+    best of `repeats` timed passes.
+
+    Returns:
+        dict: {'backend', 'version', 'threads', 'labels', 'scores', 'headlines_per_second'}.
+    """
+    sentiment.set_backend(name, num_threads=num_threads)
+    if not sentiment.warm_up():
+        raise RuntimeError(f"Backend '{name}' failed to load.")
+
+    results = sentiment._infer_batch(list(corpus), batch_size)
+    best = _best_seconds(lambda: sentiment._infer_batch(list(corpus), batch_size), repeats)
+
+    return {
+        'backend': name,
+        'version': sentiment.MODEL_VERSION,
+        'threads': num_threads or 'default',
+        'labels': [r.get('label') for r in results],
+        'scores': [r.get('score') for r in results],
+        'headlines_per_second': len(corpus) / best if best > 0 else 0.0,
+    }
+
+def compare_to_reference(reference: dict, candidate: dict) -> dict:
+    """
+    Compares a backend's output to the reference backend's.
+
+    Returns:
+        dict: {'agreement' (fraction of matching labels), 'mean_abs_score_diff'}.
+    """
+    pairs = list(zip(reference['labels'], candidate['labels']))
+    agreement = sum(1 for a, b in pairs if a == b) / len(pairs) if pairs else 0.0
+    diffs = [abs(a - b) for a, b in zip(reference['scores'], candidate['scores']) if a is not None and b is not None]
+    return {
+        'agreement': agreement,
+        'mean_abs_score_diff': sum(diffs) / len(diffs) if diffs else 0.0,
+    }
+
+def run_parity_check(backend_names: Sequence[str] = ('fp32', 'int8'), corpus: Sequence[str] = PARITY_CORPUS,
+                     num_threads: Optional[int] = None, batch_size: Optional[int] = None,
+                     repeats: int = 3) -> List[dict]:
+    """
+    Scores `corpus` with every backend in `backend_names`. The first backend
+    is the reference that the others are compared against. The configured
+    backend is restored afterwards.
+
+    Returns:
+        List[dict]: One report per backend with 'backend', 'version', 'threads',
+                    'headlines_per_second', 'agreement' and 'mean_abs_score_diff'.
+    """
+    original_backend = sentiment.backend
+    reports = []
+    try:
+        runs = [score_with_backend(name, corpus, num_threads, batch_size, repeats) for name in backend_names]
+    finally:
+        sentiment.set_backend(original_backend.name, num_threads=original_backend.num_threads)
+
+    reference = runs[0]
+    for run in runs:
+        report = {key: run[key] for key in ('backend', 'version', 'threads', 'headlines_per_second')}
+        report.update(compare_to_reference(reference, run))
+        reports.append(report)
+        logger.info(
+            f"Parity {report['backend']:<5} ({report['version']}): agreement={report['agreement']:.1%} "
+            f"mean|Δscore|={report['mean_abs_score_diff']:.4f} "
+            f"throughput={report['headlines_per_second']:.1f} headlines/s"
+        )
+    return reports
+
+def cascade_agreement(lexicon_results: Sequence[dict], reference_labels: Sequence[str], threshold: float) -> dict:
+    """
+    Compares the cascade at `threshold` with model-only labels. Headlines the
+    lexicon isn't confident about go to the model, so they always agree.
+
+    Returns:
+        dict: {'threshold', 'lexicon_share' (fraction decided by the lexicon),
+               'lexicon_agreement' (agreement on those; None if there are none),
+               'agreement' (over the whole corpus)}.
+    """
+    decided = [i for i, result in enumerate(lexicon_results) if lexicon.is_confident(result, threshold)]
+    agreed = sum(1 for i in decided if lexicon_results[i]['label'] == reference_labels[i])
+    total = len(reference_labels)
+    return {
+        'threshold': threshold,
+        'lexicon_share': len(decided) / total if total else 0.0,
+        'lexicon_agreement': agreed / len(decided) if decided else None,
+        'agreement': (total - len(decided) + agreed) / total if total else 0.0,
+    }
+
+def run_cascade_check(thresholds: Sequence[float] = (0.5, 0.6, 0.7, 0.75, 0.8, 0.9),
+                      corpus: Sequence[str] = PARITY_CORPUS, batch_size: Optional[int] = None,
+                      repeats: int = 3) -> List[dict]:
+    """
+    Scores `corpus` with the configured backend alone and with the cascade at
+    each threshold, bypassing the sentiment cache. Times are the best of
+    `repeats` passes; a cascade pass is the lexicon over the whole corpus plus
+    the model over the headlines the lexicon left to it.
+
+    Returns:
+        List[dict]: One report per threshold: the `cascade_agreement` fields plus
+                    'headlines_per_second' and 'speedup' over the model alone.
+    """
+    scorer = lexicon.get_lexicon()
+    if scorer is None:
+        raise RuntimeError(f"No sentiment lexicon at {lexicon.LEXICON_PATH}.")
+    if not sentiment.warm_up():
+        raise RuntimeError(f"Backend '{sentiment.backend.name}' failed to load.")
+
+    corpus = list(corpus)
+    reference = [r.get('label') for r in sentiment._infer_batch(corpus, batch_size)]
+    model_seconds = _best_seconds(lambda: sentiment._infer_batch(corpus, batch_size), repeats)
+    lexicon_results = [scorer.score(headline) for headline in corpus]
+    lexicon_seconds = _best_seconds(lambda: [scorer.score(headline) for headline in corpus], repeats)
+    logger.info(f"Cascade baseline ({sentiment.MODEL_VERSION}): {len(corpus) / model_seconds:.1f} headlines/s")
+
+    reports = []
+    for threshold in thresholds:
+        report = cascade_agreement(lexicon_results, reference, threshold)
+        remaining = [h for h, r in zip(corpus, lexicon_results) if not lexicon.is_confident(r, threshold)]
+        seconds = lexicon_seconds
+        if remaining:
+            seconds += _best_seconds(lambda: sentiment._infer_batch(remaining, batch_size), repeats)
+        report['headlines_per_second'] = len(corpus) / seconds if seconds > 0 else 0.0
+        report['speedup'] = model_seconds / seconds if seconds > 0 else 0.0
+        reports.append(report)
+        lexicon_agreement = report['lexicon_agreement']
+        logger.info(
+            f"Cascade threshold={threshold:.2f}: lexicon decided {report['lexicon_share']:.1%} "
+            f"(agreement {'n/a' if lexicon_agreement is None else f'{lexicon_agreement:.1%}'}), "
+            f"overall agreement={report['agreement']:.1%} speedup={report['speedup']:.2f}x"
+        )
+    return reports
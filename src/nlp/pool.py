@@ -0,0 +1,141 @@
+#
+# src/nlp/pool.py
+#
+# Multi-process scoring for large backfills. A single process only keeps
+# one core's worth of useful work busy, so historical backfills fan out
+# across a pool of worker processes:
+#
+#   - FinBERT is loaded ONCE in the parent, then the pool is forked, so every
+#     worker shares the weights copy-on-write instead of loading its own copy;
+#   - work is split into chunks, and each worker pins its own intra-op thread
+#     count so workers don't oversubscribe the cores;
+#   - results come back in input order, so a single writer can stream them
+#     into the database.
+#
+# Requires the 'fork' start method (Linux). Elsewhere it falls back to
+# scoring in-process.
+#
+
+import gc
+import multiprocessing
+import os
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from src.nlp import lexicon
+from src.nlp import sentiment
+from src.nlp import sentiment_cache
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+PROCESSES = settings.get('sentiment.pool.processes', 0)
+CHUNK_SIZE = settings.get('sentiment.pool.chunk_size', 256)
+THREADS_PER_WORKER = settings.get('sentiment.pool.threads_per_worker', 0)
+
+def _init_worker(threads: int):
+    """ Runs once in each forked worker: pin its intra-op thread count. """
+    import torch
+
+    torch.set_num_threads(threads)
+
+def _score_chunk(task: Tuple[int, List[str], Optional[int]]) -> Tuple[int, List[dict]]:
+    """ Scores one chunk in a worker with the model inherited from the parent. """
+    start, headlines, batch_size = task
+    return start, sentiment._infer_batch(headlines, batch_size)
+
+def _plan(processes: Optional[int], threads_per_worker: Optional[int]) -> Tuple[int, int]:
+    cores = os.cpu_count() or 1
+    processes = processes or PROCESSES or cores
+    threads = threads_per_worker or THREADS_PER_WORKER or max(1, cores // processes)
+    return processes, threads
+
+def iter_scored_chunks(headlines: Sequence[str], processes: Optional[int] = None,
+                       chunk_size: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                       batch_size: Optional[int] = None) -> Iterator[Tuple[int, List[dict]]]:
+    """
+    Scores `headlines` on a forked process pool, bypassing the sentiment cache.
+
+    Args:
+        headlines (Sequence[str]): The headlines to score.
+        processes (int, optional): Worker count. Defaults to `sentiment.pool.processes`,
+                                   or one per core.
+        chunk_size (int, optional): Headlines per task. Defaults to `sentiment.pool.chunk_size`.
+        threads_per_worker (int, optional): Intra-op threads per worker. Defaults to
+                                            cores divided by workers.
+        batch_size (int, optional): Headlines per forward pass inside a worker.
+
+    Yields:
+        Tuple[int, List[dict]]: (offset of the chunk in `headlines`, its results),
+                                in input order.
+    """
+    headlines = list(headlines)
+    if not headlines:
+        return
+
+    chunk_size = max(1, chunk_size or CHUNK_SIZE)
+    processes, threads = _plan(processes, threads_per_worker)
+    tasks = [(start, headlines[start:start + chunk_size], batch_size) for start in range(0, len(headlines), chunk_size)]
+
+    # Load in the parent so workers inherit the weights instead of each loading them.
+    if not sentiment.warm_up():
+        for start, chunk, _ in tasks:
+            yield start, [{} for _ in chunk]
+        return
+
+    if processes <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        logger.info("Scoring in-process (single worker or 'fork' unavailable).")
+        for task in tasks:
+            yield _score_chunk(task)
+        return
+
+    logger.info(
+        f"Scoring {len(headlines)} headlines on {processes} processes x {threads} threads "
+        f"in chunks of {chunk_size}."
+    )
+    # Move everything allocated so far out of the GC's reach, so collections in
+    # the workers don't write to (and so copy) the parent's pages.
+    gc.freeze()
+    try:
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes, initializer=_init_worker, initargs=(threads,)) as pool:
+            # imap (not imap_unordered) keeps chunks in input order for the writer.
+            for result in pool.imap(_score_chunk, tasks):
+                yield result
+    finally:
+        gc.unfreeze()
+
+def score_in_processes(headlines: Sequence[str], processes: Optional[int] = None,
+                       chunk_size: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                       batch_size: Optional[int] = None, use_cache: bool = True) -> List[dict]:
+    """
+    Scores `headlines` on a process pool and returns one result per headline,
+    in input order. Takes the same arguments as `iter_scored_chunks`.
+
+    With `use_cache`, the parent serves what it can from the sentiment cache,
+    sends only the misses to the pool, and stores the new results afterwards.
+    When the cascade is enabled, headlines the lexicon is confident about
+    never reach the cache or the pool.
+    """
+    headlines = list(headlines)
+    # The cascade's lexicon tier is cheap enough to run in the parent.
+    results: List[Optional[dict]] = lexicon.first_tier(headlines)
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    cache = sentiment_cache.get_sentiment_cache() if use_cache else None
+    if cache is not None and pending:
+        for i, result in zip(pending, cache.get_many([headlines[i] for i in pending], sentiment.MODEL_VERSION)):
+            results[i] = result
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    for start, chunk_results in iter_scored_chunks([headlines[i] for i in missing], processes,
+                                                   chunk_size, threads_per_worker, batch_size):
+        for offset, result in enumerate(chunk_results):
+            results[missing[start + offset]] = result
+
+    if cache is not None and missing:
+        cache.put_many([(headlines[i], results[i]) for i in missing], sentiment.MODEL_VERSION)
+
+    for result in results:
+        if result:
+            result.setdefault('model_version', sentiment.MODEL_VERSION)
+    return results
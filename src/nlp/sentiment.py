@@ -5,11 +5,21 @@
 # It's designed to load the complex AI model only once for efficiency.
 #
 
-# Import necessary libraries from Hugging Face Transformers and PyTorch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+# Hugging Face Transformers and PyTorch are NOT imported here: they take
+# seconds to import, and many code paths (init-db, scrape-only, stats) never
+# score anything. They are imported inside the functions that need them.
+
+# Standard library imports
+import logging
+import time
+from typing import List, Optional
 
 # Local application/library specific imports
+from src.nlp import backends
+from src.nlp import lexicon
+from src.nlp import sentiment_cache
+from src.utils import metrics
+from src.utils.config_loader import get_settings
 from src.utils.logger import logger
 
 # --- Model Configuration ---
@@ -17,6 +27,42 @@ from src.utils.logger import logger
 # This model is hosted on the Hugging Face model hub.
 MODEL_NAME = "ProsusAI/finbert"
 
+# The model's configuration tells us what each output index means.
+# For FinBERT: 0=Positive, 1=Negative, 2=Neutral
+LABELS = ['Positive', 'Negative', 'Neutral']
+
+# --- Batching Configuration ---
+# `batch_size` is the throughput knob: larger batches amortize the per-call
+# overhead of a forward pass (higher throughput), smaller batches return the
+# first results sooner (lower latency).
+settings = get_settings()
+DEFAULT_BATCH_SIZE = settings.get('sentiment.batch_size', 32)
+MAX_LENGTH = settings.get('sentiment.max_length', 512)
+
+# --- Backend Configuration ---
+# The backend (see backends.py) decides how the model is loaded and run:
+# float32, int8-quantized, and how many intra-op threads to use.
+backend = backends.get_backend(
+    settings.get('sentiment.backend', backends.DEFAULT_BACKEND),
+    MODEL_NAME,
+    num_threads=settings.get('sentiment.num_threads', 0)
+)
+
+# Identifies the model that produced a score. Stored with every row and used
+# as part of the sentiment cache key, so a new model never reads stale results.
+# Each backend has its own version.
+MODEL_VERSION = backend.version
+
+# --- Metrics ---
+TOKENIZE_SECONDS = metrics.histogram('etl_sentiment_tokenize_seconds', "Time to tokenize and bucket one batch of headlines.")
+INFERENCE_SECONDS = metrics.histogram('etl_sentiment_inference_seconds', "Time for one model forward pass.")
+INFERENCE_BATCH_SIZE = metrics.histogram(
+    'etl_sentiment_batch_size', "Headlines per model forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+HEADLINES_SCORED = metrics.counter('etl_sentiment_headlines_total', "Headlines scored by the model.")
+CACHE_LOOKUPS = metrics.counter('etl_sentiment_cache_lookups_total', "Sentiment cache lookups by result.", ['result'])
+CASCADE_TIER = metrics.counter('etl_sentiment_cascade_total', "Headlines by the cascade tier that scored them.", ['tier'])
+
 # --- Global Variables for Singleton Pattern ---
 # Loading a large model like FinBERT is slow and memory-intensive.
 # We use a singleton pattern here: we'll load the model and tokenizer
@@ -33,13 +79,12 @@ def _initialize_model():
     """
     global tokenizer, model
     try:
-        logger.info(f"Initializing FinBERT model: {MODEL_NAME}. This may take a moment...")
+        logger.info(f"Initializing FinBERT model: {MODEL_NAME} with the {backend.describe()}. This may take a moment...")
         # The tokenizer converts human-readable text into a format (tokens)
-        # that the AI model can understand.
-        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        # The model is the pre-trained neural network that performs the
-        # sequence classification (in this case, sentiment analysis).
-        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        # that the AI model can understand. The model is the pre-trained neural
+        # network that performs the sequence classification (in this case,
+        # sentiment analysis), prepared by the backend (e.g. quantized).
+        tokenizer, model = backend.load()
         logger.info("FinBERT model initialized successfully.")
     except Exception as e:
         logger.error(f"FATAL: Failed to load FinBERT model. Error: {e}")
@@ -47,6 +92,17 @@ def _initialize_model():
         tokenizer = None
         model = None
 
+def set_backend(name: str, num_threads: Optional[int] = None):
+    """
+    Switches to another backend. The current model is dropped and the new one
+    is loaded on the next analysis; results are tagged with its version.
+    """
+    global backend, tokenizer, model, MODEL_VERSION
+    backend = backends.get_backend(name, MODEL_NAME, num_threads=num_threads)
+    MODEL_VERSION = backend.version
+    tokenizer = None
+    model = None
+
 def analyze_sentiment(headline: str) -> dict:
     """
     Analyzes the sentiment of a single headline using the loaded FinBERT model.
@@ -55,12 +111,31 @@ def analyze_sentiment(headline: str) -> dict:
         headline (str): The news headline to analyze.
 
     Returns:
-        dict: A dictionary containing the 'label' (Positive, Negative, Neutral)
-              and the 'score' (confidence of the model). Returns an empty
-              dictionary if analysis fails.
+        dict: A dictionary containing the 'label' (Positive, Negative, Neutral),
+              the 'score' (confidence of the model) and the 'model_version'
+              that produced them. Returns an empty dictionary if analysis fails.
     """
     global tokenizer, model
 
+    # --- Cascade ---
+    # With sentiment.cascade.enabled, a confident lexicon result skips the model.
+    quick = lexicon.first_tier([headline])[0]
+    if quick is not None:
+        CASCADE_TIER.inc(tier='lexicon')
+        return quick
+    if lexicon.CASCADE_ENABLED:
+        CASCADE_TIER.inc(tier='model')
+
+    # --- Cache Check ---
+    # Identical headline text (after normalization) never needs a second forward pass.
+    cache = sentiment_cache.get_sentiment_cache()
+    if cache is not None:
+        cached = cache.get(headline, MODEL_VERSION)
+        CACHE_LOOKUPS.inc(result='hit' if cached else 'miss')
+        if cached:
+            cached['model_version'] = MODEL_VERSION
+            return cached
+
     # --- Initialization Check (Singleton Pattern) ---
     # Check if the model has been loaded yet. If not, load it.
     if tokenizer is None or model is None:
@@ -70,15 +145,19 @@ def analyze_sentiment(headline: str) -> dict:
             return {}
 
     try:
+        import torch
+
         # 1. Tokenize the input text.
         # `padding=True` and `truncation=True` handle headlines of different lengths.
         # `return_tensors='pt'` returns the data as PyTorch tensors.
-        inputs = tokenizer(headline, padding=True, truncation=True, return_tensors='pt', max_length=512)
+        inputs = tokenizer(headline, padding=True, truncation=True, return_tensors='pt', max_length=MAX_LENGTH)
 
         # 2. Get model predictions (inference).
         # We run the model without calculating gradients to save memory and speed up computation.
-        with torch.no_grad():
+        with INFERENCE_SECONDS.time(), torch.no_grad():
             outputs = model(**inputs)
+        INFERENCE_BATCH_SIZE.observe(1)
+        HEADLINES_SCORED.inc()
 
         # 3. Process the output.
         # The model outputs raw scores called "logits".
@@ -90,14 +169,213 @@ def analyze_sentiment(headline: str) -> dict:
         score = predictions.max().item()  # The highest probability
         label_index = predictions.argmax().item()  # The index of the highest probability
 
-        # The model's configuration tells us what each index means.
-        # For FinBERT: 0=Positive, 1=Negative, 2=Neutral
-        labels = ['Positive', 'Negative', 'Neutral']
-        label = labels[label_index]
+        label = LABELS[label_index]
+
+        logger.debug("Analyzed '%.50s...': Label=%s, Score=%.4f", headline, label, score)
+        result = {'label': label, 'score': score, 'model_version': MODEL_VERSION}
+        if cache is not None:
+            cache.put(headline, MODEL_VERSION, result)
+        return result
+
+    except Exception as e:
+        logger.error("Error during sentiment analysis for headline '%s': %s", headline, e,
+                     extra={'rate_key': 'sentiment.analyze'})
+        return {}
+
+def analyze_sentiment_batch(headlines: List[str], batch_size: Optional[int] = None) -> List[dict]:
+    """
+    Analyzes the sentiment of many headlines using batched FinBERT inference.
+
+    Headlines are tokenized once, sorted by token length and split into
+    buckets of `batch_size`. Each bucket is padded only to the length of its
+    own longest headline, so short headlines don't pay for long ones.
+
+    Args:
+        headlines (List[str]): The news headlines to analyze.
+        batch_size (int, optional): Number of headlines per forward pass.
+                                    Defaults to `sentiment.batch_size` from the config.
+
+    Returns:
+        List[dict]: One result per headline, in the same order as the input.
+                    Each result has the same shape as `analyze_sentiment`'s;
+                    headlines in a failed batch get an empty dictionary.
+    """
+    if not headlines:
+        return []
+    return complete_batch(prepare_batch(headlines, batch_size))
+
+def prepare_batch(headlines: List[str], batch_size: Optional[int] = None) -> dict:
+    """
+    First half of `analyze_sentiment_batch`: the lexicon tier of the
+    cascade, cache lookup and tokenization.
+
+    Split out so a streaming pipeline can tokenize the next batch while the
+    model is busy with the current one. Pass the result to `complete_batch`.
+
+    Returns:
+        dict: An opaque prepared batch.
+    """
+    headlines = list(headlines)
+    prepared = {'headlines': headlines, 'results': [None] * len(headlines), 'groups': [], 'buckets': []}
+    if not headlines:
+        return prepared
+
+    # --- Cascade ---
+    # Headlines the lexicon is confident about keep its result (tagged with
+    # the lexicon's version) and skip both the cache and the model.
+    if lexicon.CASCADE_ENABLED:
+        prepared['results'] = lexicon.first_tier(headlines)
+        decided = sum(1 for result in prepared['results'] if result is not None)
+        CASCADE_TIER.inc(decided, tier='lexicon')
+        CASCADE_TIER.inc(len(headlines) - decided, tier='model')
+    pending = [i for i, result in enumerate(prepared['results']) if result is None]
+
+    # --- Cache Check ---
+    # Only headlines the cache hasn't seen go to the model.
+    cache = sentiment_cache.get_sentiment_cache()
+    if cache is not None and pending:
+        cached = cache.get_many([headlines[i] for i in pending], MODEL_VERSION)
+        for i, result in zip(pending, cached):
+            prepared['results'][i] = result
+        hits = sum(1 for result in cached if result is not None)
+        CACHE_LOOKUPS.inc(hits, result='hit')
+        CACHE_LOOKUPS.inc(len(pending) - hits, result='miss')
+
+    # Copies of the same headline within this batch share one inference.
+    groups = {}
+    for i, result in enumerate(prepared['results']):
+        if result is None:
+            key = sentiment_cache.make_cache_key(headlines[i], MODEL_VERSION)
+            groups.setdefault(key, []).append(i)
+    prepared['groups'] = list(groups.values())
+
+    if prepared['groups']:
+        texts = [headlines[positions[0]] for positions in prepared['groups']]
+        prepared['buckets'] = _encode_buckets(texts, batch_size)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Lexicon and cache served %d of %d headlines.",
+                     len(headlines) - sum(map(len, prepared['groups'])), len(headlines))
+    return prepared
+
+def complete_batch(prepared: dict) -> List[dict]:
+    """
+    Second half of `analyze_sentiment_batch`: runs the model on a batch from
+    `prepare_batch`, stores new results in the cache and returns all results
+    in input order.
+    """
+    headlines = prepared['headlines']
+    results = prepared['results']
+    groups = prepared['groups']
+
+    if groups:
+        inferred = _run_buckets(prepared['buckets'], len(groups))
+        for positions, result in zip(groups, inferred):
+            for i in positions:
+                results[i] = dict(result)
+
+        cache = sentiment_cache.get_sentiment_cache()
+        if cache is not None:
+            cache.put_many([(headlines[positions[0]], results[positions[0]]) for positions in groups], MODEL_VERSION)
+
+    # Lexicon results already carry the lexicon's version.
+    for result in results:
+        if result:
+            result.setdefault('model_version', MODEL_VERSION)
+    return results
+
+def warm_up() -> bool:
+    """
+    Loads the model ahead of the first request, so a long-running process
+    pays the load cost once at startup instead of on its first poll.
+
+    Returns:
+        bool: True if the model is ready.
+    """
+    return _ensure_model()
+
+def _ensure_model() -> bool:
+    """ Loads the model on first use. Returns False if it could not be loaded. """
+    if tokenizer is None or model is None:
+        _initialize_model()
+    return tokenizer is not None and model is not None
+
+def _encode_buckets(headlines: List[str], batch_size: Optional[int] = None) -> List[tuple]:
+    """
+    Tokenizes `headlines` and groups them into length-sorted, padded buckets.
+
+    Returns:
+        List[tuple]: (positions, inputs) pairs, where `positions` index into
+                     `headlines` and `inputs` are the padded model tensors.
+                     Empty if the model or tokenizer is unavailable.
+    """
+    if not headlines or not _ensure_model():
+        return []
 
-        logger.debug(f"Analyzed '{headline[:50]}...': Label={label}, Score={score:.4f}")
-        return {'label': label, 'score': score}
+    batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+    started = time.perf_counter()
 
+    try:
+        # 1. Tokenize everything once, without padding, to learn each headline's length.
+        encodings = tokenizer(list(headlines), truncation=True, max_length=MAX_LENGTH)
     except Exception as e:
-        logger.error(f"Error during sentiment analysis for headline '{headline}': {e}")
-        return {}
\ No newline at end of file
+        logger.error(f"Error tokenizing batch of {len(headlines)} headlines: {e}")
+        return []
+
+    # 2. Sort by token length so each bucket holds headlines of similar size.
+    input_ids = encodings['input_ids']
+    order = sorted(range(len(headlines)), key=lambda i: len(input_ids[i]))
+
+    buckets = []
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        try:
+            # 3. Pad the bucket only up to its own longest headline.
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in bucket]
+            buckets.append((bucket, tokenizer.pad(features, padding='longest', return_tensors='pt')))
+        except Exception as e:
+            logger.error(f"Error padding batch of {len(bucket)} headlines: {e}")
+    TOKENIZE_SECONDS.observe(time.perf_counter() - started)
+    return buckets
+
+def _run_buckets(buckets: List[tuple], count: int) -> List[dict]:
+    """
+    Runs the model over buckets from `_encode_buckets`.
+
+    Returns:
+        List[dict]: `count` results, scattered back to their original positions.
+                    Headlines in a failed (or missing) bucket get an empty dictionary.
+    """
+    results: List[dict] = [{} for _ in range(count)]
+    if not buckets:
+        return results
+
+    import torch
+
+    for bucket, inputs in buckets:
+        try:
+            with INFERENCE_SECONDS.time(), torch.no_grad():
+                outputs = model(**inputs)
+            INFERENCE_BATCH_SIZE.observe(len(bucket))
+            HEADLINES_SCORED.inc(len(bucket))
+
+            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+            scores, label_indices = predictions.max(dim=-1)
+
+            # 4. Scatter the bucket's results back to their original positions.
+            for position, score, label_index in zip(bucket, scores.tolist(), label_indices.tolist()):
+                results[position] = {'label': LABELS[label_index], 'score': score}
+
+        except Exception as e:
+            logger.error("Error during batched sentiment analysis (%d headlines): %s", len(bucket), e,
+                         extra={'rate_key': 'sentiment.batch'})
+
+    logger.debug("Analyzed %d headlines in %d batches.", count, len(buckets))
+    return results
+
+def _infer_batch(headlines: List[str], batch_size: Optional[int] = None) -> List[dict]:
+    """
+    Runs length-bucketed FinBERT inference on `headlines`, bypassing the cache.
+    See `analyze_sentiment_batch` for the contract.
+    """
+    return _run_buckets(_encode_buckets(headlines, batch_size), len(headlines))
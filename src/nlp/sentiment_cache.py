@@ -0,0 +1,310 @@
+#
+# src/nlp/sentiment_cache.py
+#
+# A persistent, content-addressed cache for sentiment results.
+# The same headline often comes back under a different URL, day or source;
+# those are new rows in news_sentiment, but they don't need a new FinBERT pass.
+# Results are keyed on the normalized headline text plus the model version,
+# kept in an on-disk SQLite table with an in-process LRU in front of it.
+#
+
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+CACHE_ENABLED = settings.get('sentiment.cache.enabled', True)
+CACHE_PATH = settings.get('sentiment.cache.path') or settings.get('database.path', 'data/news_sentiment.db')
+MEMORY_SIZE = settings.get('sentiment.cache.memory_size', 10000)
+MAX_ENTRIES = settings.get('sentiment.cache.max_entries', 500000)
+
+SCHEMA_PATH = settings.get('database.schema', 'src/database/schema.sql')
+
+# The disk table may grow this far past max_entries before it is trimmed
+# back, so the eviction (and the COUNT before it) runs once per many writes.
+EVICTION_SLACK = 0.1
+
+# Disk hits refresh last_used_at in batches of this many keys, written with
+# the next put or once this many are pending, instead of on every read.
+TOUCH_BATCH_SIZE = 1000
+
+# SQLite caps the number of '?' placeholders per statement.
+_LOOKUP_CHUNK_SIZE = 500
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_CACHE_DDL_RE = re.compile(r"CREATE (?:TABLE|INDEX) IF NOT EXISTS (?:\w+ ON )?sentiment_cache\b")
+
+def _cache_schema_sql() -> str:
+    """
+    The sentiment_cache statements from schema.sql, so a cache kept in its
+    own file (sentiment.cache.path) gets exactly the same table.
+    """
+    with open(SCHEMA_PATH, 'r') as f:
+        script = "\n".join(line for line in f.read().splitlines() if not line.lstrip().startswith('--'))
+    statements = [statement.strip() for statement in script.split(';')]
+    return "".join(f"{statement};\n" for statement in statements if _CACHE_DDL_RE.match(statement))
+
+def normalize_headline(headline: str) -> str:
+    """
+    Normalizes a headline so trivially different copies share a cache entry.
+    FinBERT is uncased, so case-folding doesn't change what the model sees.
+    """
+    text = unicodedata.normalize('NFKC', headline)
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+def make_cache_key(headline: str, model_version: str) -> str:
+    """ Returns the content address of a headline under a given model version. """
+    key_input = f"{model_version}\x00{normalize_headline(headline)}"
+    return hashlib.sha1(key_input.encode('utf-8')).hexdigest()
+
+class SentimentCache:
+    """
+    Two-level sentiment cache: an in-process LRU backed by a SQLite table.
+
+    Both levels are bounded. The LRU holds at most `memory_size` entries; the
+    disk table is trimmed back to `max_entries`, least recently used rows
+    first, once writes push it more than EVICTION_SLACK over the limit.
+    """
+
+    def __init__(self, db_path: str, memory_size: int = MEMORY_SIZE, max_entries: int = MAX_ENTRIES):
+        self.db_path = db_path
+        self.memory_size = max(0, int(memory_size))
+        self.max_entries = max(1, int(max_entries))
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One connection per process, shared by every thread under _db_lock.
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._db_lock = threading.Lock()
+        # Rows on disk as far as this process knows: counted once, then
+        # advanced by our own writes. Only a real COUNT decides eviction.
+        self._approx_rows: Optional[int] = None
+        # Disk hits whose last_used_at hasn't been written yet: key -> time.
+        self._touched: Dict[str, float] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- Connection handling ---
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Returns the shared connection, opening it on first use (and again after a fork). Hold _db_lock. """
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.executescript(_cache_schema_sql())
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def close(self):
+        """ Closes the shared connection, writing any pending recency updates first. """
+        with self._db_lock:
+            if self._conn is None:
+                return
+            try:
+                if self._conn_pid == os.getpid():
+                    with self._conn:
+                        self._flush_touched(self._conn)
+                    self._conn.close()
+            except sqlite3.Error as e:
+                logger.warning("Error closing the sentiment cache: %s", e)
+            self._conn = None
+
+    def _flush_touched(self, conn: sqlite3.Connection):
+        """ Writes pending last_used_at refreshes. Call inside a transaction, holding _db_lock. """
+        if self._touched:
+            touched, self._touched = self._touched, {}
+            conn.executemany("UPDATE sentiment_cache SET last_used_at = ? WHERE cache_key = ?;",
+                             [(used_at, key) for key, used_at in touched.items()])
+
+    # --- In-process LRU ---
+
+    def _remember(self, key: str, result: dict):
+        if self.memory_size == 0:
+            return
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # --- Public API ---
+
+    def get(self, headline: str, model_version: str) -> Optional[dict]:
+        """ Returns the cached result for one headline, or None on a miss. """
+        return self.get_many([headline], model_version)[0]
+
+    def get_many(self, headlines: Sequence[str], model_version: str) -> List[Optional[dict]]:
+        """
+        Looks up many headlines at once. Memory misses are resolved from disk
+        with chunked IN queries, and disk hits are promoted into the LRU.
+
+        Returns:
+            List[Optional[dict]]: One entry per headline, in input order;
+                                  None where the headline isn't cached.
+        """
+        keys = [make_cache_key(h, model_version) for h in headlines]
+        results: List[Optional[dict]] = [None] * len(keys)
+        pending: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = dict(self._memory[key])
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+
+        if pending:
+            found = self._load_from_disk(list(pending))
+            with self._lock:
+                for key, positions in pending.items():
+                    result = found.get(key)
+                    if result is None:
+                        self.misses += len(positions)
+                        continue
+                    self._remember(key, result)
+                    self.disk_hits += len(positions)
+                    for i in positions:
+                        results[i] = dict(result)
+
+        return results
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+                    chunk = keys[start:start + _LOOKUP_CHUNK_SIZE]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    cursor = conn.execute(
+                        f"SELECT cache_key, sentiment_label, sentiment_score FROM sentiment_cache "
+                        f"WHERE cache_key IN ({placeholders});",
+                        chunk
+                    )
+                    for key, label, score in cursor:
+                        found[key] = {'label': label, 'score': score}
+                # Recency keeps disk eviction least-recently-used, but is only
+                # written in batches so lookups don't contend for the write lock.
+                now = time.time()
+                for key in found:
+                    self._touched[key] = now
+                if len(self._touched) >= TOUCH_BATCH_SIZE:
+                    with conn:
+                        self._flush_touched(conn)
+        except sqlite3.Error as e:
+            logger.error("Sentiment cache read failed: %s", e, extra={'rate_key': 'sentiment_cache.read'})
+        return found
+
+    def put(self, headline: str, model_version: str, result: dict):
+        """ Stores one result. Empty (failed) results are never cached. """
+        self.put_many([(headline, result)], model_version)
+
+    def put_many(self, items: Sequence[Tuple[str, dict]], model_version: str):
+        """
+        Stores many (headline, result) pairs in one transaction, together with
+        any pending recency updates, then evicts the least recently used rows
+        if the table has grown too far past `max_entries`.
+        """
+        entries = {}
+        for headline, result in items:
+            if result and 'label' in result and 'score' in result:
+                key = make_cache_key(headline, model_version)
+                entries[key] = {'label': result['label'], 'score': result['score']}
+        if not entries:
+            return
+
+        with self._lock:
+            for key, result in entries.items():
+                self._remember(key, result)
+
+        now = time.time()
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO sentiment_cache "
+                        "(cache_key, model_version, sentiment_label, sentiment_score, last_used_at) "
+                        "VALUES (?, ?, ?, ?, ?);",
+                        [(key, model_version, r['label'], r['score'], now) for key, r in entries.items()]
+                    )
+                    self._flush_touched(conn)
+                    self._evict_if_needed(conn, len(entries))
+        except sqlite3.Error as e:
+            logger.error("Sentiment cache write failed: %s", e, extra={'rate_key': 'sentiment_cache.write'})
+
+    def _evict_if_needed(self, conn: sqlite3.Connection, written: int):
+        """
+        Trims the table back to max_entries once it may be more than
+        EVICTION_SLACK over. Replaced keys count as new rows here, so the
+        estimate errs high and at worst triggers an early COUNT.
+        """
+        if self._approx_rows is None:
+            self._approx_rows = conn.execute("SELECT COUNT(*) FROM sentiment_cache;").fetchone()[0]
+        else:
+            self._approx_rows += written
+        high_water = self.max_entries + max(1, int(self.max_entries * EVICTION_SLACK))
+        if self._approx_rows < high_water:
+            return
+        count = conn.execute("SELECT COUNT(*) FROM sentiment_cache;").fetchone()[0]
+        overflow = count - self.max_entries
+        if count >= high_water and overflow > 0:
+            conn.execute(
+                "DELETE FROM sentiment_cache WHERE cache_key IN ("
+                "SELECT cache_key FROM sentiment_cache ORDER BY last_used_at ASC LIMIT ?);",
+                (overflow,)
+            )
+            count -= overflow
+            logger.debug("Sentiment cache evicted %d entries.", overflow)
+        self._approx_rows = count
+
+    def stats(self) -> dict:
+        """ Returns the hit/miss counters accumulated since the cache was created. """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (hits / lookups) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
+
+    def reset_stats(self):
+        """ Zeroes the hit/miss counters, e.g. at the start of a pipeline run. """
+        with self._lock:
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+# --- Singleton accessor, mirroring the model singleton in sentiment.py ---
+_cache: Optional[SentimentCache] = None
+
+def get_sentiment_cache() -> Optional[SentimentCache]:
+    """
+    Returns the process-wide cache, creating it on first use.
+    Returns None when `sentiment.cache.enabled` is false.
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = SentimentCache(CACHE_PATH, memory_size=MEMORY_SIZE, max_entries=MAX_ENTRIES)
+        # Writes the last batch of recency updates on the way out.
+        atexit.register(_cache.close)
+    return _cache
@@ -0,0 +1,341 @@
+#
+# src/scraper/feed_scraper.py
+#
+# Fetches every RSS source listed under `scraper.sources` concurrently.
+# Each feed remembers the ETag / Last-Modified validators from its last
+# successful fetch and sends them back as a conditional GET, so a feed that
+# hasn't changed costs a 304 and is never parsed.
+#
+# A changed feed is parsed as it downloads (src/scraper/stream_parser.py):
+# parsing stops, and the rest of the response is never read, once it
+# reaches items older than the feed's high-water mark from the last fetch.
+# The mark is stored with the validators, and like them is only saved once
+# the feed's articles have been loaded (see `loaded_feed_states`).
+# `scraper.parser: feedparser` parses whole documents with feedparser
+# instead; the streaming parser also falls back to it for feeds that are
+# not well-formed XML, when it is installed.
+#
+
+import gzip
+import importlib.util
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from xml.etree.ElementTree import ParseError
+
+from src.scraper import stream_parser
+from src.utils import metrics
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+settings = get_settings()
+SCRAPER_CONFIG = settings.section('scraper')
+USER_AGENT = settings.get('scraper.user_agent', 'financial-sentiment-etl')
+TIMEOUT = settings.get('scraper.timeout', 10.0)
+MAX_WORKERS = settings.get('scraper.max_workers', 16)
+MAX_CONNECTIONS_PER_HOST = settings.get('scraper.max_connections_per_host', 2)
+FEED_PARSER = settings.get('scraper.parser', 'stream')
+
+FEED_FETCH_SECONDS = metrics.histogram('etl_feed_fetch_seconds', "Time to fetch and parse one feed.", ['feed'])
+FEED_REQUESTS = metrics.counter(
+    'etl_feed_requests_total', "Feed fetches by outcome (ok, not_modified, http_error, error).", ['feed', 'outcome']
+)
+FEED_ARTICLES = metrics.counter('etl_feed_articles_total', "Articles parsed from each feed.", ['feed'])
+FEED_ITEMS_SKIPPED = metrics.counter(
+    'etl_feed_items_skipped_total', "Feed items skipped as older than the feed's high-water mark.", ['feed']
+)
+
+def load_sources(scraper_config: Optional[dict] = None) -> List[dict]:
+    """
+    Normalizes `scraper.sources` into a list of feed definitions.
+
+    A source can be a bare URL or a mapping with 'url' and optional 'label'
+    (the value stored in news_sentiment.source) and 'interval' (seconds
+    between polls in daemon mode).
+
+    Returns:
+        List[dict]: One {'name', 'url', 'label', 'interval'} dict per feed.
+    """
+    scraper_config = SCRAPER_CONFIG if scraper_config is None else scraper_config
+    sources = []
+    for name, definition in (scraper_config.get('sources') or {}).items():
+        if isinstance(definition, str):
+            definition = {'url': definition}
+        if not definition or not definition.get('url'):
+            logger.error(f"Feed '{name}' has no URL configured; skipping it.")
+            continue
+        sources.append({
+            'name': name,
+            'url': definition['url'],
+            'label': definition.get('label', name),
+            'interval': definition.get('interval'),
+        })
+    return sources
+
+class HostLimiter:
+    """ Caps the number of simultaneous connections to any single host. """
+
+    def __init__(self, max_per_host: int = MAX_CONNECTIONS_PER_HOST):
+        self.max_per_host = max(1, int(max_per_host))
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+def _parse_entries(body: bytes, label: str) -> List[dict]:
+    """ Parses a whole feed document into article dicts with feedparser. """
+    # Imported here so that feeds answering 304 never pay for the parser.
+    import feedparser
+
+    articles = []
+    feed = feedparser.parse(body)
+    for entry in feed.entries:
+        headline = entry.get("title")
+        url = entry.get("link")
+        if headline and url:
+            articles.append({
+                "headline": headline,
+                "url": url,
+                "source": label,
+                "published_timestamp": stream_parser.parse_pub_date(entry.get("published") or entry.get("updated")),
+            })
+    return articles
+
+def _feedparser_available() -> bool:
+    return importlib.util.find_spec('feedparser') is not None
+
+def _stream_entries(response, gzipped: bool, label: str, state: dict) -> Tuple[List[dict], dict]:
+    """
+    Parses a feed straight off `response`, stopping at the feed's high-water
+    mark. Falls back to feedparser on malformed XML if it is installed.
+
+    Returns:
+        Tuple[List[dict], dict]: The new articles, and {'high_water_published',
+        'high_water_guid', 'skipped'} (the old mark if the fallback was used).
+    """
+    chunks = stream_parser.read_chunks(response, gzipped)
+    consumed = []
+
+    def _remembered():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    parse = stream_parser.FeedParse(label, state.get('high_water_published'), state.get('high_water_guid'))
+    try:
+        parse.parse(_remembered())
+    except ParseError as e:
+        if not _feedparser_available():
+            raise
+        logger.warning("Feed '%s' is not well-formed XML (%s); parsing it with feedparser.", label, e,
+                       extra={'rate_key': f"feed.{label}.malformed"})
+        body = b"".join(consumed) + b"".join(chunks)
+        mark = {'high_water_published': parse.previous_published, 'high_water_guid': parse.previous_guid,
+                'skipped': 0}
+        return _parse_entries(body, label), mark
+    return parse.articles, {'high_water_published': parse.high_water_published,
+                            'high_water_guid': parse.high_water_guid, 'skipped': parse.skipped}
+
+def _record_fetch(result: dict, started: float) -> dict:
+    """ Updates the feed metrics for one `fetch_feed` result and returns it. """
+    if result['status'] == 304:
+        outcome = 'not_modified'
+    elif result['status'] is not None and result['status'] >= 400:
+        outcome = 'http_error'
+    elif result['error'] is not None:
+        outcome = 'error'
+    else:
+        outcome = 'ok'
+    FEED_REQUESTS.inc(feed=result['name'], outcome=outcome)
+    FEED_ARTICLES.inc(len(result['articles']), feed=result['name'])
+    if result['skipped']:
+        FEED_ITEMS_SKIPPED.inc(result['skipped'], feed=result['name'])
+    FEED_FETCH_SECONDS.observe(time.perf_counter() - started, feed=result['name'])
+    return result
+
+def fetch_feed(source: dict, validators: Optional[dict] = None, timeout: float = TIMEOUT,
+               host_limiter: Optional[HostLimiter] = None) -> dict:
+    """
+    Fetches and parses a single feed, using a conditional GET when validators
+    from a previous fetch are available.
+
+    Args:
+        source (dict): A feed definition from `load_sources`.
+        validators (dict, optional): {'etag', 'last_modified'} from the last fetch,
+                                     plus its 'high_water_published'/'high_water_guid'.
+        timeout (float): Socket timeout in seconds.
+        host_limiter (HostLimiter, optional): Shared per-host connection limit.
+
+    Returns:
+        dict: {'name', 'url', 'status', 'articles', 'etag', 'last_modified',
+               'high_water_published', 'high_water_guid', 'skipped', 'error'}.
+              Each article carries the feed's name under 'feed'.
+              'status' is the HTTP status (200, 304, ...) or None on a network
+              or parse error. 'skipped' counts items older than the high-water
+              mark. On 304 or error the previous validators and mark are carried over.
+    """
+    started = time.perf_counter()
+    validators = validators or {}
+    label = source.get('label', source['name'])
+    result = {
+        'name': source['name'],
+        'url': source['url'],
+        'status': None,
+        'articles': [],
+        'etag': validators.get('etag'),
+        'last_modified': validators.get('last_modified'),
+        'high_water_published': validators.get('high_water_published'),
+        'high_water_guid': validators.get('high_water_guid'),
+        'skipped': 0,
+        'error': None,
+    }
+
+    headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    request = urllib.request.Request(source['url'], headers=headers)
+
+    limiter = host_limiter.for_url(source['url']) if host_limiter else None
+    try:
+        if limiter:
+            limiter.acquire()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                gzipped = response.headers.get('Content-Encoding', '').lower() == 'gzip'
+                if FEED_PARSER == 'feedparser':
+                    body = response.read()
+                    if gzipped:
+                        body = gzip.decompress(body)
+                    articles, mark = _parse_entries(body, label), {}
+                else:
+                    # Leaving the `with` early drops whatever the parser didn't need.
+                    articles, mark = _stream_entries(response, gzipped, label, validators)
+                result['status'] = response.status
+                result['etag'] = response.headers.get('ETag')
+                result['last_modified'] = response.headers.get('Last-Modified')
+        finally:
+            if limiter:
+                limiter.release()
+    except urllib.error.HTTPError as e:
+        result['status'] = e.code
+        if e.code != 304:
+            result['error'] = f"HTTP {e.code}"
+            logger.error("Feed '%s' returned HTTP %s: %s", source['name'], e.code, source['url'],
+                         extra={'rate_key': f"feed.{source['name']}"})
+        return _record_fetch(result, started)
+    except (ParseError, ImportError) as e:
+        result['error'] = str(e)
+        logger.error("Error parsing feed '%s': %s", source['name'], e, exc_info=True,
+                     extra={'rate_key': f"feed.{source['name']}"})
+        return _record_fetch(result, started)
+    except Exception as e:
+        result['error'] = str(e)
+        logger.error("Error fetching feed '%s' (%s): %s", source['name'], source['url'], e,
+                     extra={'rate_key': f"feed.{source['name']}"})
+        return _record_fetch(result, started)
+
+    for article in articles:
+        article['feed'] = source['name']
+    result['articles'] = articles
+    result.update(mark)
+    return _record_fetch(result, started)
+
+def iter_feed_results(sources: Optional[List[dict]] = None, feed_state: Optional[Dict[str, dict]] = None,
+                      max_workers: Optional[int] = None, timeout: float = TIMEOUT,
+                      max_per_host: int = MAX_CONNECTIONS_PER_HOST) -> Iterator[dict]:
+    """
+    Fetches all feeds concurrently on a thread pool and yields each feed's
+    `fetch_feed` result as soon as it completes.
+
+    Args:
+        sources (List[dict], optional): Feed definitions. Defaults to `load_sources()`.
+        feed_state (Dict[str, dict], optional): Validators per feed name, as
+                                                returned by `scrape_feeds`.
+        max_workers (int, optional): Thread pool size. Defaults to `scraper.max_workers`.
+        timeout (float): Socket timeout per request in seconds.
+        max_per_host (int): Simultaneous connections allowed per host.
+    """
+    sources = load_sources() if sources is None else sources
+    feed_state = feed_state or {}
+    if not sources:
+        logger.error("No feeds configured under scraper.sources.")
+        return
+
+    limiter = HostLimiter(max_per_host)
+    workers = max(1, min(max_workers or MAX_WORKERS, len(sources)))
+
+    def _fetch(source):
+        state = feed_state.get(source['name'], {})
+        # Validators only apply to the URL they were issued for.
+        validators = state if state.get('url') == source['url'] else None
+        return fetch_feed(source, validators, timeout=timeout, host_limiter=limiter)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='feed') as executor:
+        futures = [executor.submit(_fetch, source) for source in sources]
+        for future in as_completed(futures):
+            yield future.result()
+
+def feed_state_entry(result: dict) -> dict:
+    """ Extracts the state to persist for a feed from its `fetch_feed` result. """
+    return {
+        'url': result['url'],
+        'etag': result['etag'],
+        'last_modified': result['last_modified'],
+        'status': result['status'],
+        'high_water_published': result['high_water_published'],
+        'high_water_guid': result['high_water_guid'],
+    }
+
+def loaded_feed_states(new_state: Dict[str, dict], unloaded: Iterable[dict]) -> Dict[str, dict]:
+    """
+    Picks the feed states that are safe to persist once a run's articles have
+    been loaded: every feed except those with an article in `unloaded` (ones
+    that failed scoring or whose load was rolled back). Those feeds keep their
+    stored validators and high-water mark, so their next fetch returns the
+    same articles again instead of a 304 or an early stop.
+    """
+    held_back = {article.get('feed') for article in unloaded}
+    if None in held_back:
+        # An article without a feed name could have come from any of them.
+        return {}
+    return {name: state for name, state in new_state.items() if name not in held_back}
+
+def scrape_feeds(sources: Optional[List[dict]] = None, feed_state: Optional[Dict[str, dict]] = None,
+                 max_workers: Optional[int] = None, timeout: float = TIMEOUT,
+                 max_per_host: int = MAX_CONNECTIONS_PER_HOST) -> Tuple[List[Dict[str, str]], Dict[str, dict]]:
+    """
+    Fetches all feeds concurrently and collects their articles.
+    Takes the same arguments as `iter_feed_results`.
+
+    Returns:
+        Tuple[List[dict], Dict[str, dict]]: All scraped articles, and the updated
+        per-feed state ({'url', 'etag', 'last_modified', 'status',
+        'high_water_published', 'high_water_guid'}) to persist.
+    """
+    articles: List[Dict[str, str]] = []
+    new_state: Dict[str, dict] = {}
+    not_modified = 0
+    failed = 0
+    for result in iter_feed_results(sources, feed_state, max_workers, timeout, max_per_host):
+        articles.extend(result['articles'])
+        not_modified += result['status'] == 304
+        failed += result['error'] is not None
+        new_state[result['name']] = feed_state_entry(result)
+
+    if new_state:
+        logger.info(
+            f"Scraped {len(articles)} articles from {len(new_state)} feeds "
+            f"({not_modified} not modified, {failed} failed)."
+        )
+    return articles, new_state
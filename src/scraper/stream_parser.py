@@ -0,0 +1,196 @@
+#
+# src/scraper/stream_parser.py
+#
+# An incremental RSS/Atom parser. The feed body is fed to an XMLPullParser
+# chunk by chunk as it comes off the socket, and each <item>/<entry> is
+# turned into an article as soon as its closing tag arrives, then freed.
+#
+# Feeds list their newest items first, so once a parse reaches items the
+# feed has already given us, the rest of the document is old news: the
+# parser stops and the caller stops reading the response. Each feed's
+# high-water mark is the publication time and GUID of the newest item
+# seen. Reaching the mark's GUID stops the parse at once; items published
+# before the mark are skipped, and stop it after a few in a row
+# (`scraper.high_water_grace`), to tolerate feeds that are only roughly
+# ordered. Feeds without dates fall back to the GUID alone.
+#
+# Publication dates (RFC 822 <pubDate>, or ISO 8601 in Atom and
+# <dc:date>) are returned as naive UTC datetimes, which is how
+# published_timestamp and the high-water mark are stored.
+#
+
+import zlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import XMLPullParser
+
+from src.utils.config_loader import get_settings
+
+settings = get_settings()
+HIGH_WATER_GRACE = settings.get('scraper.high_water_grace', 3)
+READ_CHUNK_SIZE = settings.get('scraper.read_chunk_size', 65536)
+
+_ITEM_TAGS = {'item', 'entry'}
+_DATE_TAGS = ('pubDate', 'published', 'updated', 'date')
+
+def _local_name(tag: str) -> str:
+    """ Drops the '{namespace}' prefix ElementTree puts on namespaced tags. """
+    return tag.rsplit('}', 1)[-1]
+
+def parse_pub_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an RFC 822 or ISO 8601 date into a naive UTC datetime.
+    Dates without a zone are taken as UTC. Returns None if it can't be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _item_fields(element) -> dict:
+    """ Pulls headline, link, GUID and publication date out of an <item> or <entry>. """
+    fields = {'headline': None, 'url': None, 'guid': None, 'published': None}
+    dates = {}
+    for child in element:
+        name = _local_name(child.tag)
+        text = (child.text or '').strip()
+        if name == 'title':
+            fields['headline'] = text or None
+        elif name == 'link':
+            # RSS puts the URL in the text; Atom in href, possibly several with rel="alternate" preferred.
+            href = child.get('href')
+            if href is None:
+                fields['url'] = text or fields['url']
+            elif fields['url'] is None or child.get('rel', 'alternate') == 'alternate':
+                fields['url'] = href
+        elif name in ('guid', 'id'):
+            fields['guid'] = text or None
+        elif name in _DATE_TAGS and text:
+            dates.setdefault(name, text)
+    for name in _DATE_TAGS:
+        if name in dates:
+            fields['published'] = parse_pub_date(dates[name])
+            break
+    if fields['guid'] is None:
+        fields['guid'] = fields['url']
+    return fields
+
+def iter_items(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """
+    Yields {'headline', 'url', 'guid', 'published'} for each item as soon as
+    it has been read, consuming `chunks` only as far as needed.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: The document is not well-formed XML.
+    """
+    parser = XMLPullParser(events=('end',))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if _local_name(element.tag) in _ITEM_TAGS:
+                yield _item_fields(element)
+                # Items are done with once yielded; keep memory flat on big feeds.
+                element.clear()
+    parser.close()
+    for _, element in parser.read_events():
+        if _local_name(element.tag) in _ITEM_TAGS:
+            yield _item_fields(element)
+
+def is_older(item: dict, high_water_published: Optional[datetime]) -> bool:
+    """ True if `item` was published before the feed's high-water mark. """
+    if high_water_published is None or item['published'] is None:
+        return False
+    return item['published'] < high_water_published
+
+class FeedParse:
+    """
+    Parses one feed against its high-water mark. After `parse`, `articles`
+    holds the new items, `high_water_published`/`high_water_guid` the mark
+    to store, `skipped` how many old items were passed over, and
+    `stopped_early` whether the rest of the document was left unread.
+    """
+
+    def __init__(self, label: str, high_water_published: Optional[datetime] = None,
+                 high_water_guid: Optional[str] = None, grace: int = HIGH_WATER_GRACE):
+        self.label = label
+        self.previous_published = high_water_published
+        self.previous_guid = high_water_guid
+        self.grace = max(1, grace)
+        self.articles: List[dict] = []
+        self.high_water_published = high_water_published
+        self.high_water_guid = high_water_guid
+        self.skipped = 0
+        self.stopped_early = False
+
+    def parse(self, chunks: Iterable[bytes]) -> 'FeedParse':
+        """
+        Reads items from `chunks` until the document ends or `grace`
+        consecutive items are older than the stored mark.
+
+        Raises:
+            xml.etree.ElementTree.ParseError: The document is not well-formed XML.
+        """
+        consecutive_old = 0
+        newest_published, newest_guid, first_guid = None, None, None
+        for item in iter_items(chunks):
+            if self.previous_guid is not None and item['guid'] == self.previous_guid:
+                self.skipped += 1
+                self.stopped_early = True
+                break
+            if is_older(item, self.previous_published):
+                self.skipped += 1
+                consecutive_old += 1
+                if consecutive_old >= self.grace:
+                    self.stopped_early = True
+                    break
+                continue
+            consecutive_old = 0
+            if first_guid is None:
+                first_guid = item['guid']
+            if item['published'] is not None and (newest_published is None or item['published'] > newest_published):
+                newest_published, newest_guid = item['published'], item['guid']
+            if item['headline'] and item['url']:
+                self.articles.append({
+                    'headline': item['headline'],
+                    'url': item['url'],
+                    'source': self.label,
+                    'published_timestamp': item['published'],
+                })
+        # The mark only moves forward, and only once the parse has succeeded.
+        if newest_published is not None:
+            if self.previous_published is None or newest_published > self.previous_published:
+                self.high_water_published, self.high_water_guid = newest_published, newest_guid
+        elif first_guid is not None and self.previous_published is None:
+            # No dates to go by: the first (newest) item marks where this read began.
+            self.high_water_guid = first_guid
+        return self
+
+def read_chunks(response, gzipped: bool = False, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Reads an HTTP response in chunks, decompressing gzip on the fly. Whatever
+    the consumer doesn't ask for is never read off the socket.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            break
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+            if not chunk:
+                continue
+        yield chunk
+    if decompressor is not None:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
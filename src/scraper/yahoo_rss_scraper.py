@@ -1,11 +1,9 @@
-import feedparser
 from typing import List, Dict
 from src.utils.logger import logger
-from src.utils.config_loader import load_config
+from src.scraper import feed_scraper
 
-config = load_config()
-SCRAPER_CONFIG = config.get('scraper', {})
-RSS_URL = SCRAPER_CONFIG.get('sources', {}).get('yahoo_rss')
+YAHOO_SOURCE = next((s for s in feed_scraper.load_sources() if s['name'] == 'yahoo_rss'), None)
+RSS_URL = YAHOO_SOURCE['url'] if YAHOO_SOURCE else None
 
 def scrape_yahoo_rss() -> List[Dict[str, str]]:
     articles: List[Dict[str, str]] = []
@@ -15,18 +13,11 @@ def scrape_yahoo_rss() -> List[Dict[str, str]]:
         return articles
 
     logger.info(f"Starting RSS scrape for Yahoo Finance: {RSS_URL}")
-    
-    try:
-        feed = feedparser.parse(RSS_URL)
-        for entry in feed.entries:
-            headline = entry.get("title")
-            url = entry.get("link")
-            if headline and url:
-                articles.append({"headline": headline, "url": url})
 
+    # Unconditional fetch: the single-feed path keeps no validator state.
+    result = feed_scraper.fetch_feed(YAHOO_SOURCE)
+    articles = result['articles']
+    if result['error'] is None:
         logger.info(f"Successfully scraped {len(articles)} articles from Yahoo RSS.")
 
-    except Exception as e:
-        logger.error(f"Error scraping Yahoo RSS feed: {e}", exc_info=True)
-    
     return articles
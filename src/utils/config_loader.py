@@ -4,33 +4,157 @@
 # This script contains a function to load configuration settings from a YAML file.
 # This allows us to manage settings like file paths and URLs in one central place.
 #
+# The file is read and parsed only once per process. Any setting can be
+# overridden from the environment with ETL_<SECTION>__<KEY>, for example:
+#
+#   ETL_DATABASE__PATH=/tmp/test.db
+#   ETL_SENTIMENT__BATCH_SIZE=64
+#   ETL_SENTIMENT__CACHE__ENABLED=false
+#
+
+# Standard library imports
+import copy
+import os
+from functools import lru_cache
+from typing import Any, Optional
 
 # Import the PyYAML library, which is needed to read .yaml files
 import yaml
 
-# Define the path to our settings file
-CONFIG_PATH = "config/settings.yaml"
+# Define the path to our settings file (overridable with ETL_CONFIG_PATH)
+CONFIG_PATH = os.environ.get("ETL_CONFIG_PATH", "config/settings.yaml")
 
-def load_config():
+# Prefix and nesting separator for environment-variable overrides.
+ENV_PREFIX = "ETL_"
+ENV_SEPARATOR = "__"
+
+def _read_config_file(path: str) -> dict:
     """
-    Loads the configuration from the settings.yaml file.
+    Reads and parses the YAML settings file.
 
     Returns:
-        dict: A dictionary containing all the configuration settings.
-              Returns an empty dictionary if the file cannot be found or read.
+        dict: The parsed settings, or an empty dictionary if the file cannot be
+              found or read.
     """
     try:
         # 'with open(...)' is the standard, safe way to open files in Python.
         # It ensures the file is automatically closed even if errors occur.
-        with open(CONFIG_PATH, 'r') as file:
+        with open(path, 'r') as file:
             # yaml.safe_load() parses the YAML file and converts it into a Python dictionary.
-            config = yaml.safe_load(file)
-        return config
+            return yaml.safe_load(file) or {}
     except FileNotFoundError:
         # This error happens if 'config/settings.yaml' doesn't exist.
-        print(f"Error: Configuration file not found at {CONFIG_PATH}")
+        print(f"Error: Configuration file not found at {path}")
         return {} # Return an empty dict to prevent the program from crashing
     except yaml.YAMLError as e:
         # This error happens if the YAML file has a syntax error.
         print(f"Error parsing YAML file: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+def _apply_env_overrides(config: dict, environ) -> dict:
+    """
+    Applies ETL_<SECTION>__<KEY>=value overrides on top of the file settings.
+    Values are parsed as YAML scalars, so "64" becomes 64 and "false" becomes False.
+    """
+    for name, raw_value in environ.items():
+        if not name.startswith(ENV_PREFIX) or ENV_SEPARATOR not in name:
+            continue
+        keys = [key.lower() for key in name[len(ENV_PREFIX):].split(ENV_SEPARATOR)]
+        try:
+            value = yaml.safe_load(raw_value)
+        except yaml.YAMLError:
+            value = raw_value
+
+        node = config
+        for key in keys[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node[keys[-1]] = value
+    return config
+
+class Settings:
+    """
+    The parsed application settings.
+
+    `get()` takes a dotted path and a default, and coerces the value to the
+    default's type, so a typo'd or env-provided string can't leak into code
+    expecting a number:
+
+        settings.get('sentiment.batch_size', 32)  ->  int
+    """
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    @property
+    def raw(self) -> dict:
+        """ The full settings as a plain dictionary. """
+        return self._data
+
+    def section(self, name: str) -> dict:
+        """ Returns a top-level section (e.g. 'scraper'), or an empty dict. """
+        value = self._data.get(name)
+        return value if isinstance(value, dict) else {}
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """
+        Looks up a dotted path such as 'database.path'.
+
+        Args:
+            path (str): Dot-separated keys.
+            default: Returned when the path is missing or empty. When not None,
+                     its type is also the type the value is coerced to.
+        """
+        node: Any = self._data
+        for key in path.split('.'):
+            if not isinstance(node, dict) or node.get(key) is None:
+                return default
+            node = node[key]
+        return _coerce(path, node, default)
+
+def _coerce(path: str, value: Any, default: Any) -> Any:
+    """ Converts `value` to the type of `default`, falling back to `default` if it can't. """
+    if default is None:
+        return value
+    try:
+        if isinstance(default, bool):
+            if isinstance(value, str):
+                return value.strip().lower() in ('1', 'true', 'yes', 'on')
+            return bool(value)
+        if isinstance(default, (int, float, str)) and not isinstance(value, bool):
+            return type(default)(value)
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, type(default)):
+        return value
+    print(f"Error: setting '{path}' has invalid value {value!r}; using {default!r}.")
+    return default
+
+@lru_cache(maxsize=None)
+def _load_settings(path: str) -> Settings:
+    return Settings(_apply_env_overrides(_read_config_file(path), os.environ))
+
+def get_settings(path: Optional[str] = None) -> Settings:
+    """
+    Returns the process-wide settings, reading the file on the first call only.
+
+    Args:
+        path (str, optional): Settings file. Defaults to CONFIG_PATH.
+    """
+    return _load_settings(path or CONFIG_PATH)
+
+def reload_settings():
+    """ Forgets the cached settings so the next call re-reads the file and environment. """
+    _load_settings.cache_clear()
+
+def load_config():
+    """
+    Loads the configuration from the settings.yaml file.
+
+    Returns:
+        dict: A dictionary containing all the configuration settings.
+              Returns an empty dictionary if the file cannot be found or read.
+              Each caller gets its own copy of the cached settings.
+    """
+    return copy.deepcopy(get_settings().raw)
@@ -4,11 +4,193 @@
 # This script sets up a centralized logging system for the entire application.
 # It creates a logger that writes messages to both the console and a file.
 #
+# By default (logging.async) the calling thread only puts the record on a
+# queue; a background listener thread formats it and does the file and
+# console I/O, so a slow disk or terminal never stalls the pipeline.
+# Records still queued at exit are flushed.
+#
+# Output is plain text or one JSON object per line (logging.format).
+#
+# Repetitive events can be rate-limited by key: pass
+# `extra={'rate_key': ...}` and at most `logging.rate_limit.burst` records
+# per key get through each `logging.rate_limit.interval` seconds. The next
+# record let through says how many were suppressed.
+#
+# Hot paths should log with %-style arguments (logger.debug("x=%s", x)),
+# not f-strings, so nothing is formatted when the level is disabled.
+#
 
 # Import the standard Python logging library
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
 # Import our function to load settings
-from src.utils.config_loader import load_config
+from src.utils.config_loader import get_settings
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class TextFormatter(logging.Formatter):
+    """ The classic text format, noting how many similar records were rate-limited. """
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            line += f" ({suppressed} similar messages suppressed)"
+        dropped = getattr(record, 'dropped', 0)
+        if dropped:
+            line += f" ({dropped} earlier records dropped: log queue full)"
+        return line
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON object per record: time, level, message, plus any `extra` fields. """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """ Lets through at most `burst` records per `rate_key` every `interval` seconds. """
+
+    def __init__(self, burst: int, interval: float):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        # rate_key -> [window start, records let through, records suppressed]
+        self._windows: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'rate_key', None)
+        if key is None or self.burst <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+
+class _AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener without formatting them first, so the
+    calling thread pays only for the queue put. (The stock QueueHandler
+    formats eagerly, to make records picklable for other processes.)
+    A full queue drops the record rather than block the caller; the next
+    record that gets through carries the count.
+    """
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        dropped = self.dropped
+        if dropped:
+            record.dropped = dropped
+        try:
+            self.queue.put_nowait(record)
+            self.dropped -= dropped
+        except queue.Full:
+            self.dropped += 1
+
+# Logger name -> its running listener.
+_listeners: Dict[str, logging.handlers.QueueListener] = {}
+
+def stop_listener(name: str):
+    """ Flushes a logger's queued records and stops its listener thread. """
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+
+def flush_all():
+    """ Flushes and stops every listener; later records are lost. Registered to run at exit. """
+    for name in list(_listeners):
+        stop_listener(name)
+
+def _log_directly_in_child():
+    """
+    A forked child has each async logger's queue but not its listener
+    thread, so those loggers write to their handlers synchronously instead.
+    """
+    for name, listener in list(_listeners.items()):
+        target = logging.getLogger(name)
+        for handler in list(target.handlers):
+            if isinstance(handler, _AsyncQueueHandler) and handler.queue is listener.queue:
+                target.removeHandler(handler)
+        for handler in listener.handlers:
+            target.addHandler(handler)
+    _listeners.clear()
+
+# Fork hooks can't be unregistered, so there is one for all loggers rather
+# than one per `configure_logger` call.
+os.register_at_fork(after_in_child=_log_directly_in_child)
+
+def configure_logger(logger: logging.Logger, level: int, handlers: List[logging.Handler],
+                     async_mode: bool = True, json_format: bool = False, queue_size: int = 10000,
+                     rate_limit_burst: int = 5, rate_limit_interval: float = 60.0) -> logging.Logger:
+    """
+    Attaches `handlers` to `logger`, either directly or behind a queue and
+    a background listener, with the chosen format and rate limiting.
+    Replaces any earlier configuration (and stops its listener).
+    """
+    stop_listener(logger.name)
+    logger.setLevel(level)
+    # Prevent messages from being duplicated if the function is called multiple times
+    if logger.hasHandlers():
+        logger.handlers.clear()
+    logger.filters.clear()
+
+    formatter = JsonFormatter() if json_format else TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    # On the logger itself, so a suppressed record is dropped before it is queued.
+    logger.addFilter(RateLimitFilter(rate_limit_burst, rate_limit_interval))
+
+    if not async_mode:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return logger
+
+    queue_handler = _AsyncQueueHandler(queue.Queue(max(1, queue_size)))
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[logger.name] = listener
+    logger.addHandler(queue_handler)
+    return logger
 
 def setup_logger():
     """
@@ -18,45 +200,38 @@ def setup_logger():
         logging.Logger: A configured logger object.
     """
     # Load our settings from the YAML file
-    config = load_config()
-    log_config = config.get('logging', {}) # Get the 'logging' section
-    log_path = log_config.get('path', 'data/logs/pipeline.log')
-    log_level_str = log_config.get('level', 'INFO')
+    settings = get_settings()
+    log_path = settings.get('logging.path', 'data/logs/pipeline.log')
+    log_level_str = settings.get('logging.level', 'INFO')
 
     # Convert the string log level (e.g., "INFO") into a logging constant (e.g., logging.INFO)
     log_level = getattr(logging, log_level_str.upper(), logging.INFO)
 
     # Get a logger instance. Using a name is good practice if you have multiple loggers.
     logger = logging.getLogger('ETL_Pipeline_Logger')
-    logger.setLevel(log_level)
-    
-    # Prevent messages from being duplicated if the function is called multiple times
-    if logger.hasHandlers():
-        logger.handlers.clear()
-
-    # Define the format for our log messages
-    # Example: 2025-10-20 20:45:15,123 - INFO - This is a log message.
-    formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
 
     # --- Create Handlers ---
     # Handlers are responsible for sending the log messages to a destination.
 
     # 1. File Handler: Writes log messages to our log file.
+    # Create the log directory on a fresh checkout instead of failing at import.
+    log_dir = os.path.dirname(log_path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
     file_handler = logging.FileHandler(log_path)
-    file_handler.setFormatter(formatter)
-    
+
     # 2. Stream Handler: Writes log messages to the console (terminal).
     stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
-
-    # Add both handlers to our logger
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
 
-    return logger
+    return configure_logger(
+        logger, log_level, [file_handler, stream_handler],
+        async_mode=settings.get('logging.async', True),
+        json_format=settings.get('logging.format', 'text').lower() == 'json',
+        queue_size=settings.get('logging.queue_size', 10000),
+        rate_limit_burst=settings.get('logging.rate_limit.burst', 5),
+        rate_limit_interval=settings.get('logging.rate_limit.interval', 60.0),
+    )
 
 # Create a single logger instance to be imported by other modules
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
+atexit.register(flush_all)
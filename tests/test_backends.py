@@ -0,0 +1,45 @@
+#
+# tests/test_backends.py
+# Unit tests for backend selection and the backend parity report.
+#
+
+import unittest
+
+from src.nlp import backends, parity
+
+class TestBackendRegistry(unittest.TestCase):
+    """ Test suite for choosing backends by name. """
+
+    def test_each_backend_has_its_own_version(self):
+        """ Tests that backends never share a sentiment_model_version. """
+        versions = [cls.version for cls in backends.BACKENDS.values()]
+        self.assertEqual(len(versions), len(set(versions)))
+
+    def test_fp32_keeps_original_version(self):
+        """ Tests that the default backend keeps the pre-backend version string. """
+        backend = backends.get_backend('fp32', 'ProsusAI/finbert')
+        self.assertEqual(backend.version, 'finbert_v1_base')
+
+    def test_unknown_backend_falls_back_to_default(self):
+        """ Tests that a typo'd backend name doesn't stop the pipeline. """
+        backend = backends.get_backend('fp64', 'ProsusAI/finbert', num_threads=4)
+        self.assertIsInstance(backend, backends.Fp32Backend)
+        self.assertEqual(backend.num_threads, 4)
+
+    def test_zero_threads_means_default(self):
+        """ Tests that 0 threads leaves PyTorch's default in place. """
+        self.assertIsNone(backends.get_backend('int8', 'ProsusAI/finbert', num_threads=0).num_threads)
+
+class TestParityReport(unittest.TestCase):
+    """ Test suite for comparing a backend's output to the reference. """
+
+    def test_compare_to_reference(self):
+        """ Tests label agreement and mean score difference. """
+        reference = {'labels': ['Positive', 'Negative', 'Neutral', 'Neutral'], 'scores': [0.9, 0.8, 0.7, 0.6]}
+        candidate = {'labels': ['Positive', 'Negative', 'Positive', 'Neutral'], 'scores': [0.8, 0.8, 0.5, 0.6]}
+        report = parity.compare_to_reference(reference, candidate)
+        self.assertAlmostEqual(report['agreement'], 0.75)
+        self.assertAlmostEqual(report['mean_abs_score_diff'], 0.075)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#
+# tests/test_benchmarks.py
+# Tests for the offline benchmark harness: baseline comparison and a small
+# end-to-end run with the stub model.
+#
+
+import unittest
+
+from benchmarks import run
+
+def _result(model='stub', **per_second):
+    return {
+        'meta': {'model': model},
+        'stages': {stage: {'records': 100, 'seconds': 1.0, 'per_second': value} for stage, value in per_second.items()},
+    }
+
+class TestBenchmarkCompare(unittest.TestCase):
+    """ Test suite for comparing a run against a baseline. """
+
+    def test_flags_drops_beyond_tolerance(self):
+        """ Tests that only stages slower than (1 - tolerance) x baseline are regressions. """
+        baseline = _result(scrape=1000.0, load=1000.0)
+        current = _result(scrape=900.0, load=800.0)
+
+        report = {c['stage']: c for c in run.compare(current, baseline, tolerance=0.15)}
+
+        self.assertFalse(report['scrape']['regression'])
+        self.assertTrue(report['load']['regression'])
+
+    def test_skips_stages_missing_or_skipped(self):
+        """ Tests that skipped stages and stages absent from the baseline are not compared. """
+        baseline = _result(scrape=1000.0)
+        current = _result(scrape=1000.0, load=1.0)
+        current['stages']['scrape']['skipped'] = "unavailable"
+
+        self.assertEqual(run.compare(current, baseline), [])
+
+    def test_different_models_are_not_compared(self):
+        """ Tests that stub and real-model runs are never compared to each other. """
+        self.assertEqual(run.compare(_result('stub', infer=1.0), _result('real', infer=1000.0)), [])
+
+class TestBenchmarkRun(unittest.TestCase):
+    """ Smoke test for a tiny benchmark run with the stub model. """
+
+    def test_stub_run_measures_every_stage(self):
+        """ Tests that a stub run reports every stage, either measured or skipped with a reason. """
+        results = run.run_benchmarks(headline_count=40, feed_count=2, model='stub', repeats=1)
+
+        self.assertEqual(results['meta']['model'], 'stub')
+        for stage in run.STAGES:
+            stage_result = results['stages'][stage]
+            self.assertTrue(stage_result.get('skipped') or stage_result['per_second'] > 0, stage)
+        for stage in ('scrape', 'tokenize', 'infer', 'load'):
+            self.assertGreater(results['stages'][stage]['per_second'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#
+# tests/test_config_loader.py
+# Unit tests for the cached settings object and its environment overrides.
+#
+
+import os
+import tempfile
+import unittest
+
+from src.utils import config_loader
+from src.utils.config_loader import Settings
+
+class TestSettings(unittest.TestCase):
+    """ Test suite for Settings lookups and type coercion. """
+
+    def setUp(self):
+        self.settings = Settings({
+            'sentiment': {'batch_size': '64', 'cache': {'enabled': 'false'}},
+            'daemon': {'jitter': 'lots'},
+            'database': {'path': 'data/x.db'},
+        })
+
+    def test_dotted_lookup_with_default(self):
+        """ Tests nested lookups and the default for missing paths. """
+        self.assertEqual(self.settings.get('database.path', 'fallback.db'), 'data/x.db')
+        self.assertEqual(self.settings.get('database.missing', 'fallback.db'), 'fallback.db')
+        self.assertEqual(self.settings.get('nothing.here.at.all'), None)
+
+    def test_values_are_coerced_to_default_type(self):
+        """ Tests that string values become the type of the default. """
+        self.assertEqual(self.settings.get('sentiment.batch_size', 32), 64)
+        self.assertIs(self.settings.get('sentiment.cache.enabled', True), False)
+
+    def test_invalid_value_falls_back_to_default(self):
+        """ Tests that an unconvertible value is replaced by the default. """
+        self.assertEqual(self.settings.get('daemon.jitter', 0.1), 0.1)
+
+class TestLoading(unittest.TestCase):
+    """ Test suite for parsing the file once and applying env overrides. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'settings.yaml')
+        with open(self.path, 'w') as f:
+            f.write("database:\n  path: data/a.db\nsentiment:\n  batch_size: 8\n")
+        config_loader.reload_settings()
+
+    def tearDown(self):
+        config_loader.reload_settings()
+        self.tmp_dir.cleanup()
+
+    def test_settings_are_parsed_once(self):
+        """ Tests that repeated calls return the same cached object. """
+        self.assertIs(config_loader.get_settings(self.path), config_loader.get_settings(self.path))
+
+    def test_environment_overrides(self):
+        """ Tests that ETL_<SECTION>__<KEY> variables override and extend the file. """
+        environ = {
+            'ETL_SENTIMENT__BATCH_SIZE': '128',
+            'ETL_SENTIMENT__CACHE__ENABLED': 'false',
+            'ETL_DATABASE__PATH': '/tmp/override.db',
+            'UNRELATED': 'ignored',
+        }
+        data = config_loader._apply_env_overrides(config_loader._read_config_file(self.path), environ)
+        settings = Settings(data)
+        self.assertEqual(settings.get('sentiment.batch_size', 32), 128)
+        self.assertIs(settings.get('sentiment.cache.enabled', True), False)
+        self.assertEqual(settings.get('database.path', ''), '/tmp/override.db')
+
+if __name__ == '__main__':
+    unittest.main()
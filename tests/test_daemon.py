@@ -0,0 +1,86 @@
+#
+# tests/test_daemon.py
+# Unit tests for the daemon's per-feed polling schedule.
+#
+
+import random
+import unittest
+from unittest.mock import patch
+
+from src.etl import daemon
+
+class FakeClock:
+    """ A controllable stand-in for time.monotonic. """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestFeedSchedule(unittest.TestCase):
+    """ Test suite for FeedSchedule intervals, jitter and backoff. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sources = [
+            {'name': 'fast', 'url': 'http://a', 'label': 'A', 'interval': 60},
+            {'name': 'slow', 'url': 'http://b', 'label': 'B', 'interval': None},
+        ]
+        self.schedule = daemon.FeedSchedule(
+            self.sources, poll_interval=300, jitter=0.0, max_backoff=1000,
+            clock=self.clock, rng=random.Random(0)
+        )
+
+    def test_all_feeds_due_on_startup(self):
+        """ Tests that every feed is polled on the first cycle. """
+        self.assertEqual([s['name'] for s in self.schedule.due()], ['fast', 'slow'])
+
+    def test_each_feed_uses_its_own_interval(self):
+        """ Tests per-feed intervals, with the global poll interval as fallback. """
+        self.schedule.record('fast', True)
+        self.schedule.record('slow', True)
+        self.assertEqual(self.schedule.next_due['fast'], 1060.0)
+        self.assertEqual(self.schedule.next_due['slow'], 1300.0)
+        self.assertEqual(self.schedule.seconds_until_next(), 60.0)
+
+    def test_failures_back_off_exponentially_up_to_cap(self):
+        """ Tests that delays double per failure and reset after a success. """
+        delays = []
+        for _ in range(6):
+            self.schedule.record('fast', False)
+            delays.append(self.schedule.next_due['fast'] - self.clock.now)
+        self.assertEqual(delays, [120, 240, 480, 960, 1000, 1000])
+
+        self.schedule.record('fast', True)
+        self.assertEqual(self.schedule.next_due['fast'] - self.clock.now, 60)
+
+    def test_long_outage_stays_at_cap(self):
+        """ Tests that a feed failing for weeks keeps the capped delay instead of overflowing. """
+        # Intervals read from settings are floats, and float * huge int overflows.
+        self.schedule.poll_interval = 300.0
+        self.schedule.failures['slow'] = 5000
+        self.schedule.record('slow', False)
+        self.assertEqual(self.schedule.failures['slow'], 5001)
+        self.assertEqual(self.schedule.next_due['slow'] - self.clock.now, 1000)
+
+    def test_jitter_stays_within_bounds(self):
+        """ Tests that jittered delays stay within the configured fraction. """
+        schedule = daemon.FeedSchedule(self.sources, jitter=0.1, clock=self.clock, rng=random.Random(1))
+        for _ in range(50):
+            self.assertTrue(54 <= schedule.delay_for('fast') <= 66)
+
+    @patch('src.etl.daemon.pipeline.run_pipeline')
+    def test_run_cycle_records_per_feed_outcome(self, mock_run_pipeline):
+        """ Tests that a 304 counts as success and a network error as failure. """
+        mock_run_pipeline.return_value = {'feeds': {
+            'fast': {'status': 304},
+            'slow': {'status': None},
+        }}
+        self.assertTrue(daemon.run_cycle(self.schedule))
+        self.assertEqual(self.schedule.failures, {'fast': 0, 'slow': 1})
+        # Nothing is due again straight away.
+        self.assertFalse(daemon.run_cycle(self.schedule))
+
+if __name__ == '__main__':
+    unittest.main()
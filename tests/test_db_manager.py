@@ -3,9 +3,14 @@
 # Unit tests for the database manager module, updated for the new hash function.
 #
 
+import os
+import sqlite3
+import tempfile
+import threading
 import unittest
 import hashlib
 from datetime import datetime
+from unittest.mock import patch
 # We need to import the module we want to test
 from src.database import db_manager
 
@@ -83,6 +88,161 @@ class TestDbManagerHelpers(unittest.TestCase):
         hash2 = db_manager._generate_hash(headline, url, date2)
         self.assertNotEqual(hash1, hash2)
 
+class TestBulkInsert(unittest.TestCase):
+    """
+    Test suite for the single-transaction bulk loader, run against a
+    temporary database file.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db_path_patch = patch.object(db_manager, 'DB_PATH', self.db_path)
+        self.db_path_patch.start()
+        db_manager.create_database()
+
+    def tearDown(self):
+        self.db_path_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _row(self, n):
+        return {
+            'source': 'Test',
+            'headline': f"Headline number {n}",
+            'article_url': f"http://example.com/{n}",
+            'finbert_result': {'label': 'Neutral', 'score': 0.5}
+        }
+
+    def test_insert_articles_counts_duplicates(self):
+        """ Tests that re-loading the same rows is reported as duplicates. """
+        rows = [self._row(n) for n in range(3)]
+        self.assertEqual(db_manager.insert_articles(rows), {'inserted': 3, 'duplicates': 0})
+        # Two old rows plus one new one.
+        rows = [self._row(1), self._row(2), self._row(3)]
+        self.assertEqual(db_manager.insert_articles(rows), {'inserted': 1, 'duplicates': 2})
+
+        with sqlite3.connect(self.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM news_sentiment").fetchone()[0]
+        self.assertEqual(count, 4)
+
+    def test_insert_articles_uses_wal(self):
+        """ Tests that the bulk loader switches the database to WAL mode. """
+        db_manager.insert_articles([self._row(0)])
+        with sqlite3.connect(self.db_path) as conn:
+            mode = conn.execute("PRAGMA journal_mode;").fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_get_existing_hashes_matches_stored_rows(self):
+        """ Tests that the probe finds exactly the fingerprints that were inserted. """
+        scraped_timestamp = datetime(2025, 10, 24, 9, 30)
+        stored = self._row(0)
+        stored['scraped_timestamp'] = scraped_timestamp
+        db_manager.insert_articles([stored])
+
+        stored_hash = db_manager.compute_article_hash(
+            stored['headline'], stored['article_url'], scraped_timestamp
+        )
+        new_hash = db_manager.compute_article_hash("Unseen", "http://example.com/new", scraped_timestamp)
+
+        self.assertEqual(db_manager.get_existing_hashes([stored_hash, new_hash]), {stored_hash})
+
+    def test_get_existing_hashes_chunks_large_probes(self):
+        """ Tests that probes larger than one chunk are resolved in full. """
+        db_manager.insert_articles([self._row(n) for n in range(5)])
+        with sqlite3.connect(self.db_path) as conn:
+            stored = {row[0] for row in conn.execute("SELECT article_hash FROM news_sentiment")}
+
+        probe = list(stored) + [f"missing-{n}" for n in range(20)]
+        with patch.object(db_manager, 'HASH_PROBE_CHUNK_SIZE', 3):
+            self.assertEqual(db_manager.get_existing_hashes(probe), stored)
+
+    def test_feed_state_round_trip(self):
+        """ Tests that feed validators are upserted and read back per feed. """
+        db_manager.save_feed_states({'yahoo': {'url': 'http://a', 'etag': '"1"', 'last_modified': None, 'status': 200}})
+        db_manager.save_feed_states({'yahoo': {'url': 'http://a', 'etag': '"2"', 'last_modified': None, 'status': 304}})
+        states = db_manager.get_feed_states()
+        self.assertEqual(states, {'yahoo': {'url': 'http://a', 'etag': '"2"', 'last_modified': None, 'status': 304,
+                                            'high_water_published': None, 'high_water_guid': None}})
+
+        mark = {'high_water_published': datetime(2025, 10, 24, 8, 0, 30), 'high_water_guid': 'http://a/1'}
+        db_manager.save_feed_states({'yahoo': dict(states['yahoo'], **mark)})
+        self.assertEqual({k: db_manager.get_feed_states()['yahoo'][k] for k in mark}, mark)
+
+    def test_create_database_adds_new_columns_to_old_tables(self):
+        """ Tests that an older feed_state table gets the high-water columns. """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DROP TABLE feed_state")
+            conn.execute("CREATE TABLE feed_state (feed_name TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT NULL, "
+                         "last_modified TEXT NULL, last_status INTEGER NULL, last_checked_at DATETIME NOT NULL)")
+        db_manager.create_database()
+        db_manager.save_feed_states({'yahoo': {'url': 'http://a', 'high_water_guid': 'g'}})
+        self.assertEqual(db_manager.get_feed_states()['yahoo']['high_water_guid'], 'g')
+
+    def test_connection_reuse_keeps_one_connection(self):
+        """ Tests that reuse mode hands out the same connection until closed. """
+        db_manager.enable_connection_reuse()
+        try:
+            first = db_manager._connect()
+            db_manager._release(first)
+            self.assertIs(db_manager._connect(), first)
+            db_manager.insert_articles([self._row(0)])
+        finally:
+            db_manager.close_connections()
+        self.assertIsNot(db_manager._connect(), first)
+
+    def test_connections_of_exited_threads_are_closed(self):
+        """ Tests that short-lived threads don't leave their reused connections open. """
+        db_manager.enable_connection_reuse()
+        try:
+            for _ in range(3):
+                worker = threading.Thread(target=db_manager.get_feed_states)
+                worker.start()
+                worker.join()
+            db_manager.get_feed_states()
+            self.assertEqual(list(db_manager._open_connections), [threading.current_thread()])
+        finally:
+            db_manager.close_connections()
+
+    def test_insert_articles_stores_result_model_version(self):
+        """ Tests that each row records the version of the backend that scored it. """
+        row = self._row(0)
+        row['finbert_result'] = {'label': 'Positive', 'score': 0.9, 'model_version': 'finbert_v1_int8_dynamic'}
+        db_manager.insert_articles([row, self._row(1)])
+        with sqlite3.connect(self.db_path) as conn:
+            versions = [r[0] for r in conn.execute("SELECT sentiment_model_version FROM news_sentiment ORDER BY id")]
+        self.assertEqual(versions, ['finbert_v1_int8_dynamic', 'finbert_v1_base'])
+
+    def test_insert_articles_stores_published_timestamp(self):
+        """ Tests that a row's published_timestamp is stored, and left NULL when absent. """
+        row = self._row(0)
+        row['published_timestamp'] = datetime(2025, 10, 24, 7, 30)
+        db_manager.insert_articles([row, self._row(1)])
+        with sqlite3.connect(self.db_path) as conn:
+            published = [r[0] for r in conn.execute("SELECT published_timestamp FROM news_sentiment ORDER BY id")]
+        self.assertEqual(published, ['2025-10-24 07:30:00', None])
+
+    def test_insert_articles_empty(self):
+        """ Tests that an empty batch is a no-op. """
+        self.assertEqual(db_manager.insert_articles([]), {'inserted': 0, 'duplicates': 0})
+
+    def test_pipeline_run_round_trip(self):
+        """ Tests that recorded runs are read back newest first, with defaults for missing counts. """
+        started = datetime(2025, 10, 24, 9, 30)
+        first = db_manager.record_pipeline_run({
+            'started_at': started, 'finished_at': started, 'mode': 'batch', 'duration_seconds': 1.5,
+            'articles_scraped': 10, 'articles_inserted': 8, 'articles_skipped': 2, 'duplicate_rate': 0.2,
+        })
+        second = db_manager.record_pipeline_run({
+            'started_at': started, 'finished_at': started, 'mode': 'streaming', 'status': 'no_articles',
+            'duration_seconds': 0.1,
+        })
+
+        runs = db_manager.get_pipeline_runs()
+        self.assertEqual([r['id'] for r in runs], [second, first])
+        self.assertEqual(runs[1]['articles_inserted'], 8)
+        self.assertEqual(runs[1]['status'], 'ok')
+        self.assertEqual(runs[0]['articles_inserted'], 0)
+
 # This standard block allows running the tests directly from this file
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+#
+# tests/test_entities.py
+# Tests for the Aho-Corasick entity tagger and how its matches are stored.
+#
+
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.nlp.entities import AhoCorasick, EntityTagger
+
+ENTRIES = [
+    {'symbol': 'BAC', 'name': 'Bank of America Corporation', 'aliases': ['Bank of America']},
+    {'symbol': 'AMER', 'name': 'America Corp', 'aliases': ['America']},
+    {'symbol': 'META', 'name': 'Meta Platforms Inc.', 'aliases': ['Meta', 'Facebook']},
+    {'symbol': 'F', 'name': 'Ford Motor Company', 'aliases': ['Ford']},
+    {'symbol': 'ON', 'name': 'ON Semiconductor', 'aliases': []},
+]
+
+class TestAhoCorasick(unittest.TestCase):
+    """ Test suite for the multi-pattern matcher itself. """
+
+    def test_matches_agree_with_naive_search(self):
+        """ Tests that every occurrence of every pattern is reported, including overlaps. """
+        rng = random.Random(7)
+        patterns = sorted({''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(40)})
+        automaton = AhoCorasick(patterns)
+        for _ in range(50):
+            text = ''.join(rng.choice('abcd') for _ in range(30))
+            expected = {(i + len(p), n) for n, p in enumerate(patterns)
+                        for i in range(len(text)) if text.startswith(p, i)}
+            self.assertEqual(set(automaton.iter(text)), expected)
+
+class TestEntityTagger(unittest.TestCase):
+    """ Test suite for word boundaries, overlaps and symbol rules. """
+
+    def setUp(self):
+        self.tagger = EntityTagger(ENTRIES, min_symbol_length=2)
+
+    def _symbols(self, headline):
+        return [m['symbol'] for m in self.tagger.tag(headline)]
+
+    def test_longest_match_wins(self):
+        """ Tests that 'Bank of America' is one entity, not BAC plus America. """
+        self.assertEqual(self._symbols("Bank of America beats estimates"), ['BAC'])
+        self.assertEqual(self._symbols("America Corp shares slide"), ['AMER'])
+
+    def test_whole_words_only(self):
+        """ Tests that aliases inside longer words don't match. """
+        self.assertEqual(self._symbols("Metal prices rise"), [])
+        self.assertEqual(self._symbols("Meta and Facebook, again: META"), ['META'])
+
+    def test_symbols_need_exact_case_or_cashtag(self):
+        """ Tests that short or lower-case symbols don't match ordinary words. """
+        self.assertEqual(self._symbols("Stocks move on earnings"), [])
+        self.assertEqual(self._symbols("ON jumps after guidance"), ['ON'])
+        # 'F' is shorter than min_symbol_length, so only the cashtag matches.
+        self.assertEqual(self._symbols("F rises"), [])
+        self.assertEqual(self._symbols("$F rises"), ['F'])
+
+    def test_match_positions_refer_to_the_original_headline(self):
+        """ Tests that 'matched' is the headline's own text, even after case folding. """
+        headline = "Straße news: FORD recalls cars"
+        match = self.tagger.tag(headline)[0]
+        self.assertEqual(headline[match['start']:match['end']], 'FORD')
+        self.assertEqual(match['matched'], 'FORD')
+
+    def test_large_dictionary(self):
+        """ Tests that a dictionary with tens of thousands of entries still finds the right entity. """
+        entries = [{'symbol': f"S{n:05d}", 'name': f"Company {n:05d} Holdings", 'aliases': []} for n in range(30000)]
+        entries.append({'symbol': 'AAPL', 'name': 'Apple Inc.', 'aliases': ['Apple']})
+        tagger = EntityTagger(entries)
+        self.assertEqual([m['symbol'] for m in tagger.tag("Apple and Company 12345 Holdings rally")],
+                         ['AAPL', 'S12345'])
+
+class TestEntityStorage(unittest.TestCase):
+    """ Test suite for aspects_json and the article_entities index. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db_path_patch = patch.object(db_manager, 'DB_PATH', self.db_path)
+        self.db_path_patch.start()
+        db_manager.create_database()
+
+    def tearDown(self):
+        self.db_path_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_entities_are_stored_and_queryable_by_symbol(self):
+        """ Tests that tagged rows fill aspects_json and article_entities, and untagged rows stay NULL. """
+        tagger = EntityTagger(ENTRIES)
+        headlines = ["Bank of America and Meta rally", "Ford recalls trucks", "Markets are flat"]
+        db_manager.insert_articles([
+            {'source': 'Test', 'headline': h, 'article_url': f"http://example.com/{n}",
+             'finbert_result': {'label': 'Positive', 'score': 0.9}, 'entities': tagger.tag(h)}
+            for n, h in enumerate(headlines)
+        ] + [{'source': 'Test', 'headline': "Untagged", 'article_url': "http://example.com/x",
+              'finbert_result': {'label': 'Neutral', 'score': 0.5}}])
+
+        with sqlite3.connect(self.db_path) as conn:
+            aspects = [row[0] for row in conn.execute("SELECT aspects_json FROM news_sentiment ORDER BY id")]
+        self.assertEqual([a['symbol'] for a in json.loads(aspects[0])], ['BAC', 'META'])
+        self.assertEqual(json.loads(aspects[0])[0]['sentiment'], 'Positive')
+        self.assertEqual(json.loads(aspects[2]), [])
+        self.assertIsNone(aspects[3])
+
+        articles = db_manager.get_articles_for_symbol('meta')
+        self.assertEqual([a['headline'] for a in articles], [headlines[0]])
+        self.assertEqual(articles[0]['matched_text'], 'Meta')
+
+if __name__ == '__main__':
+    unittest.main()
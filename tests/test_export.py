@@ -0,0 +1,104 @@
+#
+# tests/test_export.py
+# Tests for the streaming export of news_sentiment.
+#
+
+import csv
+import gzip
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.etl import export
+
+def _row(n, when):
+    return {
+        'source': 'Yahoo',
+        'headline': f"Headline {n}, with a comma",
+        'article_url': f"http://example.com/{n}",
+        'finbert_result': {'label': 'Positive', 'score': 0.5 + n / 100},
+        'scraped_timestamp': when,
+    }
+
+def _read_csv(path):
+    with gzip.open(path, 'rt', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+class TestExport(unittest.TestCase):
+    """ Test suite for exporting, run against a temporary database. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db_path_patch = patch.object(db_manager, 'DB_PATH', self.db_path)
+        self.db_path_patch.start()
+        db_manager.create_database()
+        db_manager.insert_articles([_row(n, datetime(2025, 10, 20 + n % 3, 9, 0)) for n in range(1, 8)])
+
+    def tearDown(self):
+        self.db_path_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, 'out', name)
+
+    def test_csv_export_streams_every_row_in_chunks(self):
+        """ Tests that all rows are written, in id order, across several pages. """
+        summary = export.export_articles(self._path('all.csv.gz'), export_format='csv', chunk_size=3)
+        rows = _read_csv(summary['path'])
+        self.assertEqual([int(r['id']) for r in rows], list(range(1, 8)))
+        self.assertEqual(summary['chunks'], 3)
+        self.assertEqual(rows[0]['headline'], "Headline 1, with a comma")
+        self.assertEqual(list(rows[0]), list(db_manager.EXPORT_COLUMNS))
+        self.assertFalse(os.path.exists(summary['path'] + '.tmp'))
+
+    def test_date_range_filter(self):
+        """ Tests that start is inclusive and end exclusive on scraped_timestamp. """
+        summary = export.export_articles(self._path('day.csv.gz'), export_format='csv',
+                                         start=datetime(2025, 10, 21), end=datetime(2025, 10, 22))
+        self.assertEqual([int(r['id']) for r in _read_csv(summary['path'])], [1, 4, 7])
+
+    def test_incremental_export_continues_from_watermark(self):
+        """ Tests that a named export only writes rows added since its last run. """
+        first = export.export_articles(self._path('1.csv.gz'), export_format='csv', incremental='nightly')
+        self.assertEqual(first['rows'], 7)
+
+        empty = export.export_articles(self._path('2.csv.gz'), export_format='csv', incremental='nightly')
+        self.assertEqual((empty['rows'], empty['path']), (0, None))
+        self.assertFalse(os.path.exists(self._path('2.csv.gz')))
+
+        db_manager.insert_articles([_row(8, datetime(2025, 10, 25))])
+        third = export.export_articles(self._path('3.csv.gz'), export_format='csv', incremental='nightly')
+        self.assertEqual([int(r['id']) for r in _read_csv(third['path'])], [8])
+        self.assertEqual(db_manager.get_export_watermark('nightly'), 8)
+
+    def test_failed_read_leaves_no_file_or_watermark(self):
+        """ Tests that a database error mid-export removes the partial file and keeps the watermark. """
+        pages = [db_manager.fetch_export_page(0, 7, 3), None]
+        with patch.object(db_manager, 'fetch_export_page', side_effect=pages):
+            summary = export.export_articles(self._path('broken.csv.gz'), export_format='csv',
+                                             incremental='nightly', chunk_size=3)
+        self.assertFalse(summary['ok'])
+        self.assertEqual(os.listdir(os.path.dirname(self._path('x'))), [])
+        self.assertEqual(db_manager.get_export_watermark('nightly'), 0)
+
+    def test_unknown_format_is_rejected(self):
+        """ Tests that an unsupported format raises ValueError before anything is read. """
+        with self.assertRaises(ValueError):
+            export.export_articles(self._path('x.xlsx'), export_format='xlsx')
+
+    @unittest.skipUnless(export._pyarrow_available(), "pyarrow not installed")
+    def test_parquet_round_trip(self):
+        """ Tests that Parquet output keeps every row with typed columns. """
+        import pyarrow.parquet as pq
+
+        summary = export.export_articles(self._path('all.parquet'), export_format='parquet', chunk_size=3)
+        table = pq.read_table(summary['path'])
+        self.assertEqual(table.num_rows, 7)
+        self.assertEqual(table.column('scraped_timestamp')[0].as_py(), datetime(2025, 10, 21, 9, 0))
+
+if __name__ == '__main__':
+    unittest.main()
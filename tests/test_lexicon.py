@@ -0,0 +1,107 @@
+#
+# tests/test_lexicon.py
+# Tests for the lexicon scorer and the cascade that puts it in front of the model.
+#
+
+import unittest
+from unittest.mock import patch
+
+from src.nlp import lexicon, parity, sentiment
+from src.nlp.lexicon import Lexicon
+
+ENTRIES = [('beat', 2), ('beats', 2), ('cuts guidance', -3), ('cuts', -1), ('plung*', -2),
+           ('growth', 1), ('slows', -1), ('record high', 2)]
+
+def _fake_run_buckets(buckets, count):
+    """ Labels every headline the model sees as Neutral. """
+    return [{'label': 'Neutral', 'score': 0.9} for _ in range(count)]
+
+class TestLexicon(unittest.TestCase):
+    """ Test suite for scoring headlines against a word list. """
+
+    def setUp(self):
+        self.lexicon = Lexicon(ENTRIES)
+
+    def test_phrases_prefixes_and_confidence(self):
+        """ Tests that phrases beat the words inside them and prefixes match inflections. """
+        self.assertEqual(self.lexicon.score("Intel CUTS guidance"),
+                         {'label': 'Negative', 'score': 0.75, 'model_version': lexicon.VERSION})
+        self.assertEqual(self.lexicon.score("Shares plunged")['label'], 'Negative')
+        self.assertEqual(self.lexicon.score("Stock hits record high")['score'], 2 / 3)
+
+    def test_negation_flips_sign(self):
+        """ Tests that a negator shortly before a term reverses it. """
+        self.assertEqual(self.lexicon.score("Company fails to beat estimates")['label'], 'Negative')
+        self.assertEqual(self.lexicon.score("Company beat estimates, not a surprise")['label'], 'Positive')
+
+    def test_mixed_or_missing_evidence_is_not_confident(self):
+        """ Tests that conflicting terms lower confidence and no terms means Neutral. """
+        self.assertEqual(self.lexicon.score("Revenue growth slows"),
+                         {'label': 'Neutral', 'score': 0.0, 'model_version': lexicon.VERSION})
+        # Same net weight as "Beats estimates", but less confident.
+        self.assertLess(self.lexicon.score("Beats estimates but growth slows")['score'],
+                        self.lexicon.score("Beats estimates")['score'])
+        self.assertFalse(lexicon.is_confident(self.lexicon.score("Walmart maintains outlook"), 0.1))
+
+    def test_shipped_lexicon_loads(self):
+        """ Tests that the configured word list loads and decides a clear headline. """
+        scorer = lexicon.get_lexicon()
+        self.assertIsNotNone(scorer)
+        self.assertEqual(scorer.score("Retailer files for Chapter 11 bankruptcy protection")['label'], 'Negative')
+
+class TestCascade(unittest.TestCase):
+    """ Test suite for the lexicon tier in front of batched inference. """
+
+    def setUp(self):
+        patches = [
+            patch('src.nlp.sentiment_cache.get_sentiment_cache', return_value=None),
+            patch.object(lexicon, '_lexicon', Lexicon(ENTRIES)),
+            patch.object(lexicon, '_lexicon_loaded', True),
+            patch.object(lexicon, 'CASCADE_THRESHOLD', 0.7),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_disabled_cascade_sends_everything_to_model(self):
+        """ Tests that with the cascade off the lexicon decides nothing. """
+        with patch.object(lexicon, 'CASCADE_ENABLED', False):
+            self.assertEqual(lexicon.first_tier(["Intel cuts guidance"]), [None])
+
+    @patch('src.nlp.sentiment._run_buckets', side_effect=_fake_run_buckets)
+    @patch('src.nlp.sentiment._encode_buckets', return_value=[])
+    def test_only_uncertain_headlines_reach_the_model(self, mock_encode_buckets, mock_run_buckets):
+        """ Tests that confident headlines keep the lexicon's result and version. """
+        headlines = ["Intel cuts guidance", "Walmart maintains outlook", "Stock hits record high"]
+        with patch.object(lexicon, 'CASCADE_ENABLED', True):
+            results = sentiment.analyze_sentiment_batch(headlines)
+
+        mock_encode_buckets.assert_called_once_with(["Walmart maintains outlook", "Stock hits record high"], None)
+        self.assertEqual([r['label'] for r in results], ['Negative', 'Neutral', 'Neutral'])
+        self.assertEqual([r['model_version'] for r in results],
+                         [lexicon.VERSION, sentiment.MODEL_VERSION, sentiment.MODEL_VERSION])
+
+    @patch('src.nlp.sentiment._initialize_model')
+    def test_single_headline_counts_both_tiers(self, mock_initialize_model):
+        """ Tests that analyze_sentiment counts model fallbacks as well as lexicon decisions. """
+        before = {tier: sentiment.CASCADE_TIER.value(tier=tier) for tier in ('lexicon', 'model')}
+        with patch.object(lexicon, 'CASCADE_ENABLED', True), \
+             patch.object(sentiment, 'tokenizer', None), patch.object(sentiment, 'model', None):
+            sentiment.analyze_sentiment("Intel cuts guidance")
+            sentiment.analyze_sentiment("Walmart maintains outlook")
+        self.assertEqual(sentiment.CASCADE_TIER.value(tier='lexicon'), before['lexicon'] + 1)
+        self.assertEqual(sentiment.CASCADE_TIER.value(tier='model'), before['model'] + 1)
+
+    def test_cascade_agreement(self):
+        """ Tests coverage and agreement against model-only labels at two thresholds. """
+        scorer = lexicon.get_lexicon()
+        results = [scorer.score(h) for h in ("Intel cuts guidance", "Stock hits record high", "Walmart holds")]
+        reference = ['Negative', 'Neutral', 'Neutral']
+
+        strict = parity.cascade_agreement(results, reference, 0.7)
+        self.assertEqual((strict['lexicon_share'], strict['lexicon_agreement'], strict['agreement']), (1 / 3, 1.0, 1.0))
+        loose = parity.cascade_agreement(results, reference, 0.5)
+        self.assertEqual((loose['lexicon_share'], loose['lexicon_agreement'], loose['agreement']), (2 / 3, 0.5, 2 / 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#
+# tests/test_logger.py
+# Tests for async logging, JSON output and per-key rate limiting.
+#
+
+import io
+import json
+import logging
+import queue
+import sys
+import unittest
+from unittest.mock import patch
+
+from src.utils import logger as logger_module
+from src.utils.logger import JsonFormatter, RateLimitFilter, configure_logger, stop_listener
+
+def _record(message, **extra):
+    record = logging.LogRecord('test', logging.ERROR, __file__, 1, message, (), None)
+    record.__dict__.update(extra)
+    return record
+
+class TestRateLimitFilter(unittest.TestCase):
+    """ Test suite for rate limiting repetitive records by key. """
+
+    def test_burst_per_key_then_suppressed_count(self):
+        """ Tests that only `burst` records per key pass, and the next window reports the rest. """
+        rate_filter = RateLimitFilter(burst=2, interval=60)
+        with patch.object(logger_module.time, 'monotonic', return_value=100.0):
+            passed = [rate_filter.filter(_record("down", rate_key='feed.a')) for _ in range(5)]
+            self.assertTrue(rate_filter.filter(_record("down", rate_key='feed.b')))
+            self.assertTrue(rate_filter.filter(_record("no key")))
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        with patch.object(logger_module.time, 'monotonic', return_value=161.0):
+            record = _record("down", rate_key='feed.a')
+            self.assertTrue(rate_filter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+class TestFormatters(unittest.TestCase):
+    """ Test suite for the JSON output. """
+
+    def test_json_includes_extra_fields_and_exception(self):
+        """ Tests that JSON lines carry the message, `extra` fields and the traceback. """
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord('test', logging.ERROR, __file__, 1, "Feed %s failed", ('yahoo',),
+                                       exc_info=sys.exc_info())
+        record.rate_key = 'feed.yahoo'
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry['message'], "Feed yahoo failed")
+        self.assertEqual(entry['level'], 'ERROR')
+        self.assertEqual(entry['rate_key'], 'feed.yahoo')
+        self.assertIn("ValueError: boom", entry['exception'])
+
+class TestAsyncLogging(unittest.TestCase):
+    """ Test suite for the queue-based logger. """
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger('test.async_logging')
+        self.logger.propagate = False
+
+    def tearDown(self):
+        stop_listener(self.logger.name)
+
+    def test_records_are_written_by_the_listener(self):
+        """ Tests that queued records all reach the handler, in order, once flushed. """
+        configure_logger(self.logger, logging.INFO, [logging.StreamHandler(self.stream)], async_mode=True)
+        for n in range(100):
+            self.logger.info("line %d", n)
+        self.logger.debug("not written %s", "at INFO")
+        stop_listener(self.logger.name)
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertTrue(lines[0].endswith("INFO - line 0"))
+        self.assertTrue(lines[-1].endswith("INFO - line 99"))
+
+    def test_full_queue_drops_and_reports(self):
+        """ Tests that a full queue drops records instead of blocking, and the next record says so. """
+        configure_logger(self.logger, logging.INFO, [logging.StreamHandler(self.stream)], async_mode=True,
+                         queue_size=1)
+        handler = self.logger.handlers[0]
+        # Stall the listener so the queue fills up.
+        stop_listener(self.logger.name)
+        handler.queue = queue.Queue(maxsize=1)
+        self.logger.info("kept")
+        self.logger.info("dropped")
+        self.logger.info("dropped")
+        self.assertEqual(handler.dropped, 2)
+        handler.queue.get_nowait()
+        self.logger.info("after")
+        self.assertEqual(handler.queue.get_nowait().dropped, 2)
+        self.assertEqual(handler.dropped, 0)
+
+    def test_fork_hook_switches_to_direct_logging(self):
+        """ Tests that reconfiguring registers no fork hook and the shared hook bypasses the queue. """
+        direct = logging.StreamHandler(self.stream)
+        with patch.object(logger_module.os, 'register_at_fork') as mock_register_at_fork:
+            configure_logger(self.logger, logging.INFO, [direct], async_mode=True)
+            configure_logger(self.logger, logging.INFO, [direct], async_mode=True)
+        mock_register_at_fork.assert_not_called()
+
+        listener = logger_module._listeners[self.logger.name]
+        # Only this logger: the application's own logger keeps its listener.
+        with patch.dict(logger_module._listeners, {self.logger.name: listener}, clear=True):
+            logger_module._log_directly_in_child()
+        stop_listener(self.logger.name)
+        self.assertEqual(self.logger.handlers, [direct])
+        self.logger.info("in the child")
+        self.assertTrue(self.stream.getvalue().endswith("INFO - in the child\n"))
+
+if __name__ == '__main__':
+    unittest.main()
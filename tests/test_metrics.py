@@ -0,0 +1,76 @@
+#
+# tests/test_metrics.py
+# Tests for the in-process metrics registry and its Prometheus text output.
+#
+
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from src.utils import metrics
+
+class TestMetrics(unittest.TestCase):
+    """ Test suite for counters, histograms and their exposition. """
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_renders_per_label_set(self):
+        """ Tests that each label combination is its own sample. """
+        requests = self.registry.counter('feed_requests_total', "Requests.", ['feed'])
+        requests.inc(feed='a')
+        requests.inc(2, feed='b')
+        requests.inc(feed='a')
+
+        text = self.registry.render()
+        self.assertIn('# TYPE feed_requests_total counter', text)
+        self.assertIn('feed_requests_total{feed="a"} 2', text)
+        self.assertIn('feed_requests_total{feed="b"} 2', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """ Tests that bucket counts are cumulative and include sum and count. """
+        sizes = self.registry.histogram('batch_size', "Sizes.", buckets=(1, 8, 32))
+        for value in (1, 4, 8, 20, 100):
+            sizes.observe(value)
+
+        text = self.registry.render()
+        self.assertIn('batch_size_bucket{le="1"} 1', text)
+        self.assertIn('batch_size_bucket{le="8"} 3', text)
+        self.assertIn('batch_size_bucket{le="32"} 4', text)
+        self.assertIn('batch_size_bucket{le="+Inf"} 5', text)
+        self.assertIn('batch_size_sum 133', text)
+        self.assertIn('batch_size_count 5', text)
+
+    def test_wrong_labels_are_rejected(self):
+        """ Tests that updating a metric with the wrong label names raises. """
+        requests = self.registry.counter('requests_total', "Requests.", ['feed'])
+        with self.assertRaises(ValueError):
+            requests.inc(host='a')
+
+    def test_register_twice_returns_same_metric(self):
+        """ Tests that modules re-registering a metric share one instance. """
+        first = self.registry.counter('runs_total', "Runs.")
+        self.assertIs(self.registry.counter('runs_total', "Runs."), first)
+
+    def test_textfile_and_http_endpoint(self):
+        """ Tests that the text file and the HTTP endpoint serve the same exposition. """
+        self.registry.gauge('last_run_inserted', "Inserted.").set(7)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'etl.prom')
+            self.assertTrue(metrics.write_textfile(path, registry=self.registry))
+            with open(path) as f:
+                self.assertIn('last_run_inserted 7', f.read())
+
+        server = metrics.start_http_server(0, addr='127.0.0.1', registry=self.registry)
+        self.assertIsNotNone(server)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+                self.assertIn('last_run_inserted 7', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#
+# tests/test_near_duplicates.py
+# Tests for near-duplicate headline detection and its persisted index.
+#
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.nlp import near_duplicates
+from src.nlp.near_duplicates import NearDuplicateIndex, anchors, merge_results, scoring_positions, shingles
+
+def _tags(*symbols):
+    return [{'symbol': symbol} for symbol in symbols]
+
+class TestMatching(unittest.TestCase):
+    """ Test suite for shingling, anchors and batch planning, without a database. """
+
+    def setUp(self):
+        self.index = NearDuplicateIndex(persist=False)
+
+    def _plan(self, headlines, tags):
+        return self.index.plan_batch(headlines, tags)
+
+    def test_shingles_ignore_wire_boilerplate(self):
+        """ Tests that wire prefixes, source suffixes and punctuation don't change the shingles. """
+        plain = shingles("Tesla shares plunge after deliveries miss expectations")
+        self.assertEqual(shingles("UPDATE 2-Tesla shares plunge after deliveries miss expectations - Reuters"), plain)
+        self.assertEqual(shingles("Tesla shares plunge after deliveries miss expectations."), plain)
+
+    def test_anchors_combine_symbols_and_numbers(self):
+        """ Tests that anchors list the tagged symbols and the numbers, without thousands separators. """
+        self.assertEqual(anchors("Ford recalls 500,000 vehicles", _tags('F')), "F 500000")
+        self.assertEqual(anchors("UPDATE 2-Markets rally", None), "")
+
+    def test_variant_within_batch_inherits_from_first(self):
+        """ Tests that a wire variant later in the batch points at the earlier headline. """
+        plan = self._plan(
+            ["Apple beats quarterly earnings estimates on strong iPhone sales",
+             "Oil prices slip as OPEC output rises",
+             "UPDATE 1-Apple beats quarterly earnings estimates on strong iPhone sales - Reuters"],
+            [_tags('AAPL'), [], _tags('AAPL')],
+        )
+        self.assertEqual(scoring_positions(plan), [0, 1])
+        self.assertEqual(plan[2]['canonical_position'], 0)
+
+    def test_hard_negatives_are_scored(self):
+        """ Tests that opposite moves, other companies and other figures are not treated as duplicates. """
+        plan = self._plan(
+            ["Tesla shares rise after deliveries beat expectations",
+             "Tesla shares fall after deliveries miss expectations",
+             "Ford raises full-year revenue guidance",
+             "Oracle raises full-year revenue guidance",
+             "Alphabet announces $70 billion share buyback",
+             "Alphabet announces $5 billion share buyback"],
+            [_tags('TSLA'), _tags('TSLA'), _tags('F'), _tags('ORCL'), _tags('GOOGL'), _tags('GOOGL')],
+        )
+        self.assertEqual(scoring_positions(plan), [0, 1, 2, 3, 4, 5])
+
+    def test_merge_results_marks_inherited_versions(self):
+        """ Tests that inherited results copy the canonical sentiment under a '+neardup' version. """
+        plan = self._plan(["Intel cuts dividend amid falling PC demand",
+                           "Intel cuts dividend amid falling PC demand - CNBC"], [_tags('INTC')] * 2)
+        results = merge_results(plan, [{'label': 'Negative', 'score': 0.9, 'model_version': 'finbert'}])
+        self.assertEqual(results[1], {'label': 'Negative', 'score': 0.9, 'model_version': 'finbert+neardup'})
+
+    def test_failed_canonical_leaves_duplicate_unscored(self):
+        """ Tests that a duplicate of a headline that failed scoring gets no result. """
+        plan = self._plan(["Intel cuts dividend", "Intel cuts dividend."], [_tags('INTC')] * 2)
+        self.assertEqual(merge_results(plan, [{}]), [{}, {}])
+
+    def test_match_survives_concurrent_prune(self):
+        """ Tests that a prune between matching and planning doesn't lose the canonical result. """
+        headline = "Intel cuts dividend amid falling PC demand"
+        result = {'label': 'Negative', 'score': 0.9, 'model_version': 'finbert'}
+        self.index.remember(['a'], [result], self._plan([headline], [_tags('INTC')]))
+        query = self.index.query
+
+        def query_then_prune(signature, anchor):
+            found = query(signature, anchor)
+            # What the load thread's `remember` may do right after the match.
+            self.index._prune_expired(time.time() + self.index.window_seconds + 1)
+            return found
+
+        with patch.object(self.index, 'query', side_effect=query_then_prune):
+            plan = self._plan([headline + " - CNBC"], [_tags('INTC')])
+        self.assertEqual((plan[0]['canonical_hash'], plan[0]['result']), ('a', result))
+
+class TestPersistence(unittest.TestCase):
+    """ Test suite for the persisted index, run against a temporary database. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db_path_patch = patch.object(db_manager, 'DB_PATH', self.db_path)
+        self.db_path_patch.start()
+        db_manager.create_database()
+
+    def tearDown(self):
+        self.db_path_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_index_survives_restart_and_links_duplicates(self):
+        """ Tests that a new process matches against remembered headlines and the link is stored. """
+        first = NearDuplicateIndex()
+        plan = first.plan_batch(["Netflix subscriber growth surpasses forecasts"], [_tags('NFLX')])
+        first.remember(['hash-1'], [{'label': 'Positive', 'score': 0.8, 'model_version': 'finbert'}], plan)
+
+        second = NearDuplicateIndex()
+        self.assertEqual(second.load(), 1)
+        plan = second.plan_batch(["UPDATE 1-Netflix subscriber growth surpasses forecasts"], [_tags('NFLX')])
+        self.assertEqual(plan[0]['canonical_hash'], 'hash-1')
+        results = merge_results(plan, [])
+        self.assertEqual(results[0]['model_version'], 'finbert+neardup')
+        second.remember(['hash-2'], results, plan)
+
+        with sqlite3.connect(self.db_path) as conn:
+            links = conn.execute("SELECT article_hash, canonical_hash FROM near_duplicate_links").fetchall()
+            indexed = conn.execute("SELECT article_hash FROM near_duplicate_index").fetchall()
+        self.assertEqual(links, [('hash-2', 'hash-1')])
+        self.assertEqual(indexed, [('hash-1',)])
+
+    def test_entries_outside_window_are_dropped(self):
+        """ Tests that loading ignores and prunes entries older than the window. """
+        signature = near_duplicates.pack_signature(NearDuplicateIndex(persist=False).signature("Old news"))
+        db_manager.save_near_duplicates(
+            [('old', signature, '', 'Neutral', 0.5, 'finbert', time.time() - 3 * 3600)], []
+        )
+        index = NearDuplicateIndex(window_hours=1)
+        self.assertEqual(index.load(), 0)
+        self.assertEqual(index.plan_batch(["Old news"], [[]])[0]['similarity'], None)
+        self.assertEqual(db_manager.load_near_duplicate_entries(0), [])
+
+if __name__ == '__main__':
+    unittest.main()
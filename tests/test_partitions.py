@@ -0,0 +1,168 @@
+#
+# tests/test_partitions.py
+# Tests for monthly archiving of news_sentiment.
+#
+
+import os
+import sqlite3
+import stat
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database import db_manager, partitions, rollups
+
+NOW = datetime(2025, 10, 15, 12, 0)
+
+def _row(n, when, entities=None):
+    return {
+        'source': 'Yahoo',
+        'headline': f"Headline {n}",
+        'article_url': f"http://example.com/{n}",
+        'finbert_result': {'label': 'Positive' if n % 2 else 'Negative', 'score': 0.8},
+        'scraped_timestamp': when,
+        'entities': entities,
+    }
+
+APPLE = [{'name': 'Apple', 'symbol': 'AAPL', 'matched': 'Apple'}]
+
+class TestPartitions(unittest.TestCase):
+    """ Test suite for archiving, reading and expiring monthly partitions, against a temporary database. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.archive_dir = os.path.join(self.tmp_dir.name, 'archive')
+        self.patches = [patch.object(db_manager, 'DB_PATH', self.db_path),
+                        patch.object(partitions, 'ARCHIVE_DIR', self.archive_dir)]
+        for p in self.patches:
+            p.start()
+        db_manager.create_database()
+        # Three rows in each month from July to October.
+        rows = [_row(month * 10 + n, datetime(2025, month, 10 + n, 9, 0), APPLE if n == 0 else None)
+                for month in range(7, 11) for n in range(3)]
+        db_manager.insert_articles(rows)
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        for root, _, files in os.walk(self.tmp_dir.name):
+            for name in files:
+                os.chmod(os.path.join(root, name), 0o644)
+        self.tmp_dir.cleanup()
+
+    def _live(self, sql="SELECT COUNT(*) FROM news_sentiment"):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql).fetchone()[0]
+
+    def test_compaction_archives_one_month_at_a_time(self):
+        """ Tests that months beyond hot_months are moved out oldest first, one per pass. """
+        first = partitions.compact_once(now=NOW, hot_months=2)
+        self.assertEqual(first, {'action': 'archived', 'month': '2025-07'})
+        self.assertEqual(self._live(), 9)
+
+        self.assertEqual(partitions.compact(now=NOW, hot_months=2), [{'action': 'archived', 'month': '2025-08'}])
+        self.assertEqual(self._live("SELECT MIN(scraped_timestamp) FROM news_sentiment"), '2025-09-10 09:00:00')
+        self.assertEqual(self._live("SELECT COUNT(*) FROM article_entities"), 2)
+
+        catalog = partitions.list_partitions()
+        self.assertEqual([(p['month'], p['row_count'], p['status']) for p in catalog],
+                         [('2025-07', 3, 'archived'), ('2025-08', 3, 'archived')])
+        self.assertTrue(catalog[0]['path'].endswith('news_sentiment_2025_07.db.gz'))
+
+    def test_archive_files_are_read_only(self):
+        """ Tests that an archive can be read but not written. """
+        partitions.compact_once(now=NOW, hot_months=3, compress=False)
+        entry = partitions.list_partitions()[0]
+        self.assertEqual(stat.S_IMODE(os.stat(entry['path']).st_mode), 0o444)
+        conn = partitions.open_archive(entry)
+        try:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM news_sentiment").fetchone()[0], 3)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM news_sentiment")
+        finally:
+            conn.close()
+
+    def test_history_view_unions_live_and_archived_rows(self):
+        """ Tests that open_history sees every row with its original id and entities. """
+        partitions.compact(now=NOW, hot_months=2)
+        conn = partitions.open_history()
+        try:
+            self.assertEqual(conn.execute("SELECT COUNT(*), MIN(id), MAX(id) FROM news_sentiment_all").fetchone(),
+                             (12, 1, 12))
+            symbols = conn.execute("SELECT COUNT(*) FROM article_entities_all WHERE symbol = 'AAPL'").fetchone()[0]
+            self.assertEqual(symbols, 4)
+        finally:
+            conn.close()
+
+        conn = partitions.open_history(start=datetime(2025, 8, 1), end=datetime(2025, 9, 1))
+        try:
+            attached = [row[1] for row in conn.execute("PRAGMA database_list")]
+            self.assertIn('p_2025_08', attached)
+            self.assertNotIn('p_2025_07', attached)
+        finally:
+            conn.close()
+        self.assertEqual(db_manager.get_stats(include_archives=True)['total'], 12)
+        self.assertEqual(db_manager.get_stats()['total'], 6)
+        self.assertEqual(len(db_manager.get_articles_for_symbol('AAPL', include_archives=True)), 4)
+        self.assertEqual(len(db_manager.get_articles_for_symbol('AAPL')), 2)
+
+    def test_archived_articles_stay_deduplicated(self):
+        """ Tests that an archived article is still found by the probe and ignored on insert. """
+        partitions.compact(now=NOW, hot_months=3)
+        archived = _row(70, datetime(2025, 7, 10, 9, 0))
+        article_hash = db_manager.compute_article_hash(archived['headline'], archived['article_url'],
+                                                       archived['scraped_timestamp'])
+        self.assertEqual(db_manager.get_existing_hashes([article_hash]), {article_hash})
+        self.assertEqual(db_manager.insert_articles([archived]), {'inserted': 0, 'duplicates': 1})
+        self.assertEqual(self._live(), 9)
+
+    def test_rollups_keep_archived_months(self):
+        """ Tests that series and a full rebuild still cover archived months. """
+        before = rollups.get_sentiment_series(granularity='day')
+        partitions.compact(now=NOW, hot_months=1)
+        self.assertEqual(rollups.get_sentiment_series(granularity='day'), before)
+        self.assertTrue(rollups.rebuild_rollups())
+        self.assertEqual(rollups.get_sentiment_series(granularity='day'), before)
+
+    def test_late_rows_are_merged_into_existing_archive(self):
+        """ Tests that a row arriving for an archived month joins that month's archive. """
+        partitions.compact(now=NOW, hot_months=3)
+        db_manager.insert_articles([_row(99, datetime(2025, 7, 30, 9, 0))])
+        self.assertEqual(partitions.compact(now=NOW, hot_months=3), [{'action': 'archived', 'month': '2025-07'}])
+        entry = partitions.list_partitions()[0]
+        self.assertEqual((entry['row_count'], entry['max_id']), (4, 13))
+        self.assertEqual(self._live("SELECT COUNT(*) FROM news_sentiment WHERE scraped_timestamp < '2025-08'"), 0)
+
+    def test_interrupted_move_is_resumed(self):
+        """ Tests that a month left 'moving' is finished first, without duplicating rows in the history view. """
+        stop = partitions.threading.Event()
+        stop.set()
+        partitions.archive_month('2025-07', batch_size=1, stop_event=stop)
+        self.assertEqual(partitions.list_partitions()[0]['status'], 'moving')
+        self.assertEqual(self._live("SELECT COUNT(*) FROM news_sentiment WHERE scraped_timestamp < '2025-08'"), 2)
+
+        conn = partitions.open_history()
+        try:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM news_sentiment_all").fetchone()[0], 12)
+        finally:
+            conn.close()
+
+        self.assertEqual(partitions.compact_once(now=NOW, hot_months=0), {'action': 'resumed', 'month': '2025-07'})
+        self.assertEqual(partitions.list_partitions()[0]['status'], 'archived')
+        self.assertEqual(self._live(), 9)
+
+    def test_retention_deletes_old_archives(self):
+        """ Tests that archives past retention_months are deleted and marked expired. """
+        partitions.compact(now=NOW, hot_months=2)
+        actions = partitions.compact(now=NOW, hot_months=2, retention_months=2)
+        self.assertEqual(actions, [{'action': 'expired', 'month': '2025-07'}])
+        expired, kept = partitions.list_partitions()
+        self.assertEqual((expired['status'], kept['status']), ('expired', 'archived'))
+        self.assertFalse(os.path.exists(expired['path']))
+        self.assertEqual(self._live("SELECT COUNT(*) FROM archived_hashes WHERE month = '2025-07'"), 0)
+        self.assertEqual(self._live("SELECT COUNT(*) FROM archived_hashes WHERE month = '2025-08'"), 3)
+
+if __name__ == '__main__':
+    unittest.main()
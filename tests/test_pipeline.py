@@ -0,0 +1,130 @@
+#
+# tests/test_pipeline.py
+# Tests for when a pipeline run persists each feed's validators, against a
+# temporary database.
+#
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.etl import pipeline
+from src.nlp.near_duplicates import NearDuplicateIndex
+
+def _state(etag):
+    return {'url': 'http://example.com/feed', 'etag': etag, 'last_modified': None, 'status': 200,
+            'high_water_published': None, 'high_water_guid': None}
+
+def _scrape(articles, etag):
+    """ Stands in for scrape_feeds: one feed 'wire' with the given articles. """
+    def scrape_feeds(sources=None, feed_state=None):
+        return [dict(article) for article in articles], {'wire': _state(etag)}
+    return scrape_feeds
+
+def _feed_results(articles, etag):
+    """ Stands in for iter_feed_results: one feed 'wire' with the given articles. """
+    def iter_feed_results(sources=None, feed_state=None):
+        yield dict(_state(etag), name='wire', articles=[dict(article) for article in articles])
+    return iter_feed_results
+
+def _fake_batch(headlines, batch_size=None):
+    """ Fails headlines containing 'fail', scores the rest Positive. """
+    return [{} if 'fail' in h else {'label': 'Positive', 'score': 0.9} for h in headlines]
+
+ARTICLES = [{'headline': f"Headline {n}", 'url': f"http://example.com/{n}", 'source': 'Wire', 'feed': 'wire'}
+            for n in range(3)]
+
+class TestPipelineFeedState(unittest.TestCase):
+    """ Test suite for saving feed validators only after their articles are stored. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patches = [
+            patch.object(db_manager, 'DB_PATH', os.path.join(self.tmp_dir.name, 'test.db')),
+            patch('src.nlp.sentiment_cache.get_sentiment_cache', return_value=None),
+            patch('src.nlp.near_duplicates.get_near_duplicate_index', return_value=None),
+            patch('src.nlp.entities.tag_headlines', side_effect=lambda headlines: [None] * len(headlines)),
+            patch('src.nlp.sentiment.analyze_sentiment_batch', side_effect=_fake_batch),
+            patch('src.nlp.sentiment.prepare_batch', side_effect=lambda headlines, batch_size=None: headlines),
+            patch('src.nlp.sentiment.complete_batch', side_effect=_fake_batch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+        db_manager.create_database()
+        db_manager.save_feed_states({'wire': _state('"old"')})
+
+    def _etag(self):
+        return db_manager.get_feed_states()['wire']['etag']
+
+    def test_validators_saved_after_load(self):
+        """ Tests that a fully loaded feed gets its new validators. """
+        with patch.object(pipeline.feed_scraper, 'scrape_feeds', side_effect=_scrape(ARTICLES, '"new"')):
+            summary = pipeline.run_pipeline(mode='batch')
+        self.assertEqual(summary['inserted'], 3)
+        self.assertEqual(self._etag(), '"new"')
+
+    def test_failed_load_keeps_old_validators(self):
+        """ Tests that a rolled-back load leaves the feed's stored validators alone. """
+        with patch.object(pipeline.feed_scraper, 'scrape_feeds', side_effect=_scrape(ARTICLES, '"new"')), \
+             patch.object(db_manager, 'insert_articles', return_value={'inserted': 0, 'duplicates': 0}):
+            pipeline.run_pipeline(mode='batch')
+        self.assertEqual(self._etag(), '"old"')
+
+    def test_failed_scoring_keeps_old_validators(self):
+        """ Tests that a feed with an unscored article is fetched in full again next time. """
+        articles = ARTICLES + [{'headline': "Scoring will fail", 'url': "http://example.com/x",
+                                'source': 'Wire', 'feed': 'wire'}]
+        with patch.object(pipeline.feed_scraper, 'scrape_feeds', side_effect=_scrape(articles, '"new"')):
+            summary = pipeline.run_pipeline(mode='batch')
+        self.assertEqual((summary['inserted'], summary['failed']), (3, 1))
+        self.assertEqual(self._etag(), '"old"')
+
+    def test_streaming_failed_load_keeps_old_validators(self):
+        """ Tests that streaming mode also holds back validators when a batch fails to load. """
+        with patch.object(pipeline.feed_scraper, 'iter_feed_results', side_effect=_feed_results(ARTICLES, '"new"')), \
+             patch.object(db_manager, 'insert_articles', return_value={'inserted': 0, 'duplicates': 0}):
+            pipeline.run_pipeline(mode='streaming')
+        self.assertEqual(self._etag(), '"old"')
+
+        with patch.object(pipeline.feed_scraper, 'iter_feed_results', side_effect=_feed_results(ARTICLES, '"new"')):
+            summary = pipeline.run_pipeline(mode='streaming')
+        self.assertEqual(summary['inserted'], 3)
+        self.assertEqual(self._etag(), '"new"')
+
+    def test_high_water_mark_advances_only_after_load(self):
+        """ Tests that a failed load keeps the old mark and the retry that succeeds advances it. """
+        fetched = dict(_state('"new"'), high_water_published=datetime(2025, 10, 24, 10, 0),
+                       high_water_guid='http://example.com/0')
+
+        def scrape_feeds(sources=None, feed_state=None):
+            return [dict(article) for article in ARTICLES], {'wire': dict(fetched)}
+
+        with patch.object(pipeline.feed_scraper, 'scrape_feeds', side_effect=scrape_feeds):
+            with patch.object(db_manager, 'insert_articles', return_value={'inserted': 0, 'duplicates': 0}):
+                pipeline.run_pipeline(mode='batch')
+            self.assertIsNone(db_manager.get_feed_states()['wire']['high_water_guid'])
+
+            summary = pipeline.run_pipeline(mode='batch')
+        stored = db_manager.get_feed_states()['wire']
+        self.assertEqual(summary['inserted'], 3)
+        self.assertEqual((stored['high_water_published'], stored['high_water_guid']),
+                         (datetime(2025, 10, 24, 10, 0), 'http://example.com/0'))
+
+    def test_failed_load_is_not_remembered_as_canonical(self):
+        """ Tests that neither mode adds a rolled-back batch to the near-duplicate index. """
+        for mode, scraper in (('batch', 'scrape_feeds'), ('streaming', 'iter_feed_results')):
+            fake = _scrape(ARTICLES, '"new"') if mode == 'batch' else _feed_results(ARTICLES, '"new"')
+            index = NearDuplicateIndex(persist=False)
+            with patch.object(pipeline.feed_scraper, scraper, side_effect=fake), \
+                 patch('src.nlp.near_duplicates.get_near_duplicate_index', return_value=index), \
+                 patch.object(db_manager, 'insert_articles', return_value={'inserted': 0, 'duplicates': 0}):
+                pipeline.run_pipeline(mode=mode)
+            self.assertEqual(index.entries, {}, mode)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+#
+# tests/test_pool.py
+# Tests for the forked multi-process scoring pool. The model functions are
+# replaced before the pool forks, so workers inherit the stand-ins.
+#
+
+import multiprocessing
+import os
+import unittest
+from unittest.mock import patch
+
+from src.nlp import pool
+
+def _fake_infer_batch(headlines, batch_size=None):
+    """ Labels each headline by its length and records which process scored it. """
+    return [{'label': 'Neutral', 'score': float(len(h)), 'pid': os.getpid()} for h in headlines]
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "requires the fork start method")
+class TestProcessPool(unittest.TestCase):
+    """ Test suite for ordering and chunking in the process pool. """
+
+    def setUp(self):
+        patches = [
+            patch('src.nlp.sentiment.warm_up', return_value=True),
+            patch('src.nlp.sentiment._infer_batch', new=_fake_infer_batch),
+            patch('src.nlp.pool._init_worker', new=lambda threads: None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_results_come_back_in_input_order(self):
+        """ Tests that chunks scored by different workers are reassembled in order. """
+        headlines = [f"headline {'x' * n}" for n in range(50)]
+        results = pool.score_in_processes(headlines, processes=3, chunk_size=7, use_cache=False)
+
+        self.assertEqual([r['score'] for r in results], [float(len(h)) for h in headlines])
+        # Work really left the parent process.
+        self.assertNotIn(os.getpid(), {r['pid'] for r in results})
+
+    def test_chunks_are_yielded_with_offsets(self):
+        """ Tests that the streaming API yields ordered, offset-tagged chunks. """
+        chunks = list(pool.iter_scored_chunks([str(n) for n in range(10)], processes=2, chunk_size=4))
+        self.assertEqual([start for start, _ in chunks], [0, 4, 8])
+        self.assertEqual([len(results) for _, results in chunks], [4, 4, 2])
+
+    def test_model_load_failure_returns_empty_results(self):
+        """ Tests that a failed model load yields empty results instead of raising. """
+        with patch('src.nlp.sentiment.warm_up', return_value=False):
+            results = pool.score_in_processes(["a", "b"], processes=2, use_cache=False)
+        self.assertEqual(results, [{}, {}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#
+# tests/test_rescore.py
+# Tests for resumable re-scoring, run against a temporary database with the
+# model replaced by a stand-in.
+#
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.etl import rescore
+from src.nlp import lexicon, sentiment
+from src.nlp.lexicon import Lexicon
+
+ANALYZE_SENTIMENT_BATCH = sentiment.analyze_sentiment_batch
+
+def _fake_batch(headlines, batch_size=None):
+    """ Scores everything Positive, except headlines containing 'fail'. """
+    return [{} if 'fail' in h else {'label': 'Positive', 'score': 0.9} for h in headlines]
+
+def _fake_run_buckets(buckets, count):
+    """ Labels every headline the model sees as Positive. """
+    return [{'label': 'Positive', 'score': 0.9} for _ in range(count)]
+
+class TestRescore(unittest.TestCase):
+    """ Test suite for chunked, checkpointed re-scoring. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        patches = [
+            patch.object(db_manager, 'DB_PATH', self.db_path),
+            patch('src.nlp.sentiment.MODEL_VERSION', 'finbert_v2'),
+            patch('src.nlp.sentiment.warm_up', return_value=True),
+            patch('src.nlp.sentiment.analyze_sentiment_batch', side_effect=_fake_batch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        db_manager.create_database()
+        db_manager.insert_articles([
+            {'source': 'Test', 'headline': f"Headline {n}", 'article_url': f"http://example.com/{n}",
+             'finbert_result': {'label': 'Neutral', 'score': 0.5, 'model_version': 'finbert_v1_base'}}
+            for n in range(10)
+        ])
+
+    def _versions(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return [row[0] for row in conn.execute("SELECT sentiment_model_version FROM news_sentiment ORDER BY id")]
+
+    def test_rescores_every_row_in_chunks(self):
+        """ Tests that all rows move to the new version, one transaction per chunk. """
+        summary = rescore.rescore(chunk_size=3)
+
+        self.assertTrue(summary['finished'])
+        self.assertEqual(summary['updated'], 10)
+        self.assertEqual(summary['chunks'], 4)
+        self.assertEqual(self._versions(), ['finbert_v2'] * 10)
+
+    def test_interrupted_job_resumes_from_checkpoint(self):
+        """ Tests that a stopped job picks up after the last committed chunk. """
+        first = rescore.rescore(chunk_size=4, max_chunks=1)
+        self.assertFalse(first['finished'])
+        self.assertEqual(self._versions().count('finbert_v2'), 4)
+
+        second = rescore.rescore(chunk_size=4)
+        self.assertEqual(second['resumed_from'], first['last_id'])
+        self.assertEqual(second['updated'], 6)
+        self.assertTrue(second['finished'])
+        checkpoint = db_manager.get_rescore_checkpoint(rescore.default_job_name('finbert_v2'))
+        self.assertEqual(checkpoint['rows_updated'], 10)
+        self.assertIsNotNone(checkpoint['finished_at'])
+
+    def test_failed_rows_keep_their_old_score(self):
+        """ Tests that rows the model could not score are left untouched and counted. """
+        db_manager.insert_articles([
+            {'source': 'Test', 'headline': "This will fail", 'article_url': "http://example.com/fail",
+             'finbert_result': {'label': 'Neutral', 'score': 0.5, 'model_version': 'finbert_v1_base'}}
+        ])
+        summary = rescore.rescore(chunk_size=5)
+
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(self._versions()[-1], 'finbert_v1_base')
+
+    @patch('src.nlp.sentiment._run_buckets', side_effect=_fake_run_buckets)
+    @patch('src.nlp.sentiment._encode_buckets', return_value=[])
+    def test_cascade_rows_keep_lexicon_version(self, mock_encode_buckets, mock_run_buckets):
+        """ Tests that a row the lexicon decides is stored under the lexicon's version. """
+        db_manager.insert_articles([
+            {'source': 'Test', 'headline': "Intel cuts guidance", 'article_url': "http://example.com/intel",
+             'finbert_result': {'label': 'Neutral', 'score': 0.5, 'model_version': 'finbert_v1_base'}}
+        ])
+        with patch('src.nlp.sentiment.analyze_sentiment_batch', side_effect=ANALYZE_SENTIMENT_BATCH), \
+             patch('src.nlp.sentiment_cache.get_sentiment_cache', return_value=None), \
+             patch.object(lexicon, 'CASCADE_ENABLED', True), \
+             patch.object(lexicon, 'CASCADE_THRESHOLD', 0.7), \
+             patch.object(lexicon, '_lexicon', Lexicon([('cuts guidance', -3)])), \
+             patch.object(lexicon, '_lexicon_loaded', True):
+            summary = rescore.rescore(chunk_size=20)
+
+        self.assertEqual(summary['updated'], 11)
+        self.assertEqual(self._versions(), ['finbert_v2'] * 10 + [lexicon.VERSION])
+
+if __name__ == '__main__':
+    unittest.main()
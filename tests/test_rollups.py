@@ -0,0 +1,106 @@
+#
+# tests/test_rollups.py
+# Tests for the trigger-maintained sentiment rollups and their query API.
+#
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.database import rollups
+
+def _row(n, label, score, source='Yahoo', when=datetime(2025, 10, 24, 9, 30)):
+    return {
+        'source': source,
+        'headline': f"Headline {n}",
+        'article_url': f"http://example.com/{n}",
+        'finbert_result': {'label': label, 'score': score},
+        'scraped_timestamp': when,
+    }
+
+class TestRollups(unittest.TestCase):
+    """ Test suite for incremental rollups, run against a temporary database. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db_path_patch = patch.object(db_manager, 'DB_PATH', self.db_path)
+        self.db_path_patch.start()
+        db_manager.create_database()
+
+    def tearDown(self):
+        self.db_path_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _rollup_rows(self, table):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(f"SELECT * FROM {table} ORDER BY source, bucket_start").fetchall()
+
+    def test_inserts_update_hourly_and_daily_buckets(self):
+        """ Tests that each inserted row lands in its hour and day, per source. """
+        db_manager.insert_articles([
+            _row(1, 'Positive', 0.8),
+            _row(2, 'Negative', 0.6),
+            _row(3, 'Neutral', 0.9, when=datetime(2025, 10, 24, 10, 5)),
+            _row(4, 'Positive', 0.7, source='Reuters'),
+        ])
+
+        hourly = rollups.get_sentiment_series('Yahoo', 'hour')
+        self.assertEqual([h['bucket_start'] for h in hourly], ['2025-10-24 09:00:00', '2025-10-24 10:00:00'])
+        self.assertEqual(hourly[0]['article_count'], 2)
+        self.assertEqual((hourly[0]['positive_count'], hourly[0]['negative_count']), (1, 1))
+        self.assertAlmostEqual(hourly[0]['mean_score'], 0.7)
+        self.assertAlmostEqual(hourly[0]['sentiment_index'], 0.1)
+
+        daily = rollups.get_sentiment_series(None, 'day')
+        self.assertEqual(len(daily), 1)
+        self.assertEqual(daily[0]['article_count'], 4)
+
+    def test_duplicates_are_not_counted_and_insert_counts_exclude_triggers(self):
+        """ Tests that ignored duplicates leave the rollups alone and don't inflate 'inserted'. """
+        self.assertEqual(db_manager.insert_articles([_row(1, 'Positive', 0.8)]), {'inserted': 1, 'duplicates': 0})
+        self.assertEqual(db_manager.insert_articles([_row(1, 'Positive', 0.8)]), {'inserted': 0, 'duplicates': 1})
+        self.assertEqual(rollups.get_sentiment_series('Yahoo', 'day')[0]['article_count'], 1)
+
+    def test_rescoring_moves_contribution_between_labels(self):
+        """ Tests that an UPDATE of label/score is reflected without a rebuild. """
+        db_manager.insert_articles([_row(1, 'Positive', 0.8), _row(2, 'Neutral', 0.5)])
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE news_sentiment SET sentiment_label = 'Negative', sentiment_score = 0.9 "
+                         "WHERE headline = 'Headline 1'")
+
+        day = rollups.get_sentiment_series('Yahoo', 'day')[0]
+        self.assertEqual((day['positive_count'], day['negative_count'], day['neutral_count']), (0, 1, 1))
+        self.assertAlmostEqual(day['sentiment_index'], -0.45)
+
+    def test_time_bounds_are_start_inclusive_end_exclusive(self):
+        """ Tests that start/end select buckets by their start time. """
+        db_manager.insert_articles([
+            _row(n, 'Neutral', 0.5, when=datetime(2025, 10, 20 + n, 12)) for n in range(4)
+        ])
+        days = rollups.get_sentiment_series('Yahoo', 'day', start='2025-10-21', end=datetime(2025, 10, 23))
+        self.assertEqual([d['bucket_start'] for d in days], ['2025-10-21 00:00:00', '2025-10-22 00:00:00'])
+
+    def test_rebuild_matches_incremental_state(self):
+        """ Tests that a full rebuild produces the same rollups as the triggers. """
+        db_manager.insert_articles([_row(n, ['Positive', 'Negative', 'Neutral'][n % 3], 0.5 + n / 100,
+                                         when=datetime(2025, 10, 24, n % 5)) for n in range(30)])
+        incremental = self._rollup_rows('sentiment_rollup_hourly')
+
+        self.assertTrue(rollups.rebuild_rollups())
+        rebuilt = self._rollup_rows('sentiment_rollup_hourly')
+        self.assertEqual([r[:6] for r in rebuilt], [r[:6] for r in incremental])
+        for a, b in zip(rebuilt, incremental):
+            self.assertAlmostEqual(a[6], b[6])
+
+    def test_unknown_granularity(self):
+        """ Tests that an unknown granularity is rejected. """
+        with self.assertRaises(ValueError):
+            rollups.get_sentiment_series(granularity='week')
+
+if __name__ == '__main__':
+    unittest.main()
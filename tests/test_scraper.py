@@ -0,0 +1,149 @@
+#
+# tests/test_scraper.py
+# Tests for the concurrent feed scraper, run against a local http.server
+# stand-in so no network access is needed.
+#
+
+import gzip
+import threading
+from datetime import datetime
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from src.scraper import feed_scraper
+
+FEED_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Test Feed</title>
+<item><title>Stocks rally on rate cut hopes</title><link>http://example.com/a</link>
+<pubDate>Fri, 24 Oct 2025 10:00:00 +0200</pubDate></item>
+<item><title>Oil slips as supply grows</title><link>http://example.com/b</link>
+<pubDate>Fri, 24 Oct 2025 07:30:00 GMT</pubDate></item>
+</channel></rss>"""
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Fri, 24 Oct 2025 09:00:00 GMT"
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    """ Serves FEED_XML with validators and honours conditional requests. """
+
+    def do_GET(self):
+        self.server.request_count += 1
+        if self.path == '/missing':
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = FEED_XML
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        if self.path == '/gzip':
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('ETag', ETAG)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestFeedScraper(unittest.TestCase):
+    """ Test suite for conditional, concurrent feed fetching. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+        cls.server.request_count = 0
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _source(self, name, path='/feed'):
+        return {'name': name, 'url': self.base_url + path, 'label': name.upper(), 'interval': None}
+
+    def test_load_sources_accepts_urls_and_mappings(self):
+        """ Tests that both source styles in settings.yaml are normalized. """
+        sources = feed_scraper.load_sources({'sources': {
+            'plain': 'http://example.com/rss',
+            'mapped': {'url': 'http://example.com/other', 'label': 'Other Feed', 'interval': 60},
+            'broken': {},
+        }})
+        self.assertEqual([s['name'] for s in sources], ['plain', 'mapped'])
+        self.assertEqual(sources[0]['label'], 'plain')
+        self.assertEqual(sources[1]['label'], 'Other Feed')
+        self.assertEqual(sources[1]['interval'], 60)
+
+    @patch('src.scraper.feed_scraper._parse_entries')
+    def test_not_modified_feed_is_not_parsed(self, mock_parse_entries):
+        """ Tests that a 304 keeps the old validators and skips parsing. """
+        validators = {'etag': ETAG, 'last_modified': LAST_MODIFIED}
+        result = feed_scraper.fetch_feed(self._source('cached'), validators)
+
+        self.assertEqual(result['status'], 304)
+        self.assertEqual(result['articles'], [])
+        self.assertEqual(result['etag'], ETAG)
+        self.assertIsNone(result['error'])
+        mock_parse_entries.assert_not_called()
+
+    def test_http_error_is_reported(self):
+        """ Tests that a failing feed is reported instead of raising. """
+        result = feed_scraper.fetch_feed(self._source('gone', '/missing'))
+        self.assertEqual(result['status'], 404)
+        self.assertEqual(result['error'], 'HTTP 404')
+
+    @patch('src.scraper.feed_scraper._stream_entries')
+    def test_validators_only_sent_for_same_url(self, mock_stream_entries):
+        """ Tests that state recorded for a different URL is not reused. """
+        mock_stream_entries.return_value = ([], {})
+        state = {'moved': {'url': 'http://example.com/old', 'etag': ETAG, 'last_modified': None}}
+        _, new_state = feed_scraper.scrape_feeds([self._source('moved')], feed_state=state)
+        self.assertEqual(new_state['moved']['status'], 200)
+        mock_stream_entries.assert_called_once()
+
+    def test_published_dates_and_high_water_mark(self):
+        """ Tests that pubDate becomes a UTC published_timestamp and the newest item sets the mark. """
+        for path in ('/feed', '/gzip'):
+            result = feed_scraper.fetch_feed(self._source('dated', path))
+            self.assertEqual([a['published_timestamp'] for a in result['articles']],
+                             [datetime(2025, 10, 24, 8, 0), datetime(2025, 10, 24, 7, 30)])
+            self.assertEqual(result['high_water_published'], datetime(2025, 10, 24, 8, 0))
+            self.assertEqual(result['high_water_guid'], 'http://example.com/a')
+
+    def test_items_behind_high_water_mark_are_skipped(self):
+        """ Tests that a refetch without validators only returns items newer than the mark. """
+        mark = {'high_water_published': datetime(2025, 10, 24, 7, 45), 'high_water_guid': 'http://example.com/z'}
+        result = feed_scraper.fetch_feed(self._source('marked'), mark)
+        self.assertEqual([a['url'] for a in result['articles']], ['http://example.com/a'])
+        self.assertEqual(result['skipped'], 1)
+
+        mark = {'high_water_published': datetime(2025, 10, 24, 8, 0), 'high_water_guid': 'http://example.com/a'}
+        result = feed_scraper.fetch_feed(self._source('marked'), mark)
+        self.assertEqual(result['articles'], [])
+        self.assertEqual(result['high_water_published'], mark['high_water_published'])
+
+    def test_scrape_feeds_concurrently_then_conditionally(self):
+        """ Tests a full round trip: 200s with validators, then 304s on the next poll. """
+        sources = [self._source(f"feed{n}") for n in range(4)]
+        articles, state = feed_scraper.scrape_feeds(sources, max_workers=4, max_per_host=2)
+
+        self.assertEqual(len(articles), 8)
+        self.assertEqual({a['source'] for a in articles}, {'FEED0', 'FEED1', 'FEED2', 'FEED3'})
+        self.assertTrue(all(a['feed'] == a['source'].lower() for a in articles))
+        self.assertTrue(all(s['etag'] == ETAG for s in state.values()))
+
+        articles, state = feed_scraper.scrape_feeds(sources, feed_state=state)
+        self.assertEqual(articles, [])
+        self.assertTrue(all(s['status'] == 304 for s in state.values()))
+
+if __name__ == '__main__':
+    unittest.main()
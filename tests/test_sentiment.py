@@ -12,6 +12,12 @@ from src.nlp import sentiment
 class TestSentimentAnalysis(unittest.TestCase):
     """ Test suite using mocking for analyze_sentiment. """
 
+    def setUp(self):
+        # Keep the persistent sentiment cache out of model-level tests.
+        cache_patch = patch('src.nlp.sentiment_cache.get_sentiment_cache', return_value=None)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
     @patch('src.nlp.sentiment._initialize_model')
     def test_analyze_sentiment_positive(self, mock_initialize_model):
         """ Tests positive case with proper mocking. """
@@ -28,7 +34,9 @@ class TestSentimentAnalysis(unittest.TestCase):
             'attention_mask': torch.tensor([[1]])
         }
 
+        scored = sentiment.HEADLINES_SCORED.value()
         result = sentiment.analyze_sentiment("This company is performing great!")
+        self.assertEqual(sentiment.HEADLINES_SCORED.value(), scored + 1)
 
         self.assertIsNotNone(result)
         self.assertEqual(result.get('label'), 'Positive')
@@ -69,5 +77,60 @@ class TestSentimentAnalysis(unittest.TestCase):
         mock_tokenizer_instance.assert_called_once()
         mock_model_instance.assert_called_once()
 
+    @patch('src.nlp.sentiment._initialize_model')
+    def test_analyze_sentiment_batch_preserves_input_order(self, mock_initialize_model):
+        """ Tests that length-sorted buckets are scattered back to input order. """
+        mock_tokenizer_instance = MagicMock()
+        mock_model_instance = MagicMock()
+        sentiment.tokenizer = mock_tokenizer_instance
+        sentiment.model = mock_model_instance
+
+        # The first headline is the longest, so it is scored in the second bucket.
+        mock_tokenizer_instance.return_value = {
+            'input_ids': [[101, 7, 8, 9, 102], [101, 102]],
+            'attention_mask': [[1, 1, 1, 1, 1], [1, 1]]
+        }
+        mock_tokenizer_instance.pad.return_value = {
+            'input_ids': torch.tensor([[101]]),
+            'attention_mask': torch.tensor([[1]])
+        }
+        short_bucket_output = MagicMock()
+        short_bucket_output.logits = torch.tensor([[-1.0, 5.0, -1.0]])
+        long_bucket_output = MagicMock()
+        long_bucket_output.logits = torch.tensor([[5.0, -1.0, -1.0]])
+        mock_model_instance.side_effect = [short_bucket_output, long_bucket_output]
+
+        results = sentiment.analyze_sentiment_batch(
+            ["A much longer and positive headline", "Short bad"], batch_size=1
+        )
+
+        self.assertEqual([r.get('label') for r in results], ['Positive', 'Negative'])
+        self.assertEqual(mock_model_instance.call_count, 2)
+        # Each bucket is padded to its own longest item only.
+        first_pad_features = mock_tokenizer_instance.pad.call_args_list[0][0][0]
+        self.assertEqual(first_pad_features, [{'input_ids': [101, 102], 'attention_mask': [1, 1]}])
+        mock_initialize_model.assert_not_called()
+
+    @patch('src.nlp.sentiment._run_buckets')
+    @patch('src.nlp.sentiment._encode_buckets')
+    def test_analyze_sentiment_batch_checks_cache_first(self, mock_encode_buckets, mock_run_buckets):
+        """ Tests that only cache misses reach the model, once per distinct headline. """
+        mock_cache = MagicMock()
+        mock_cache.get_many.return_value = [{'label': 'Positive', 'score': 0.9}, None, None]
+        mock_encode_buckets.return_value = [([0], {})]
+        mock_run_buckets.return_value = [{'label': 'Negative', 'score': 0.8}]
+
+        with patch('src.nlp.sentiment_cache.get_sentiment_cache', return_value=mock_cache):
+            results = sentiment.analyze_sentiment_batch(["Cached", "New headline", "new  headline"])
+
+        self.assertEqual([r['label'] for r in results], ['Positive', 'Negative', 'Negative'])
+        mock_encode_buckets.assert_called_once_with(["New headline"], None)
+        mock_run_buckets.assert_called_once_with([([0], {})], 1)
+        mock_cache.put_many.assert_called_once()
+
+    def test_analyze_sentiment_batch_empty(self):
+        """ Tests that an empty input never touches the model. """
+        self.assertEqual(sentiment.analyze_sentiment_batch([]), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
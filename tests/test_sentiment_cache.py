@@ -0,0 +1,129 @@
+#
+# tests/test_sentiment_cache.py
+# Unit tests for the persistent, content-addressed sentiment cache.
+#
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.nlp import sentiment, sentiment_cache
+from src.nlp.sentiment_cache import SentimentCache
+
+class TestCacheKeys(unittest.TestCase):
+    """ Test suite for headline normalization and cache keys. """
+
+    def test_normalization_ignores_case_and_whitespace(self):
+        """ Tests that cosmetic differences map to the same key. """
+        key1 = sentiment_cache.make_cache_key("Apple  beats estimates ", "v1")
+        key2 = sentiment_cache.make_cache_key("apple beats\testimates", "v1")
+        self.assertEqual(key1, key2)
+
+    def test_model_version_is_part_of_key(self):
+        """ Tests that a new model version never reads an old model's result. """
+        key1 = sentiment_cache.make_cache_key("Apple beats estimates", "v1")
+        key2 = sentiment_cache.make_cache_key("Apple beats estimates", "v2")
+        self.assertNotEqual(key1, key2)
+
+class TestSentimentCache(unittest.TestCase):
+    """ Test suite for the two-level cache, run against a temporary database. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'cache.db')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_memory_and_disk_hits(self):
+        """ Tests that results survive a new process via the disk table. """
+        cache = SentimentCache(self.db_path, memory_size=10, max_entries=100)
+        self.assertIsNone(cache.get("Stocks rally", "v1"))
+        cache.put("Stocks rally", "v1", {'label': 'Positive', 'score': 0.9})
+        self.assertEqual(cache.get("stocks rally", "v1"), {'label': 'Positive', 'score': 0.9})
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+        # A fresh cache object has an empty LRU, so this hit comes from disk.
+        fresh = SentimentCache(self.db_path, memory_size=10, max_entries=100)
+        self.assertEqual(fresh.get("Stocks rally", "v1"), {'label': 'Positive', 'score': 0.9})
+        self.assertEqual(fresh.stats()['disk_hits'], 1)
+
+    def test_failed_results_are_not_cached(self):
+        """ Tests that empty results from failed inference are never stored. """
+        cache = SentimentCache(self.db_path)
+        cache.put("Broken", "v1", {})
+        self.assertIsNone(cache.get("Broken", "v1"))
+
+    def test_memory_lru_is_bounded(self):
+        """ Tests that the in-process LRU drops its oldest entry when full. """
+        cache = SentimentCache(self.db_path, memory_size=2, max_entries=100)
+        for n in range(3):
+            cache.put(f"Headline {n}", "v1", {'label': 'Neutral', 'score': 0.5})
+        self.assertEqual(cache.stats()['memory_entries'], 2)
+
+    def test_disk_eviction_respects_max_entries(self):
+        """ Tests that the disk table is trimmed to max_entries, oldest first. """
+        cache = SentimentCache(self.db_path, memory_size=0, max_entries=3)
+        for n in range(5):
+            cache.put(f"Headline {n}", "v1", {'label': 'Neutral', 'score': 0.5})
+
+        with sqlite3.connect(self.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        self.assertEqual(count, 3)
+        self.assertIsNone(cache.get("Headline 0", "v1"))
+        self.assertIsNotNone(cache.get("Headline 4", "v1"))
+
+    def test_eviction_waits_for_high_water_mark(self):
+        """ Tests that the table is only counted and trimmed once it is well past max_entries. """
+        cache = SentimentCache(self.db_path, memory_size=0, max_entries=20)
+        cache.put("Headline 0", "v1", {'label': 'Neutral', 'score': 0.5})
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        for n in range(1, 22):
+            cache.put(f"Headline {n}", "v1", {'label': 'Neutral', 'score': 0.5})
+
+        self.assertEqual(sum('COUNT(*)' in sql for sql in statements), 1)
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0], 20)
+
+    def test_recency_updates_are_batched(self):
+        """ Tests that disk hits don't write until a batch is due, and a close flushes them. """
+        writer = SentimentCache(self.db_path, memory_size=0)
+        writer.put("Stocks rally", "v1", {'label': 'Positive', 'score': 0.9})
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE sentiment_cache SET last_used_at = 0")
+
+        reader = SentimentCache(self.db_path, memory_size=0)
+        self.assertIsNotNone(reader.get("Stocks rally", "v1"))
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT last_used_at FROM sentiment_cache").fetchone()[0], 0)
+        reader.close()
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertGreater(conn.execute("SELECT last_used_at FROM sentiment_cache").fetchone()[0], 0)
+
+    @patch('src.nlp.sentiment._initialize_model')
+    def test_single_headline_lookups_are_counted(self, mock_initialize_model):
+        """ Tests that analyze_sentiment reports its cache hits and misses like the batch path. """
+        cache = SentimentCache(self.db_path, memory_size=10, max_entries=100)
+        cache.put("Stocks rally", sentiment.MODEL_VERSION, {'label': 'Positive', 'score': 0.9})
+        before = {result: sentiment.CACHE_LOOKUPS.value(result=result) for result in ('hit', 'miss')}
+        with patch('src.nlp.sentiment_cache.get_sentiment_cache', return_value=cache), \
+             patch.object(sentiment, 'tokenizer', None), patch.object(sentiment, 'model', None):
+            self.assertEqual(sentiment.analyze_sentiment("Stocks rally")['label'], 'Positive')
+            self.assertEqual(sentiment.analyze_sentiment("Oil slips"), {})
+        self.assertEqual(sentiment.CACHE_LOOKUPS.value(result='hit'), before['hit'] + 1)
+        self.assertEqual(sentiment.CACHE_LOOKUPS.value(result='miss'), before['miss'] + 1)
+        cache.close()
+
+    def test_get_many_preserves_order(self):
+        """ Tests that bulk lookups line up with their input positions. """
+        cache = SentimentCache(self.db_path)
+        cache.put_many([("A", {'label': 'Positive', 'score': 0.8})], "v1")
+        results = cache.get_many(["B", "A", "B"], "v1")
+        self.assertEqual(results, [None, {'label': 'Positive', 'score': 0.8}, None])
+
+if __name__ == '__main__':
+    unittest.main()
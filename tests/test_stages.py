@@ -0,0 +1,91 @@
+#
+# tests/test_stages.py
+# Unit tests for the concurrent staged-pipeline runner.
+#
+
+import threading
+import time
+import unittest
+
+from src.etl.stages import Stage, StagedPipeline
+
+class TestStagedPipeline(unittest.TestCase):
+    """ Test suite for StagedPipeline, using plain functions as stages. """
+
+    def test_items_flow_through_all_stages_in_order(self):
+        """ Tests that every item passes through each stage, dropped items excluded. """
+        loaded = []
+        staged = StagedPipeline(
+            iter([[1, 2], [3], [4, 5, 6]]),
+            [
+                Stage('double', lambda batch: [n * 2 for n in batch]),
+                Stage('drop_small', lambda batch: batch if len(batch) > 1 else None),
+                Stage('load', lambda batch: loaded.append(batch)),
+            ],
+            queue_size=1,
+        )
+        stats = staged.run()
+
+        self.assertEqual(loaded, [[2, 4], [8, 10, 12]])
+        self.assertEqual([s['stage'] for s in stats], ['extract', 'double', 'drop_small', 'load'])
+        self.assertEqual(stats[0]['records'], 6)
+        self.assertEqual(stats[2]['items_out'], 2)
+        self.assertEqual(stats[3]['records'], 5)
+
+    def test_bounded_queues_apply_backpressure(self):
+        """ Tests that a slow stage limits how far ahead the source can run. """
+        produced = []
+        consumed = []
+        max_in_flight = [0]
+        lock = threading.Lock()
+
+        def source():
+            for n in range(20):
+                with lock:
+                    produced.append(n)
+                    max_in_flight[0] = max(max_in_flight[0], len(produced) - len(consumed))
+                yield n
+
+        def slow(item):
+            time.sleep(0.005)
+            with lock:
+                consumed.append(item)
+
+        StagedPipeline(source(), [Stage('slow', slow)], queue_size=2).run()
+
+        self.assertEqual(consumed, list(range(20)))
+        # Queue capacity, plus one item being processed, plus one waiting to be put.
+        self.assertLessEqual(max_in_flight[0], 4)
+
+    def test_stage_error_stops_pipeline_and_is_raised(self):
+        """ Tests that a failing stage aborts every worker and surfaces its error. """
+        loaded = []
+
+        def explode(item):
+            if item == 3:
+                raise ValueError("bad item")
+            return item
+
+        def endless():
+            n = 0
+            while True:
+                yield n
+                n += 1
+
+        staged = StagedPipeline(endless(), [Stage('explode', explode), Stage('load', loaded.append)], queue_size=2)
+        with self.assertRaises(ValueError):
+            staged.run()
+        self.assertNotIn(3, loaded)
+
+    def test_source_error_is_raised(self):
+        """ Tests that an error while extracting also aborts the run. """
+        def broken_source():
+            yield 1
+            raise RuntimeError("feed exploded")
+
+        staged = StagedPipeline(broken_source(), [Stage('load', lambda item: None)])
+        with self.assertRaises(RuntimeError):
+            staged.run()
+
+if __name__ == '__main__':
+    unittest.main()
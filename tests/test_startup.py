@@ -0,0 +1,58 @@
+#
+# tests/test_startup.py
+# Startup-cost checks: non-inference entry points must not import the heavy
+# ML stack, and importing the CLI must fit within a measured time budget.
+#
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Project root, so the child process imports this checkout.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds allowed for importing the CLI and every non-inference module.
+# Measured at ~0.15s on a laptop; importing torch alone takes several seconds,
+# so a regression that pulls it back in blows well past this.
+IMPORT_BUDGET_SECONDS = 1.5
+
+HEAVY_MODULES = ['torch', 'transformers', 'feedparser']
+
+MEASURE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+from src.etl import pipeline, streaming, daemon
+from src.scraper import feed_scraper
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+def _measure_imports() -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_SCRIPT],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+class TestStartupCost(unittest.TestCase):
+    """ Test suite guarding the cold-start cost of the CLI. """
+
+    @classmethod
+    def setUpClass(cls):
+        # Best of three runs, to keep a noisy machine from failing the budget.
+        cls.runs = [_measure_imports() for _ in range(3)]
+
+    def test_no_heavy_imports_at_startup(self):
+        """ Tests that importing the CLI and pipeline never imports the ML stack. """
+        self.assertEqual(self.runs[0]['heavy'], [])
+
+    def test_import_time_within_budget(self):
+        """ Tests that the import time stays within IMPORT_BUDGET_SECONDS. """
+        best = min(run['seconds'] for run in self.runs)
+        self.assertLess(best, IMPORT_BUDGET_SECONDS, f"imports took {best:.2f}s")
+
+if __name__ == '__main__':
+    unittest.main()
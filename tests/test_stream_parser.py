@@ -0,0 +1,112 @@
+#
+# tests/test_stream_parser.py
+# Tests for the incremental feed parser and its high-water mark.
+#
+
+import gzip
+import io
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from xml.etree.ElementTree import ParseError
+
+from src.scraper import stream_parser
+
+START = datetime(2025, 10, 24, 12, 0)
+
+def _rss(count, start=START):
+    items = "".join(
+        f"<item><title>Headline {n}</title><link>http://example.com/{n}</link><guid>g{n}</guid>"
+        f"<pubDate>{format_datetime((start - timedelta(minutes=n)).replace(tzinfo=timezone.utc))}</pubDate></item>"
+        for n in range(count)
+    )
+    return f"<?xml version='1.0'?><rss version='2.0'><channel><title>T</title>{items}</channel></rss>".encode()
+
+def _chunks(body, size=100):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+class _CountingChunks:
+    """ Hands out chunks and counts how many were asked for. """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+class TestStreamParser(unittest.TestCase):
+    """ Test suite for parsing feeds incrementally. """
+
+    def test_parse_pub_date_formats(self):
+        """ Tests that RFC 822 and ISO 8601 dates become naive UTC, and junk becomes None. """
+        self.assertEqual(stream_parser.parse_pub_date("Fri, 24 Oct 2025 10:00:00 +0200"), datetime(2025, 10, 24, 8, 0))
+        self.assertEqual(stream_parser.parse_pub_date("2025-10-24T08:00:00Z"), datetime(2025, 10, 24, 8, 0))
+        self.assertEqual(stream_parser.parse_pub_date("2025-10-24T08:00:00"), datetime(2025, 10, 24, 8, 0))
+        self.assertIsNone(stream_parser.parse_pub_date("yesterday"))
+        self.assertIsNone(stream_parser.parse_pub_date(None))
+
+    def test_first_fetch_reads_everything_and_sets_mark(self):
+        """ Tests that without a mark every item is returned and the newest one becomes the mark. """
+        parse = stream_parser.FeedParse('Test').parse(_chunks(_rss(20)))
+        self.assertEqual(len(parse.articles), 20)
+        self.assertEqual(parse.articles[3]['published_timestamp'], START - timedelta(minutes=3))
+        self.assertEqual((parse.high_water_published, parse.high_water_guid), (START, 'g0'))
+        self.assertFalse(parse.stopped_early)
+
+    def test_stops_reading_at_the_mark(self):
+        """ Tests that parsing stops at the mark's GUID and the rest of the feed is never read. """
+        body = _rss(500, start=START + timedelta(minutes=5))
+        chunks = _CountingChunks(_chunks(body))
+        parse = stream_parser.FeedParse('Test', START, 'g5').parse(chunks)
+        self.assertEqual([a['url'] for a in parse.articles], [f"http://example.com/{n}" for n in range(5)])
+        self.assertTrue(parse.stopped_early)
+        self.assertLess(chunks.read, len(chunks.chunks) // 10)
+        self.assertEqual(parse.high_water_published, START + timedelta(minutes=5))
+
+    def test_grace_tolerates_out_of_order_items(self):
+        """ Tests that a new item shortly after an old one is still picked up. """
+        body = (b"<rss><channel>"
+                b"<item><title>New</title><link>http://n/1</link><pubDate>Fri, 24 Oct 2025 12:05:00 GMT</pubDate></item>"
+                b"<item><title>Old</title><link>http://o/1</link><pubDate>Fri, 24 Oct 2025 11:00:00 GMT</pubDate></item>"
+                b"<item><title>Late</title><link>http://n/2</link><pubDate>Fri, 24 Oct 2025 12:01:00 GMT</pubDate></item>"
+                b"<item><title>Old</title><link>http://o/2</link><pubDate>Fri, 24 Oct 2025 10:00:00 GMT</pubDate></item>"
+                b"<item><title>Old</title><link>http://o/3</link><pubDate>Fri, 24 Oct 2025 09:00:00 GMT</pubDate></item>"
+                b"</channel></rss>")
+        parse = stream_parser.FeedParse('Test', START, grace=2).parse([body])
+        self.assertEqual([a['headline'] for a in parse.articles], ['New', 'Late'])
+        self.assertEqual(parse.skipped, 3)
+        self.assertTrue(parse.stopped_early)
+
+    def test_mark_never_moves_backwards(self):
+        """ Tests that a feed with only older items keeps the stored mark. """
+        parse = stream_parser.FeedParse('Test', START + timedelta(hours=1), 'newest').parse([_rss(3)])
+        self.assertEqual(parse.articles, [])
+        self.assertEqual((parse.high_water_published, parse.high_water_guid), (START + timedelta(hours=1), 'newest'))
+
+    def test_atom_entries(self):
+        """ Tests that Atom entries are read, preferring the alternate link. """
+        body = (b"<feed xmlns='http://www.w3.org/2005/Atom'><entry><title>Atom headline</title>"
+                b"<link rel='self' href='http://example.com/self'/><link href='http://example.com/atom'/>"
+                b"<id>tag:1</id><updated>2025-10-24T09:00:00+01:00</updated></entry></feed>")
+        parse = stream_parser.FeedParse('Atom').parse([body])
+        self.assertEqual(parse.articles, [{'headline': 'Atom headline', 'url': 'http://example.com/atom',
+                                           'source': 'Atom', 'published_timestamp': datetime(2025, 10, 24, 8, 0)}])
+        self.assertEqual(parse.high_water_guid, 'tag:1')
+
+    def test_malformed_xml_raises(self):
+        """ Tests that a broken document raises ParseError instead of returning partial results silently. """
+        with self.assertRaises(ParseError):
+            stream_parser.FeedParse('Bad').parse([b"<rss><channel><item><title>A &nbsp; B</title></item>"])
+
+    def test_read_chunks_decompresses_gzip(self):
+        """ Tests that a gzipped response is decompressed chunk by chunk. """
+        body = _rss(50)
+        chunks = list(stream_parser.read_chunks(io.BytesIO(gzip.compress(body)), gzipped=True, chunk_size=64))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), body)
+
+if __name__ == '__main__':
+    unittest.main()
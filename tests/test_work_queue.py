@@ -0,0 +1,144 @@
+#
+# tests/test_work_queue.py
+# Tests for the leased scoring queue, against a temporary database.
+#
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.etl import work_queue
+
+SCRAPED = datetime(2025, 10, 24, 9, 30)
+
+def _article(n):
+    headline, url = f"Headline {n}", f"http://example.com/{n}"
+    return {'headline': headline, 'url': url, 'source': 'Test',
+            'article_hash': db_manager.compute_article_hash(headline, url, SCRAPED)}
+
+def _fake_batch(headlines, batch_size=None):
+    """ Fails headlines ending in '13', scores the rest Positive. """
+    return [{} if h.endswith('13') else {'label': 'Positive', 'score': 0.9} for h in headlines]
+
+class TestWorkQueue(unittest.TestCase):
+    """ Test suite for enqueueing, leasing, reclaiming and acking scoring jobs. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        patches = [
+            patch.object(db_manager, 'DB_PATH', self.db_path),
+            patch('src.nlp.near_duplicates.get_near_duplicate_index', return_value=None),
+            patch('src.nlp.entities.tag_headlines', side_effect=lambda headlines: [None] * len(headlines)),
+            patch('src.nlp.sentiment.analyze_sentiment_batch', side_effect=_fake_batch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+        db_manager.create_database()
+
+    def _count(self, sql):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql).fetchone()[0]
+
+    def test_enqueue_ignores_articles_already_queued(self):
+        """ Tests that enqueueing the same article twice keeps one job. """
+        self.assertEqual(work_queue.enqueue_articles([_article(0), _article(1)], SCRAPED),
+                         {'enqueued': 2, 'duplicates': 0})
+        self.assertEqual(work_queue.enqueue_articles([_article(1), _article(2)], SCRAPED),
+                         {'enqueued': 1, 'duplicates': 1})
+        self.assertEqual(work_queue.queue_stats()['pending'], 3)
+
+    def test_leased_jobs_are_not_claimed_again(self):
+        """ Tests that two claims get disjoint batches, oldest first. """
+        work_queue.enqueue_articles([_article(n) for n in range(5)], SCRAPED)
+        first = work_queue.claim('a', limit=3)
+        second = work_queue.claim('b', limit=3)
+        self.assertEqual([job['headline'] for job in first.jobs], ["Headline 0", "Headline 1", "Headline 2"])
+        self.assertEqual([job['headline'] for job in second.jobs], ["Headline 3", "Headline 4"])
+        self.assertEqual(first.jobs[0]['scraped_timestamp'], SCRAPED)
+        self.assertIsNone(work_queue.claim('c'))
+        self.assertEqual(work_queue.queue_stats()['leased'], 5)
+
+    def test_expired_lease_is_reclaimed(self):
+        """ Tests that a crashed worker's jobs go to the next claim and its late ack is ignored. """
+        work_queue.enqueue_articles([_article(0)], SCRAPED)
+        crashed = work_queue.claim('crashed', lease_seconds=10, now=time.time() - 60)
+        survivor = work_queue.claim('survivor')
+        self.assertEqual(survivor.jobs[0]['attempts'], 2)
+
+        self.assertFalse(work_queue.renew(crashed))
+        self.assertEqual(work_queue.ack(crashed, [job['id'] for job in crashed.jobs]), 0)
+        self.assertTrue(work_queue.renew(survivor))
+        self.assertEqual(work_queue.ack(survivor, [job['id'] for job in survivor.jobs]), 1)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM scoring_jobs"), 0)
+
+    def test_worker_loads_results_and_acks(self):
+        """ Tests that a drained worker stores every scored article and retries only the failed one. """
+        work_queue.enqueue_articles([_article(n) for n in range(20)], SCRAPED)
+        totals = work_queue.run_worker(claim_size=8, drain=True)
+
+        self.assertEqual(self._count("SELECT COUNT(*) FROM news_sentiment"), 19)
+        self.assertEqual((totals['inserted'], totals['acked']), (19, 19))
+        # The failed job was released, retried until out of attempts, then left as dead.
+        self.assertEqual(totals['failed'], work_queue.MAX_ATTEMPTS)
+        self.assertEqual(work_queue.queue_stats()['dead'], 1)
+        stored = self._count(f"SELECT COUNT(*) FROM news_sentiment WHERE article_hash = '{_article(0)['article_hash']}'")
+        self.assertEqual(stored, 1)
+
+    def test_failed_load_releases_the_batch(self):
+        """ Tests that nothing is acked when the load is rolled back. """
+        work_queue.enqueue_articles([_article(n) for n in range(3)], SCRAPED)
+        lease = work_queue.claim('a')
+        with patch.object(db_manager, 'insert_articles', return_value={'inserted': 0, 'duplicates': 0}):
+            stats = work_queue.process_lease(lease)
+        self.assertEqual((stats['acked'], stats['failed']), (0, 3))
+        self.assertEqual(work_queue.queue_stats()['pending'], 3)
+
+    def test_concurrent_claims_never_share_a_job(self):
+        """ Tests that workers claiming at the same time each get distinct jobs. """
+        work_queue.enqueue_articles([_article(n) for n in range(200)], SCRAPED)
+        claimed = []
+        lock = threading.Lock()
+
+        def claim_all(worker_id):
+            while True:
+                lease = work_queue.claim(worker_id, limit=7)
+                if lease is None:
+                    return
+                with lock:
+                    claimed.extend(job['id'] for job in lease.jobs)
+
+        threads = [threading.Thread(target=claim_all, args=(f"w{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(claimed), 200)
+        self.assertEqual(len(set(claimed)), 200)
+
+    def test_worker_refuses_old_sqlite(self):
+        """ Tests that a worker stops at startup when SQLite lacks UPDATE ... RETURNING. """
+        with patch.object(work_queue.sqlite3, 'sqlite_version_info', (3, 31, 1)):
+            with self.assertRaisesRegex(RuntimeError, "SQLite 3.35.0 or newer"):
+                work_queue.run_worker(drain=True)
+
+    def test_heartbeat_keeps_lease_alive(self):
+        """ Tests that a busy worker's heartbeat pushes its lease expiry forward. """
+        work_queue.enqueue_articles([_article(0)], SCRAPED)
+        lease = work_queue.claim('a', lease_seconds=1)
+        initial = lease.expires_at
+        with work_queue.Heartbeat(lease, interval=0.05):
+            time.sleep(0.2)
+        self.assertGreater(lease.expires_at, initial)
+        self.assertFalse(lease.lost)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#
+# tests/test_writer.py
+# Tests for the single-writer group-commit service.
+#
+
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database import db_manager
+from src.database.writer import GroupCommitWriter, WriterClient, WriterError, WriterServer
+
+AUTHKEY = 'test-secret'
+
+def _rows(prefix, count):
+    return [
+        {'source': 'Yahoo', 'headline': f"{prefix} headline {n}", 'article_url': f"http://example.com/{prefix}/{n}",
+         'finbert_result': {'label': 'Positive', 'score': 0.9}, 'scraped_timestamp': datetime(2025, 10, 24, 9, 0)}
+        for n in range(count)
+    ]
+
+def _produce(address, prefix, results):
+    client = WriterClient(address, AUTHKEY)
+    inserted = sum(client.write(_rows(f"{prefix}-{n}", 5))['inserted'] for n in range(10))
+    client.close()
+    results.put(inserted)
+
+class TestGroupCommitWriter(unittest.TestCase):
+    """ Test suite for the writer, run against a temporary database. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db_path_patch = patch.object(db_manager, 'DB_PATH', self.db_path)
+        self.db_path_patch.start()
+        db_manager.create_database()
+        self.writer = GroupCommitWriter(max_batch_rows=1000, max_delay=0.05).start()
+
+    def tearDown(self):
+        self.writer.close()
+        db_manager.use_writer(None)
+        self.db_path_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _count(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM news_sentiment").fetchone()[0]
+
+    def test_concurrent_producers_share_commits(self):
+        """ Tests that writes from many threads are all stored, in fewer commits than writes. """
+        barrier = threading.Barrier(8)
+        results = []
+
+        def producer(n):
+            barrier.wait()
+            results.append(self.writer.write(_rows(f"t{n}", 10)))
+
+        threads = [threading.Thread(target=producer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self._count(), 80)
+        self.assertEqual(results, [{'inserted': 10, 'duplicates': 0}] * 8)
+        self.assertLess(self.writer.commits, 8)
+
+    def test_acknowledgement_reports_duplicates(self):
+        """ Tests that each producer gets its own inserted/duplicate counts. """
+        self.writer.write(_rows('a', 3))
+        self.assertEqual(self.writer.write(_rows('a', 5)), {'inserted': 2, 'duplicates': 3})
+
+    def test_bad_request_does_not_fail_the_group(self):
+        """ Tests that a failing request gets its error while the rest of its group commits. """
+        good = self.writer.submit(_rows('good', 3))
+        bad_row = _rows('bad', 1)
+        bad_row[0]['source'] = ['not', 'bindable']
+        bad = self.writer.submit(bad_row)
+        other = self.writer.submit(_rows('other', 2))
+        self.assertEqual(good.result(5)['inserted'], 3)
+        self.assertEqual(other.result(5)['inserted'], 2)
+        with self.assertRaises(sqlite3.Error):
+            bad.result(5)
+        self.assertEqual(self._count(), 5)
+
+    def test_close_commits_pending_rows(self):
+        """ Tests that closing waits for submitted rows, and later submissions are refused. """
+        futures = [self.writer.submit(_rows(f"p{n}", 2)) for n in range(5)]
+        self.writer.close()
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertEqual(self._count(), 10)
+        with self.assertRaises(WriterError):
+            self.writer.submit(_rows('late', 1))
+
+    def test_insert_articles_goes_through_writer(self):
+        """ Tests that db_manager.insert_articles uses the writer once installed. """
+        db_manager.use_writer(self.writer)
+        self.assertEqual(db_manager.insert_articles(_rows('routed', 4)), {'inserted': 4, 'duplicates': 0})
+        self.assertGreaterEqual(self.writer.commits, 1)
+
+    def test_processes_write_through_server(self):
+        """ Tests that several processes insert through one server without lock errors. """
+        server = WriterServer(self.writer, os.path.join(self.tmp_dir.name, 'writer.sock'), AUTHKEY).start()
+        try:
+            context = multiprocessing.get_context('fork')
+            results = context.Queue()
+            processes = [context.Process(target=_produce, args=(server.address, f"proc{n}", results))
+                         for n in range(4)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(30)
+            self.assertEqual(sorted(results.get(timeout=5) for _ in processes), [50] * 4)
+            self.assertEqual(self._count(), 200)
+        finally:
+            server.stop()
+
+    def test_wrong_authkey_is_refused(self):
+        """ Tests that a producer with the wrong secret can't write. """
+        server = WriterServer(self.writer, os.path.join(self.tmp_dir.name, 'writer.sock'), AUTHKEY).start()
+        try:
+            with self.assertRaises(WriterError):
+                WriterClient(server.address, 'wrong').write(_rows('x', 1))
+        finally:
+            server.stop()
+        self.assertEqual(self._count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()